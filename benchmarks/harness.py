@@ -0,0 +1,156 @@
+"""Minimal timing harness: repeated rounds, JSON report, baseline comparison."""
+from __future__ import annotations
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int          # operations per round
+    rounds: int
+    median_s: float   # per round
+    min_s: float
+    stdev_s: float
+
+    @property
+    def per_op_us(self) -> float:
+        return self.median_s / self.ops * 1e6
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.median_s if self.median_s else float("inf")
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "per_op_us": self.per_op_us, "ops_per_sec": self.ops_per_sec}
+
+
+def _summarise(name: str, ops: int, times: List[float]) -> BenchResult:
+    return BenchResult(
+        name=name, ops=ops, rounds=len(times), median_s=statistics.median(times),
+        min_s=min(times), stdev_s=statistics.stdev(times) if len(times) > 1 else 0.0,
+    )
+
+
+def bench(
+    name: str, fn: Callable[[], object], ops: int, rounds: int = 5, warmup: int = 1
+) -> BenchResult:
+    """Time ``fn`` (which performs ``ops`` operations) over ``rounds`` rounds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return _summarise(name, ops, times)
+
+
+def bench_async(name: str, fn: Callable[[], Awaitable[object]], ops: int, rounds: int = 5,
+                warmup: int = 1, setup: Optional[Callable[[], Awaitable[object]]] = None,
+                teardown: Optional[Callable[[], Awaitable[object]]] = None) -> BenchResult:
+    """Async variant of ``bench``; every round runs on one event loop."""
+    async def run() -> List[float]:
+        if setup:
+            await setup()
+        try:
+            for _ in range(warmup):
+                await fn()
+            times = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await fn()
+                times.append(time.perf_counter() - start)
+            return times
+        finally:
+            if teardown:
+                await teardown()
+
+    return _summarise(name, ops, asyncio.run(run()))
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def make_report(results: List[BenchResult]) -> Dict:
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "revision": _git_revision(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": {r.name: r.to_dict() for r in results},
+    }
+
+
+def save_report(report: Dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """Per-benchmark ratio of current to baseline time per op; >1 means slower.
+
+    A benchmark regresses when it is more than ``tolerance`` slower than the baseline.
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = cur["per_op_us"] / base["per_op_us"] if base["per_op_us"] else float("inf")
+        rows.append({
+            "name": name,
+            "baseline_us": base["per_op_us"],
+            "current_us": cur["per_op_us"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def format_results(results: List[BenchResult]) -> str:
+    width = max([len(r.name) for r in results] + [9])
+    lines = [f"{'benchmark'.ljust(width)}  {'per op (us)':>12}  {'ops/s':>12}  {'stdev %':>8}"]
+    for r in results:
+        spread = r.stdev_s / r.median_s * 100 if r.median_s else 0.0
+        lines.append(
+            f"{r.name.ljust(width)}  {r.per_op_us:12.2f}  {r.ops_per_sec:12.0f}  {spread:8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    if not rows:
+        return "no benchmarks in common with the baseline"
+    width = max(len(r["name"]) for r in rows)
+    lines = [f"{'benchmark'.ljust(width)}  {'baseline us':>12}  {'current us':>12}  {'ratio':>6}"]
+    for r in rows:
+        flag = "  REGRESSED" if r["regressed"] else ""
+        lines.append(
+            f"{r['name'].ljust(width)}  {r['baseline_us']:12.2f}  {r['current_us']:12.2f}"
+            f"  {r['ratio']:6.2f}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,346 @@
+"""Benchmarks for the fetch → evaluate → notify hot path.
+
+Usage:
+    python -m benchmarks.run [--quick] [--filter worker] [--out report.json]
+                             [--baseline benchmarks/baseline.json] [--tolerance 0.2]
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+
+Exits non-zero when any benchmark is slower than the baseline by more than the tolerance.
+HTTP is served by httpx.MockTransport and client rate limits are lifted, so the
+numbers measure our own overhead, not the network or exchange pacing.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import sys
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from src.adapters import payloads
+from src.adapters.nobitex import NobitexClient
+from src.adapters.wallex import WallexClient, parse_trades
+from src.domain.arbitrage_engine import ArbEngine
+from src.domain.models import PriceSnapshot, utcnow
+from src.exchanges.common import CircuitBreaker, TokenBucket
+from src.service.fanout import Broadcaster
+from src.worker.bus import encode
+from src.utils import decoding
+
+from .harness import (
+    BenchResult, bench, bench_async, compare, format_comparison, format_results,
+    load_report, make_report, save_report,
+)
+
+WORKER_SIZES = (10, 100, 1000)
+
+
+def nobitex_payload(mid: float, levels: int = 50) -> bytes:
+    return json.dumps({
+        "status": "ok",
+        "lastUpdate": 1700000000000,
+        "asks": [[f"{mid + 0.01 * (i + 1):.2f}", f"{0.1 + i * 0.01:.4f}"] for i in range(levels)],
+        "bids": [[f"{mid - 0.01 * (i + 1):.2f}", f"{0.1 + i * 0.01:.4f}"] for i in range(levels)],
+    }).encode()
+
+
+def wallex_payload(mid: float, trades: int = 50) -> bytes:
+    return json.dumps({
+        "success": True,
+        "message": "The operation was successful",
+        "result": {"latestTrades": [
+            {
+                "symbol": "BTCUSDT", "quantity": f"{0.01 * (i + 1):.4f}",
+                "price": f"{mid + (0.02 if i % 2 else -0.02) * (i % 5 + 1):.2f}",
+                "sum": "1.0", "isBuyOrder": bool(i % 2), "timestamp": "2024-01-01T00:00:00Z",
+            }
+            for i in range(trades)
+        ]},
+    }).encode()
+
+
+# ---- engine ----
+
+def engine_cases(quick: bool) -> List[BenchResult]:
+    rounds = 3 if quick else 7
+    n = 2000
+    t0 = utcnow()
+    rng = np.random.default_rng(0)
+    mids = 100 + rng.normal(0, 0.5, size=(n, 2))
+    pairs = [
+        (
+            PriceSnapshot(exchange="nobitex", symbol=f"S{i % 50}", bid=m[0] - 0.05, ask=m[0] + 0.05,
+                          ts=t0 + timedelta(seconds=i)),
+            PriceSnapshot(exchange="wallex", symbol=f"S{i % 50}", bid=m[1] - 0.05, ask=m[1] + 0.05,
+                          ts=t0 + timedelta(seconds=i)),
+        )
+        for i, m in enumerate(mids)
+    ]
+    engine = ArbEngine(0.3, 45, 0.15)
+
+    def evaluate():
+        for a, b in pairs:
+            engine.evaluate(a, b)
+            engine.evaluate(b, a)
+
+    exchanges, symbols = ["nobitex", "wallex"], [f"S{i}" for i in range(100)]
+    bid = 100 + rng.normal(0, 0.5, size=(2, 100))
+    ask = bid + 0.1
+    ts = np.full((2, 100), t0.timestamp())
+    batch_engine = ArbEngine(0.3, 45, 0.15)
+
+    def evaluate_batch():
+        for k in range(100):
+            batch_engine.evaluate_batch(exchanges, symbols, bid, ask, ts + k)
+
+    return [
+        bench("engine.evaluate", evaluate, ops=2 * n, rounds=rounds),
+        bench("engine.evaluate_batch[2x100]", evaluate_batch, ops=100 * 100 * 2, rounds=rounds),
+    ]
+
+
+# ---- adapter parsing ----
+
+def _legacy_nobitex(content: bytes):
+    # pre-decoder-layer path: stdlib json into dicts, then index the top level
+    data = json.loads(content)
+    asks = data.get("asks") or []
+    bids = data.get("bids") or []
+    return float(bids[0][0]), float(asks[0][0]), float(bids[0][1]), float(asks[0][1])
+
+
+def _legacy_wallex(content: bytes):
+    # pre-decoder-layer path: two filtered trade lists, two float lists, then max/min
+    trades = json.loads(content)["result"].get("latestTrades", [])
+    buy_trades = [t for t in trades if t.get("isBuyOrder", False)]
+    sell_trades = [t for t in trades if not t.get("isBuyOrder", True)]
+    bid = max([float(t["price"]) for t in buy_trades], default=float("nan"))
+    ask = min([float(t["price"]) for t in sell_trades], default=float("nan"))
+    return bid, ask
+
+
+@contextlib.contextmanager
+def _payload_backend(name: str):
+    """Temporarily point the payload decoders at one JSON backend."""
+    saved = {k: getattr(payloads, k) for k in ("loads", "_decode_book", "_decode_trades")}
+    payloads.loads = decoding.BACKENDS[name]
+    if name == "msgspec":
+        payloads._decode_book = decoding.msgspec.json.Decoder(payloads.NobitexBook).decode
+        payloads._decode_trades = decoding.msgspec.json.Decoder(payloads.WallexTrades).decode
+    else:
+        payloads._decode_book = payloads._decode_trades = None
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            setattr(payloads, k, v)
+
+
+def parse_cases(quick: bool) -> List[BenchResult]:
+    rounds = 3 if quick else 7
+    n = 1000
+    nb = [nobitex_payload(100 + i * 0.01) for i in range(10)]
+    wx = [wallex_payload(100 + i * 0.01) for i in range(10)]
+
+    def run(fn, bodies):
+        return lambda: [fn(bodies[i % 10]) for i in range(n)]
+
+    def nobitex_current(content):
+        return NobitexClient.parse("BTC/USDT", *payloads.decode_nobitex_book(content))
+
+    def wallex_current(content):
+        return parse_trades("BTC/USDT", content)
+
+    results = [
+        bench("parse.nobitex_orderbook[legacy]", run(_legacy_nobitex, nb), ops=n, rounds=rounds),
+        bench("parse.wallex_trades[legacy]", run(_legacy_wallex, wx), ops=n, rounds=rounds),
+    ]
+    for backend in decoding.BACKENDS:
+        with _payload_backend(backend):
+            results += [
+                bench(f"parse.nobitex_orderbook[{backend}]", run(nobitex_current, nb),
+                      ops=n, rounds=rounds),
+                bench(f"parse.wallex_trades[{backend}]", run(wallex_current, wx),
+                      ops=n, rounds=rounds),
+            ]
+    return results
+
+
+# ---- limiter / breaker contention ----
+
+def limiter_cases(quick: bool) -> List[BenchResult]:
+    rounds = 3 if quick else 7
+    tasks, per_task = 100, 50
+
+    async def token_bucket():
+        bucket = TokenBucket(rate_per_sec=1e12, capacity=10**9)
+
+        async def worker():
+            for _ in range(per_task):
+                await bucket.acquire()
+
+        await asyncio.gather(*(worker() for _ in range(tasks)))
+
+    async def circuit_breaker():
+        breaker = CircuitBreaker(failure_threshold=3, open_seconds=1.5)
+
+        async def worker():
+            for _ in range(per_task):
+                if await breaker.allow():
+                    await breaker.on_success()
+
+        await asyncio.gather(*(worker() for _ in range(tasks)))
+
+    return [
+        bench_async("limiter.token_bucket[100 tasks]", token_bucket,
+                    ops=tasks * per_task, rounds=rounds),
+        bench_async("limiter.circuit_breaker[100 tasks]", circuit_breaker,
+                    ops=tasks * per_task, rounds=rounds),
+    ]
+
+
+# ---- worker end to end ----
+
+def nobitex_all_payload(markets: List[str], mid: float, levels: int = 20) -> bytes:
+    book = json.loads(nobitex_payload(mid, levels))
+    return json.dumps({"status": "ok", **{m: book for m in markets}}).encode()
+
+
+def wallex_markets_payload(markets: List[str], mid: float) -> bytes:
+    entry = {
+        "baseAsset": "C", "quoteAsset": "USDT", "faName": "x", "stepSize": 4, "tickSize": 2,
+        "minQty": 0.0001, "minNotional": 1.0,
+        "stats": {"bidPrice": f"{mid - 0.01:.2f}", "askPrice": f"{mid + 0.01:.2f}",
+                  "lastPrice": f"{mid:.2f}", "24h_ch": 0.5, "24h_volume": 1000.0, "7d_ch": 1.0},
+    }
+    symbols = {m: {"symbol": m, **entry} for m in markets}
+    return json.dumps({"success": True, "result": {"symbols": symbols}}).encode()
+
+
+def _mock_transport(routes: Dict[str, List[bytes]]) -> httpx.MockTransport:
+    counters = {suffix: itertools.count() for suffix in routes}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # rotate prices so change detection lets every cycle reach the engine
+        for suffix, bodies in routes.items():
+            if suffix in str(request.url):
+                return httpx.Response(200, content=bodies[next(counters[suffix]) % len(bodies)],
+                                      headers={"content-type": "application/json"})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def worker_case(n_symbols: int, bulk: bool, quick: bool) -> BenchResult:
+    from src.config import settings
+    from src.worker.bus import MemoryBus
+    from src.worker.loop import Worker
+
+    symbols = [f"C{i}/USDT" for i in range(n_symbols)]
+    markets = [s.replace("/", "") for s in symbols]
+    saved_bulk = settings.BULK_FETCH_MIN_SYMBOLS
+    worker: List[Worker] = []
+
+    async def setup():
+        settings.BULK_FETCH_MIN_SYMBOLS = 1 if bulk else 0
+        nb = NobitexClient(client=httpx.AsyncClient(transport=_mock_transport({
+            "/orderbook/all": [nobitex_all_payload(markets, 100 + i * 0.05) for i in range(3)],
+            "/orderbook/": [nobitex_payload(100 + i * 0.05) for i in range(7)],
+        })))
+        wx = WallexClient(client=httpx.AsyncClient(transport=_mock_transport({
+            "/markets": [wallex_markets_payload(markets, 100.2 + i * 0.05) for i in range(3)],
+            "/trades": [wallex_payload(100.2 + i * 0.05) for i in range(5)],
+        })))
+        for c in (nb, wx):
+            c._limiter = TokenBucket(rate_per_sec=1e12, capacity=10**9)
+        worker.append(Worker(symbols, bus=MemoryBus(), clients={"nobitex": nb, "wallex": wx}))
+
+    async def teardown():
+        settings.BULK_FETCH_MIN_SYMBOLS = saved_bulk
+        await worker[0].close()
+
+    async def cycle():
+        await worker[0].run_cycle(symbols)
+
+    rounds = (2 if quick else 5) if n_symbols >= 1000 else (3 if quick else 7)
+    mode = "bulk" if bulk else "per-symbol"
+    return bench_async(f"worker.cycle[{n_symbols} symbols, {mode}]", cycle, ops=2 * n_symbols,
+                       rounds=rounds, setup=setup, teardown=teardown)
+
+
+# ---- subscriber fan-out ----
+
+def fanout_case(n_subscribers: int, quick: bool) -> BenchResult:
+    # half follow everything, half filter on one of 50 symbols
+    rounds = 3 if quick else 7
+    events = 200
+    symbols = [f"S{i}/USDT" for i in range(50)]
+    broadcaster = Broadcaster(buffer_size=events)
+    subs = [broadcaster.subscribe() for _ in range(n_subscribers // 2)]
+    subs += [broadcaster.subscribe([symbols[i % 50]]) for i in range(n_subscribers - len(subs))]
+    t0 = utcnow()
+    payloads = [
+        encode(PriceSnapshot(exchange="nobitex", symbol=symbols[k % 50],
+                             bid=100.0 + k, ask=100.1 + k, ts=t0))
+        for k in range(events)
+    ]
+
+    def publish():
+        for payload in payloads:
+            broadcaster.publish("quote", payload["symbol"], payload)
+        for sub in subs:
+            sub.buffer.clear()
+
+    return bench(f"fanout.publish[{n_subscribers} subscribers]", publish, ops=events, rounds=rounds)
+
+
+SUITES: Dict[str, Callable[[bool], List[BenchResult]]] = {
+    "engine": engine_cases,
+    "parse": parse_cases,
+    "limiter": limiter_cases,
+    "worker": lambda quick: [
+        worker_case(n, bulk, quick) for n in WORKER_SIZES for bulk in (False, True)
+    ],
+    "fanout": lambda quick: [fanout_case(n, quick) for n in (1000, 5000)],
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Hot-path benchmarks")
+    p.add_argument("--quick", action="store_true", help="fewer rounds, for a fast sanity check")
+    p.add_argument("--filter", action="append", default=[], help="only run suites with this name")
+    p.add_argument("--out", help="write the JSON report here")
+    p.add_argument("--baseline", help="compare against this JSON report")
+    p.add_argument("--tolerance", type=float, default=0.2,
+                   help="allowed slowdown vs baseline (0.2 = 20%%)")
+    p.add_argument("--save-baseline", help="write the report here as the new baseline")
+    args = p.parse_args(argv)
+
+    results: List[BenchResult] = []
+    for name, suite in SUITES.items():
+        if args.filter and name not in args.filter:
+            continue
+        results += suite(args.quick)
+    print(format_results(results))
+
+    report = make_report(results)
+    for path in (args.out, args.save_baseline):
+        if path:
+            save_report(report, path)
+
+    if args.baseline:
+        rows = compare(report, load_report(args.baseline), args.tolerance)
+        print()
+        print(format_comparison(rows))
+        if any(r["regressed"] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,7 @@
 import os
 import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Tuple
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
@@ -8,6 +10,9 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy import text
 
+from ..config import settings
+from ..metrics import db_dimension_cache_total
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
@@ -44,15 +49,51 @@ CREATE TABLE IF NOT EXISTS pairs (
   symbol TEXT UNIQUE NOT NULL
 );
 
+-- Raw ticks: append-only, daily range partitions (see ensure_tick_partitions),
+-- native floats and a BRIN index instead of per-row b-tree maintenance
 CREATE TABLE IF NOT EXISTS ticks (
-  id BIGSERIAL PRIMARY KEY,
   exchange_id INT NOT NULL REFERENCES exchanges(id),
   pair_id INT NOT NULL REFERENCES pairs(id),
-  price NUMERIC(18,8) NOT NULL,
+  bid DOUBLE PRECISION,
+  ask DOUBLE PRECISION,
+  bid_size DOUBLE PRECISION,
+  ask_size DOUBLE PRECISION,
   fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+) PARTITION BY RANGE (fetched_at);
+CREATE INDEX IF NOT EXISTS idx_ticks_time_brin ON ticks USING BRIN (fetched_at);
+-- catches ticks outside the daily partitions (clock skew, rows buffered across a rollover)
+CREATE TABLE IF NOT EXISTS ticks_default PARTITION OF ticks DEFAULT;
+
+-- Downsampled rollups for dashboards (see refresh_rollups)
+CREATE TABLE IF NOT EXISTS ticks_1s (
+  exchange_id INT NOT NULL,
+  pair_id INT NOT NULL,
+  bucket TIMESTAMPTZ NOT NULL,
+  bid_avg DOUBLE PRECISION,
+  ask_avg DOUBLE PRECISION,
+  bid_max DOUBLE PRECISION,
+  ask_min DOUBLE PRECISION,
+  bid_last DOUBLE PRECISION,
+  ask_last DOUBLE PRECISION,
+  n INT NOT NULL,
+  PRIMARY KEY (pair_id, exchange_id, bucket)
 );
-CREATE INDEX IF NOT EXISTS idx_ticks_pair_time ON ticks(pair_id, fetched_at DESC);
-CREATE INDEX IF NOT EXISTS idx_ticks_exchange_time ON ticks(exchange_id, fetched_at DESC);
+CREATE INDEX IF NOT EXISTS idx_ticks_1s_bucket_brin ON ticks_1s USING BRIN (bucket);
+
+CREATE TABLE IF NOT EXISTS ticks_1m (
+  exchange_id INT NOT NULL,
+  pair_id INT NOT NULL,
+  bucket TIMESTAMPTZ NOT NULL,
+  bid_avg DOUBLE PRECISION,
+  ask_avg DOUBLE PRECISION,
+  bid_max DOUBLE PRECISION,
+  ask_min DOUBLE PRECISION,
+  bid_last DOUBLE PRECISION,
+  ask_last DOUBLE PRECISION,
+  n INT NOT NULL,
+  PRIMARY KEY (pair_id, exchange_id, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_ticks_1m_bucket_brin ON ticks_1m USING BRIN (bucket);
 
 CREATE TABLE IF NOT EXISTS opportunities (
   id BIGSERIAL PRIMARY KEY,
@@ -83,56 +124,234 @@ INSERT INTO pairs(symbol) VALUES ('BTCUSDT') ON CONFLICT DO NOTHING;
 """
 
 
+class DimensionCache:
+    """name -> id for the small, nearly static exchanges/pairs tables.
+
+    Warmed in ``init_db_schema``; a miss costs one INSERT ... ON CONFLICT ... RETURNING.
+    """
+
+    TABLES = {"exchanges": "name", "pairs": "symbol"}
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def warm(self, conn) -> None:
+        for table, name_col in self.TABLES.items():
+            rows = await conn.execute(text(f"SELECT id, {name_col} FROM {table}"))
+            for row_id, name in rows:
+                self._ids[(table, name)] = row_id
+
+    def invalidate(self) -> None:
+        # ids handed out inside a rolled-back transaction may not exist
+        self._ids.clear()
+
+    async def get_id(self, conn, table: str, name_col: str, name_val: str) -> int:
+        key = (table, name_val)
+        cached = self._ids.get(key)
+        if cached is not None:
+            db_dimension_cache_total.labels(table=table, outcome="hit").inc()
+            return cached
+        db_dimension_cache_total.labels(table=table, outcome="miss").inc()
+        # DO UPDATE (a no-op) rather than DO NOTHING so RETURNING also yields existing rows
+        row = await conn.execute(
+            text(
+                f"INSERT INTO {table}({name_col}) VALUES(:v) "
+                f"ON CONFLICT ({name_col}) DO UPDATE SET {name_col}=EXCLUDED.{name_col} "
+                "RETURNING id"
+            ),
+            {"v": name_val},
+        )
+        row_id = row.scalar_one()
+        self._ids[key] = row_id
+        return row_id
+
+
+dim_cache = DimensionCache()
+
+
+async def _migrate_legacy_ticks(conn) -> None:
+    # the original ticks table was a plain heap with a NUMERIC price; keep it aside
+    row = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = 'ticks' AND relkind = 'r'")
+    )
+    if row.first():
+        await conn.execute(text("ALTER TABLE ticks RENAME TO ticks_legacy"))
+
+
+def _partition_name(day: date) -> str:
+    return f"ticks_p{day:%Y%m%d}"
+
+
+async def ensure_tick_partitions(conn, days_ahead: int = None, today: date = None) -> None:
+    """Create daily ticks partitions from yesterday through ``days_ahead`` days out.
+
+    Rows the DEFAULT partition already holds for a new day move into it, since a
+    range partition cannot be attached while the default holds rows for that range.
+    """
+    days_ahead = settings.DB_PARTITION_DAYS_AHEAD if days_ahead is None else days_ahead
+    today = today or datetime.now(timezone.utc).date()
+    for offset in range(-1, days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = _partition_name(day)
+        exists = await conn.execute(text("SELECT to_regclass(:n)"), {"n": name})
+        if exists.scalar_one() is not None:
+            continue
+        bounds = {"lo": day.isoformat(), "hi": (day + timedelta(days=1)).isoformat()}
+        await conn.execute(text(
+            f"CREATE TABLE {name} (LIKE ticks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        await conn.execute(text(
+            f"WITH moved AS (DELETE FROM ticks_default "
+            f"WHERE fetched_at >= CAST(:lo AS timestamptz) "
+            f"AND fetched_at < CAST(:hi AS timestamptz) "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        await conn.execute(text(
+            f"ALTER TABLE ticks ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['lo']}') TO ('{bounds['hi']}')"
+        ))
+
+
+async def drop_old_tick_partitions(conn, retention_days: int = None, today: date = None) -> list:
+    """Drop daily ticks partitions that ended more than ``retention_days`` ago.
+
+    Returns the dropped partitions' names.
+    """
+    retention_days = settings.DB_TICK_RETENTION_DAYS if retention_days is None else retention_days
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=retention_days)
+    rows = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'ticks'"
+    ))
+    dropped = []
+    for (name,) in rows.all():
+        try:
+            day = datetime.strptime(name, "ticks_p%Y%m%d").date()
+        except ValueError:
+            continue
+        if day < cutoff:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    await conn.execute(text("DELETE FROM ticks_default WHERE fetched_at < :t"),
+                       {"t": datetime.combine(cutoff, datetime.min.time(), timezone.utc)})
+    return dropped
+
+
+_ROLLUP_1S = """
+INSERT INTO ticks_1s (exchange_id, pair_id, bucket, bid_avg, ask_avg, bid_max, ask_min,
+                      bid_last, ask_last, n)
+SELECT exchange_id, pair_id, date_trunc('second', fetched_at),
+       avg(bid), avg(ask), max(bid), min(ask),
+       (array_agg(bid ORDER BY fetched_at DESC))[1], (array_agg(ask ORDER BY fetched_at DESC))[1],
+       count(*)
+FROM ticks WHERE fetched_at >= :since AND fetched_at < :until
+GROUP BY 1, 2, 3
+ON CONFLICT (pair_id, exchange_id, bucket) DO UPDATE SET
+  bid_avg = EXCLUDED.bid_avg, ask_avg = EXCLUDED.ask_avg, bid_max = EXCLUDED.bid_max,
+  ask_min = EXCLUDED.ask_min, bid_last = EXCLUDED.bid_last, ask_last = EXCLUDED.ask_last,
+  n = EXCLUDED.n
+"""
+
+_ROLLUP_1M = """
+INSERT INTO ticks_1m (exchange_id, pair_id, bucket, bid_avg, ask_avg, bid_max, ask_min,
+                      bid_last, ask_last, n)
+SELECT exchange_id, pair_id, date_trunc('minute', bucket),
+       sum(bid_avg * n) / sum(n), sum(ask_avg * n) / sum(n), max(bid_max), min(ask_min),
+       (array_agg(bid_last ORDER BY bucket DESC))[1], (array_agg(ask_last ORDER BY bucket DESC))[1],
+       sum(n)
+FROM ticks_1s WHERE bucket >= :since AND bucket < :until
+GROUP BY 1, 2, 3
+ON CONFLICT (pair_id, exchange_id, bucket) DO UPDATE SET
+  bid_avg = EXCLUDED.bid_avg, ask_avg = EXCLUDED.ask_avg, bid_max = EXCLUDED.bid_max,
+  ask_min = EXCLUDED.ask_min, bid_last = EXCLUDED.bid_last, ask_last = EXCLUDED.ask_last,
+  n = EXCLUDED.n
+"""
+
+
+async def refresh_rollups(conn, now: datetime = None, lookback_seconds: float = None) -> None:
+    """Recompute the 1s and 1m rollups covering the last ``lookback_seconds``; idempotent."""
+    now = now or datetime.now(timezone.utc)
+    lookback = timedelta(seconds=lookback_seconds or settings.DB_ROLLUP_LOOKBACK_SECONDS)
+    since_1s = (now - lookback).replace(microsecond=0)
+    await conn.execute(text(_ROLLUP_1S), {"since": since_1s, "until": now})
+    # whole minutes only, so a partial minute is rebuilt from all of its seconds next time
+    since_1m = since_1s.replace(second=0)
+    await conn.execute(text(_ROLLUP_1M), {"since": since_1m, "until": now})
+
+
+async def apply_rollup_retention(conn, now: datetime = None) -> None:
+    now = now or datetime.now(timezone.utc)
+    await conn.execute(text("DELETE FROM ticks_1s WHERE bucket < :t"),
+                       {"t": now - timedelta(days=settings.DB_ROLLUP_1S_RETENTION_DAYS)})
+    await conn.execute(text("DELETE FROM ticks_1m WHERE bucket < :t"),
+                       {"t": now - timedelta(days=settings.DB_ROLLUP_1M_RETENTION_DAYS)})
+
+
+async def run_maintenance() -> None:
+    """One pass of partition rollover, rollup refresh and retention.
+
+    Every process that owns a writer runs this; a transaction-scoped advisory lock
+    keeps the passes of several worker shards from overlapping.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('ticks_maintenance'))"))
+        await ensure_tick_partitions(conn)
+        await refresh_rollups(conn)
+        await drop_old_tick_partitions(conn)
+        await apply_rollup_retention(conn)
+
+
+async def maintenance_loop() -> None:
+    while True:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            print(f"❌ DB maintenance failed: {e}")
+        await asyncio.sleep(settings.DB_ROLLUP_INTERVAL_SECONDS)
+
+
 async def init_db_schema():
     """Create tables and indexes if not exist"""
     async with engine.begin() as conn:
+        await _migrate_legacy_ticks(conn)
         for stmt in filter(None, DDL.split(';')):
             sql = stmt.strip()
             if sql:
                 await conn.execute(text(sql))
+        await ensure_tick_partitions(conn)
+        await dim_cache.warm(conn)
     print("✅ Database schema initialized.")
 
 
 async def _get_id(conn, table: str, name_col: str, name_val: str) -> int:
     """Return ID of a record, inserting if not present."""
-    row = await conn.execute(
-        text(f"SELECT id FROM {table} WHERE {name_col}=:v LIMIT 1"),
-        {"v": name_val},
-    )
-    r = row.first()
-    if r:
-        return r[0]
-
-    row = await conn.execute(
-        text(
-            f"INSERT INTO {table}({name_col}) VALUES(:v) "
-            "ON CONFLICT DO NOTHING RETURNING id"
-        ),
-        {"v": name_val},
-    )
-    r = row.first()
-    if r:
-        return r[0]
-
-    row = await conn.execute(
-        text(f"SELECT id FROM {table} WHERE {name_col}=:v LIMIT 1"),
-        {"v": name_val},
-    )
-    return row.first()[0]
+    return await dim_cache.get_id(conn, table, name_col, name_val)
 
 
-async def save_tick(exchange_name: str, pair_symbol: str, price: float):
-    """Store latest tick price"""
+async def save_tick(
+    exchange_name: str,
+    pair_symbol: str,
+    bid: float | None,
+    ask: float | None,
+    bid_size: float | None = None,
+    ask_size: float | None = None,
+):
+    """Store latest tick quote"""
     async with SessionLocal() as s:
         async with s.begin():
             ex_id = await _get_id(s, "exchanges", "name", exchange_name)
             pr_id = await _get_id(s, "pairs", "symbol", pair_symbol)
             await s.execute(
                 text(
-                    "INSERT INTO ticks(exchange_id, pair_id, price) "
-                    "VALUES(:e,:p,:pr)"
+                    "INSERT INTO ticks(exchange_id, pair_id, bid, ask, bid_size, ask_size) "
+                    "VALUES(:e,:p,:b,:a,:bs,:as)"
                 ),
-                {"e": ex_id, "p": pr_id, "pr": price},
+                {"e": ex_id, "p": pr_id, "b": bid, "a": ask, "bs": bid_size, "as": ask_size},
             )
 
 
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..config import settings
+from ..domain.models import ArbOpportunity, utcnow
+from ..metrics import db_buffer_rows, db_flush_latency_seconds, db_rows_total
+from .database import _get_id, dim_cache
+
+logger = logging.getLogger(__name__)
+
+TICK_COLUMNS = ("exchange_id", "pair_id", "bid", "ask", "bid_size", "ask_size", "fetched_at")
+OPP_COLUMNS = (
+    "pair_id", "buy_exchange_id", "sell_exchange_id",
+    "diff_abs", "diff_pct", "est_profit_usd", "detected_at",
+)
+# keep well under driver bind-parameter limits (asyncpg/sqlite ~32k)
+_ROWS_PER_STATEMENT = 500
+Batch = Tuple[List[tuple], List[tuple]]  # ticks, opportunities
+
+
+def _nan_to_none(x: float | None) -> float | None:
+    return None if x is None or x != x else float(x)
+
+
+def _row_error(exc: BaseException) -> bool:
+    """Whether ``exc`` is about the rows written (a bad value, a constraint), not the database."""
+    if isinstance(exc, (DataError, IntegrityError)):
+        return True
+    # COPY raises the driver's own exceptions; SQLSTATE class 22 is data, 23 integrity
+    sqlstate = getattr(getattr(exc, "orig", exc), "sqlstate", None) or ""
+    return sqlstate[:2] in ("22", "23")
+
+
+class BufferedWriter:
+    """Accumulates ticks and opportunities in memory and writes them in bulk.
+
+    ``add_*`` never touches the database, so the worker never waits on it.
+    Rows are flushed when ``max_rows`` are pending or every ``flush_interval``
+    seconds, via PostgreSQL COPY on asyncpg and multi-row INSERT elsewhere.
+    During a long outage the oldest rows beyond ``max_buffer`` are dropped.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        max_rows: int = None,
+        flush_interval: float = None,
+        max_buffer: int = None,
+    ):
+        if engine is None:
+            from .database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+        self.max_rows = max_rows or settings.DB_FLUSH_MAX_ROWS
+        self.flush_interval = flush_interval or settings.DB_FLUSH_INTERVAL_SECONDS
+        max_buffer = max_buffer or settings.DB_BUFFER_MAX_ROWS
+        # (exchange, symbol, bid, ask, bid_size, ask_size, fetched_at)
+        self._ticks: Deque[tuple] = deque(maxlen=max_buffer)
+        # (symbol, buy_ex, sell_ex, diff_abs, diff_pct, est_profit_usd, detected_at)
+        self._opps: Deque[tuple] = deque(maxlen=max_buffer)
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def use_copy(self) -> bool:
+        return settings.DB_USE_COPY and self.engine.dialect.driver == "asyncpg"
+
+    def _push(self, table: str, buf: Deque, row: tuple) -> None:
+        if len(buf) == buf.maxlen:
+            db_rows_total.labels(table=table, outcome="dropped").inc()
+        buf.append(row)
+        db_buffer_rows.labels(table=table).set(len(buf))
+        if self._wakeup is not None and len(self._ticks) + len(self._opps) >= self.max_rows:
+            self._wakeup.set()
+
+    def add_tick(
+        self,
+        exchange_name: str,
+        pair_symbol: str,
+        bid: float | None,
+        ask: float | None,
+        bid_size: float | None = None,
+        ask_size: float | None = None,
+        fetched_at: datetime = None,
+    ) -> None:
+        bid, ask = _nan_to_none(bid), _nan_to_none(ask)
+        if bid is None and ask is None:
+            return
+        self._push("ticks", self._ticks, (
+            exchange_name, pair_symbol, bid, ask,
+            _nan_to_none(bid_size), _nan_to_none(ask_size), fetched_at or utcnow(),
+        ))
+
+    def add_opportunity(self, opp: ArbOpportunity, est_profit_usd: float | None = None) -> None:
+        self._push("opportunities", self._opps, (
+            opp.symbol, opp.buy_from, opp.sell_to, opp.diff_abs, opp.diff_pct,
+            opp.est_profit_usd if est_profit_usd is None else est_profit_usd, opp.ts,
+        ))
+
+    async def _resolve_ids(self, conn, exchanges, pairs) -> Tuple[Dict[str, int], Dict[str, int]]:
+        ex_ids = {name: await _get_id(conn, "exchanges", "name", name) for name in exchanges}
+        pair_ids = {sym: await _get_id(conn, "pairs", "symbol", sym) for sym in pairs}
+        return ex_ids, pair_ids
+
+    @staticmethod
+    async def _insert_many(conn, table: str, columns, rows: List[tuple]) -> None:
+        cols = ", ".join(columns)
+        for start in range(0, len(rows), _ROWS_PER_STATEMENT):
+            chunk = rows[start:start + _ROWS_PER_STATEMENT]
+            params: Dict[str, object] = {}
+            values = []
+            for r, row in enumerate(chunk):
+                names = []
+                for c, val in enumerate(row):
+                    key = f"v{r}_{c}"
+                    params[key] = val
+                    names.append(f":{key}")
+                values.append(f"({', '.join(names)})")
+            sql = f"INSERT INTO {table}({cols}) VALUES {', '.join(values)}"
+            await conn.execute(text(sql), params)
+
+    async def _copy(self, conn, table: str, columns, rows: List[tuple]) -> None:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table, records=rows, columns=list(columns)
+        )
+
+    async def _write(self, ticks: List[tuple], opps: List[tuple]) -> None:
+        async with self.engine.begin() as conn:
+            ex_ids, pair_ids = await self._resolve_ids(
+                conn,
+                {t[0] for t in ticks} | {o[1] for o in opps} | {o[2] for o in opps},
+                {t[1] for t in ticks} | {o[0] for o in opps},
+            )
+            tick_rows = [(ex_ids[t[0]], pair_ids[t[1]], *t[2:]) for t in ticks]
+            opp_rows = [
+                (pair_ids[sym], ex_ids[buy], ex_ids[sell], da, dp, ep, ts)
+                for sym, buy, sell, da, dp, ep, ts in opps
+            ]
+            write = self._copy if self.use_copy else self._insert_many
+            if tick_rows:
+                await write(conn, "ticks", TICK_COLUMNS, tick_rows)
+            if opp_rows:
+                await write(conn, "opportunities", OPP_COLUMNS, opp_rows)
+
+    async def _isolate(self, ticks: List[tuple], opps: List[tuple],
+                       written: Batch, rejected: Batch) -> None:
+        """Bisect a failed batch into rows that go through and rows that fail even on their own.
+
+        Only row errors are bisected; anything else (the database went away) propagates.
+        """
+        try:
+            await self._write(ticks, opps)
+            written[0].extend(ticks)
+            written[1].extend(opps)
+            return
+        except Exception as e:
+            dim_cache.invalidate()
+            if not _row_error(e):
+                raise
+        if len(ticks) + len(opps) == 1:
+            rejected[0].extend(ticks)
+            rejected[1].extend(opps)
+            return
+        t, o = len(ticks) // 2, len(opps) // 2
+        if t == o == 0:
+            t = len(ticks)  # one tick and one opportunity
+        await self._isolate(ticks[:t], opps[:o], written, rejected)
+        await self._isolate(ticks[t:], opps[o:], written, rejected)
+
+    @staticmethod
+    def _unfinished(ticks: List[tuple], opps: List[tuple],
+                    written: Batch, rejected: Batch) -> Batch:
+        done = {id(row) for rows in written + rejected for row in rows}
+        return [t for t in ticks if id(t) not in done], [o for o in opps if id(o) not in done]
+
+    def _requeue(self, ticks: List[tuple], opps: List[tuple]) -> None:
+        # back in front of anything buffered meanwhile; the deque bound still applies
+        self._ticks.extendleft(reversed(ticks))
+        self._opps.extendleft(reversed(opps))
+
+    def _buffer_gauges(self) -> None:
+        db_buffer_rows.labels(table="ticks").set(len(self._ticks))
+        db_buffer_rows.labels(table="opportunities").set(len(self._opps))
+
+    def _count(self, outcome: str, batch: Batch) -> None:
+        db_rows_total.labels(table="ticks", outcome=outcome).inc(len(batch[0]))
+        db_rows_total.labels(table="opportunities", outcome=outcome).inc(len(batch[1]))
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; return the number of rows written.
+
+        A batch failing on row errors (IntegrityError/DataError) is bisected, and
+        rows that fail on their own are dropped (``rejected``) instead of blocking
+        the rest. Any other error (database down, schema missing) stops the flush
+        at once and keeps the unwritten rows for the next one.
+        """
+        async with self._flush_lock:
+            ticks, opps = list(self._ticks), list(self._opps)
+            self._ticks.clear()
+            self._opps.clear()
+            if not (ticks or opps):
+                return 0
+            start = time.perf_counter()
+            written: Batch = ([], [])
+            rejected: Batch = ([], [])
+            failed: Batch = ([], [])
+            try:
+                try:
+                    await self._write(ticks, opps)
+                    written = (ticks, opps)
+                except Exception as e:
+                    dim_cache.invalidate()
+                    if not _row_error(e):
+                        raise
+                    logger.error(f"DB flush failed on a row, isolating bad rows: {e}")
+                    await self._isolate(ticks, opps, written, rejected)
+            except asyncio.CancelledError:
+                self._requeue(*self._unfinished(ticks, opps, written, rejected))
+                self._buffer_gauges()
+                dim_cache.invalidate()
+                raise
+            except Exception as e:
+                logger.error(f"DB flush failed, keeping rows for the next flush: {e}")
+                failed = self._unfinished(ticks, opps, written, rejected)
+                self._requeue(*failed)
+                self._count("failed", failed)
+            self._buffer_gauges()
+            if written[0] or written[1]:
+                db_flush_latency_seconds.observe(time.perf_counter() - start)
+                self._count("written", written)
+            if rejected[0] or rejected[1]:
+                n_rejected = len(rejected[0]) + len(rejected[1])
+                logger.error(f"DB flush dropped {n_rejected} rows that fail on their own")
+                self._count("rejected", rejected)
+            return len(written[0]) + len(written[1])
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
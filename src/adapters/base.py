@@ -0,0 +1,175 @@
+"""What every REST venue shares, and the registry venues join by name.
+
+A venue subclasses ``ExchangeAdapter`` (or ``BookVenue`` when its order book
+is plain ``{"bids": [[price, qty], ...], "asks": [...]}``), sets a few class
+attributes and decorates itself with ``@register``; EXCHANGES then picks it up
+by ``name``. The base owns the limiter, breaker, metrics, pooled client and
+the bulk / concurrent / sequential fetch strategy, so a venue only says where
+its quotes live and how to read them.
+
+``<NAME>_BASE_URL``, ``_API_KEY``, ``_RATE_PER_SEC`` and ``_RATE_BURST``
+settings override the class defaults when they are defined.
+"""
+from __future__ import annotations
+import asyncio, time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+
+import httpx
+
+from ..config import settings
+from ..domain.models import PriceSnapshot, utcnow
+from ..domain.orderbook import OrderBook
+from ..exchanges.common import (
+    CircuitBreaker, endpoint_weight, exchange_limiter, fetch_concurrently, resilient_get, use_bulk,
+)
+from ..exchanges.connections import ConnectionManager
+from ..metrics import ExchangeMetrics
+from ..utils.tracing import span
+from .payloads import decode_nobitex_book, nobitex_top
+
+ADAPTERS: Dict[str, Type["ExchangeAdapter"]] = {}
+
+
+def register(cls: Type["ExchangeAdapter"]) -> Type["ExchangeAdapter"]:
+    ADAPTERS[cls.name] = cls
+    return cls
+
+
+class ExchangeAdapter:
+    name: str = ""
+    base_url: str = ""
+    api_key_header: str = "x-api-key"
+    market_format: str = "{base}{quote}"   # normalized BTC/USDT -> venue market id
+    markets: Dict[str, str] = {}           # symbols the format gets wrong
+    rate_per_sec: float = 5.0
+    rate_burst: int = 5
+    supports_bulk: bool = False            # the venue implements ``fetch_all``
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None,
+                 connections: Optional[ConnectionManager] = None):
+        self.base = self.setting("BASE_URL", self.base_url).rstrip("/")
+        key = self.setting("API_KEY", None)
+        self._headers = {self.api_key_header: key} if key else {}
+        # a shared manager outlives this adapter; a private client or manager does not
+        self._connections = connections or (None if client else ConnectionManager())
+        self._owns_connections = connections is None
+        self._client = client or self._connections.client(self.base)
+        self._limiter = exchange_limiter(
+            self.name, self.setting("RATE_PER_SEC", self.rate_per_sec),
+            self.setting("RATE_BURST", self.rate_burst),
+        )
+        self._weights: Dict[str, float] = {}
+        self._metrics = ExchangeMetrics(self.name)
+        self._breaker = CircuitBreaker(failure_threshold=3, open_seconds=1.5)
+        # bounds in-flight symbol requests when fetching concurrently
+        self._sem = asyncio.Semaphore(max(1, settings.FETCH_CONCURRENCY))
+        # full books per symbol, kept only in depth mode
+        self.books: Dict[str, OrderBook] = {}
+
+    @classmethod
+    def setting(cls, key: str, default: Any) -> Any:
+        value = getattr(settings, f"{cls.name.upper()}_{key}", None)
+        return default if value is None else value
+
+    @classmethod
+    def market(cls, symbol: str) -> str:
+        mapped = cls.markets.get(symbol)
+        if mapped is None:
+            base, _, quote = symbol.partition("/")
+            mapped = cls.market_format.format(base=base, quote=quote)
+        return mapped
+
+    async def close(self):
+        if self._owns_connections:
+            await (self._connections.close() if self._connections else self._client.aclose())
+        self._limiter.close()
+
+    def bulk(self, symbols: List[str]) -> bool:
+        """Whether this cycle should use ``fetch_all``."""
+        return self.supports_bulk and use_bulk(symbols)
+
+    async def fetch_ticker(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
+        if self.bulk(symbols):
+            return await self._guarded(self.fetch_all, symbols) or {}
+        if settings.CONCURRENT_FETCH:
+            return await fetch_concurrently(self._fetch_one, symbols, self._sem)
+        result: Dict[str, PriceSnapshot] = {}
+        for sym in symbols:
+            snap = await self._fetch_one(sym)
+            if snap is not None:
+                result[sym] = snap
+        return result
+
+    async def _fetch_one(self, sym: str) -> Optional[PriceSnapshot]:
+        return await self._guarded(self.fetch_symbol, sym)
+
+    async def _guarded(self, fetch: Callable[[Any], Awaitable[Any]], arg: Any) -> Any:
+        try:
+            out = await fetch(arg)
+        except Exception:
+            self._metrics.failed("exception")
+            await asyncio.sleep(0.2)
+            return None
+        if out:
+            self._metrics.success.inc()
+        return out
+
+    async def get(self, endpoint: str, path: str) -> Optional[httpx.Response]:
+        """GET ``base + path`` through resilient_get; the response only when it is a 200.
+
+        ``endpoint`` is the ENDPOINT_WEIGHTS key the request is charged under.
+        """
+        weight = self._weights.get(endpoint)
+        if weight is None:
+            weight = self._weights[endpoint] = endpoint_weight(self.name, endpoint)
+        start = time.perf_counter()
+        r = await resilient_get(self._client, self.base + path, self.name, self._limiter,
+                                self._breaker, weight=weight, headers=self._headers)
+        self._metrics.latency.observe(time.perf_counter() - start)
+        if r is None:
+            return None
+        if r.status_code != 200:
+            self._metrics.failed("http_error")
+            return None
+        return r
+
+    def store(self, snap: PriceSnapshot, bids=None, asks=None) -> PriceSnapshot:
+        if bids is not None and settings.DEPTH_EVAL_ENABLED:
+            self.books[snap.symbol] = OrderBook.from_levels(self.name, snap.symbol, bids, asks,
+                                                            ts=snap.ts)
+        self._metrics.quote(snap.symbol, snap.bid, snap.ask)
+        return snap
+
+    async def fetch_symbol(self, sym: str) -> Optional[PriceSnapshot]:
+        raise NotImplementedError
+
+    async def fetch_all(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
+        """Every symbol in one request; venues with such an endpoint set ``supports_bulk``."""
+        raise NotImplementedError
+
+
+class BookVenue(ExchangeAdapter):
+    """A venue declared by where its per-market order book lives."""
+
+    book_path: str = ""   # formatted with ``market``; weighted as the part before it
+
+    @property
+    def book_endpoint(self) -> str:
+        return self.book_path.split("{", 1)[0].rstrip("/")
+
+    @classmethod
+    def parse(cls, sym: str, bids, asks) -> PriceSnapshot:
+        bid, ask, bid_size, ask_size = nobitex_top(bids, asks)
+        return PriceSnapshot(
+            exchange=cls.name, symbol=sym, bid=bid, ask=ask, ts=utcnow(),
+            bid_size=bid_size, ask_size=ask_size,
+        )
+
+    async def fetch_symbol(self, sym: str) -> Optional[PriceSnapshot]:
+        r = await self.get(self.book_endpoint, self.book_path.format(market=self.market(sym)))
+        if r is None:
+            return None
+        with span("decode", self.name):
+            bids, asks = decode_nobitex_book(r.content)
+            snap = self.parse(sym, bids, asks)
+        return self.store(snap, bids, asks)
@@ -0,0 +1,9 @@
+from .base import BookVenue, register
+
+
+@register
+class BitpinClient(BookVenue):
+    name = "bitpin"
+    base_url = "https://api.bitpin.ir"
+    market_format = "{base}_{quote}"
+    book_path = "/api/v1/mth/orderbook/{market}/"
@@ -1,59 +1,27 @@
-import httpx, time, asyncio
-from typing import Dict, List, Optional
-from ..domain.models import PriceSnapshot, utcnow
-from ..config import settings
-from ..exchanges.common import NOBITEX_SYMBOL_MAP, TokenBucket, CircuitBreaker, resilient_get
-from ..metrics import requests_total, fetch_errors_total, http_client_latency_seconds, last_bid, last_ask
+from typing import Dict, List
+from ..domain.models import PriceSnapshot
+from .base import BookVenue, register
+from .payloads import decode_nobitex_all
+from ..utils.tracing import span
 
-class NobitexClient:
-    def __init__(self, client: Optional[httpx.AsyncClient] = None):
-        self.base = settings.NOBITEX_BASE_URL.rstrip('/')
-        headers = {}
-        if settings.NOBITEX_API_KEY:
-            headers["x-api-key"] = settings.NOBITEX_API_KEY
-        self._client = client or httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS, headers=headers)
-        # attach headers for resilient_get helper
-        setattr(self._client, "_extra_headers", headers)
-        # conservative: 5 req/sec with burst 5
-        self._limiter = TokenBucket(rate_per_sec=5, capacity=5)
-        self._breaker = CircuitBreaker(failure_threshold=3, open_seconds=1.5)
 
-    async def close(self):
-        await self._client.aclose()
+@register
+class NobitexClient(BookVenue):
+    name = "nobitex"
+    base_url = "https://api.nobitex.ir"
+    book_path = "/v3/orderbook/{market}"
+    supports_bulk = True
 
-    async def fetch_ticker(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
-        # Using public orderbook or ticker endpoints
+    async def fetch_all(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
+        # one /v3/orderbook/all request for every symbol; only the configured markets are decoded
+        markets = {self.market(sym): sym for sym in symbols}
+        r = await self.get("/v3/orderbook/all", "/v3/orderbook/all")
         result: Dict[str, PriceSnapshot] = {}
-        for sym in symbols:
-            mapped = NOBITEX_SYMBOL_MAP.get(sym, sym.replace('/',''))
-            url = f"{self.base}/v3/orderbook/{mapped}"
-            start = time.perf_counter()
-            try:
-                r = await resilient_get(self._client, url, "nobitex", self._limiter, self._breaker)
-                latency = time.perf_counter() - start
-                http_client_latency_seconds.labels(exchange="nobitex").observe(latency)
-                if r and r.status_code == 200:
-                    data = r.json()
-                    # Expect data like {"asks": [["price","qty"],...], "bids": ...}
-                    asks = data.get("asks") or []
-                    bids = data.get("bids") or []
-                    # best ask = lowest ask price; best bid = highest bid price
-                    ask = float(asks[0][0]) if asks else float('nan')
-                    bid = float(bids[0][0]) if bids else float('nan')
-                    snap = PriceSnapshot(
-                        exchange="nobitex", symbol=sym, bid=bid, ask=ask, ts=utcnow()
-                    )
-                    result[sym] = snap
-                    requests_total.labels(exchange="nobitex", outcome="success").inc()
-                    if bid == bid:
-                        last_bid.labels(exchange="nobitex", symbol=sym).set(bid)
-                    if ask == ask:
-                        last_ask.labels(exchange="nobitex", symbol=sym).set(ask)
-                elif r is not None:
-                    requests_total.labels(exchange="nobitex", outcome="http_error").inc()
-                    fetch_errors_total.labels(exchange="nobitex").inc()
-            except Exception:
-                requests_total.labels(exchange="nobitex", outcome="exception").inc()
-                fetch_errors_total.labels(exchange="nobitex").inc()
-                await asyncio.sleep(0.2)
+        if r is None:
+            return result
+        with span("decode", "nobitex"):
+            books = decode_nobitex_all(r.content, markets)
+        for market, (bids, asks) in books.items():
+            sym = markets[market]
+            result[sym] = self.store(self.parse(sym, bids, asks), bids, asks)
         return result
@@ -0,0 +1,186 @@
+"""Decoding of exchange REST payloads down to what the adapters need.
+
+With msgspec the bodies decode straight into the typed structs below, skipping
+every field we never read; otherwise the generic ``loads`` result is walked.
+Either way best bid/ask come out of a single pass with no intermediate lists.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from ..utils.decoding import loads, msgspec, typed_decoder
+
+NAN = float("nan")
+INF = float("inf")
+Level = List[Union[str, float]]
+_SchemaError: Type[Exception]   # what a body of the wrong shape raises
+
+if msgspec is not None:
+    class NobitexBook(msgspec.Struct):
+        bids: List[Level] = []
+        asks: List[Level] = []
+
+    class WallexTrade(msgspec.Struct):
+        price: Union[str, float]
+        isBuyOrder: Optional[bool] = None
+
+    class WallexTradesResult(msgspec.Struct):
+        latestTrades: List[WallexTrade] = []
+
+    class WallexTrades(msgspec.Struct):
+        success: bool = False
+        result: Optional[WallexTradesResult] = None
+
+    class WallexMarketStats(msgspec.Struct):
+        bidPrice: Union[str, float, None] = None
+        askPrice: Union[str, float, None] = None
+
+    class WallexMarket(msgspec.Struct):
+        stats: Optional[WallexMarketStats] = None
+
+    class WallexMarketsResult(msgspec.Struct):
+        # entries stay undecoded until we know they are wanted
+        symbols: Dict[str, msgspec.Raw] = {}
+
+    class WallexMarkets(msgspec.Struct):
+        success: bool = False
+        result: Optional[WallexMarketsResult] = None
+
+    _decode_book = typed_decoder(NobitexBook)
+    _decode_trades = typed_decoder(WallexTrades)
+    _decode_raw_map = typed_decoder(Dict[str, msgspec.Raw])
+    _decode_markets = typed_decoder(WallexMarkets)
+    _decode_market = typed_decoder(WallexMarket)
+    _SchemaError = msgspec.ValidationError
+else:
+    _decode_book = _decode_trades = _decode_raw_map = _decode_markets = _decode_market = None
+    _SchemaError = ValueError
+
+
+def decode_nobitex_book(content: bytes) -> Tuple[List[Level], List[Level]]:
+    """(bids, asks) from a /v3/orderbook body."""
+    if _decode_book is not None:
+        try:
+            book = _decode_book(content)
+            return book.bids, book.asks
+        except _SchemaError:
+            pass  # unexpected shape; let the generic path handle it
+    data = loads(content)
+    return data.get("bids") or [], data.get("asks") or []
+
+
+def nobitex_top(bids: List[Level],
+                asks: List[Level]) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """(bid, ask, bid_size, ask_size); levels arrive best first."""
+    bid, bid_size = (float(bids[0][0]), float(bids[0][1])) if bids else (NAN, None)
+    ask, ask_size = (float(asks[0][0]), float(asks[0][1])) if asks else (NAN, None)
+    return bid, ask, bid_size, ask_size
+
+
+def _best(bid: float, ask: float) -> Tuple[float, float]:
+    return (bid if bid != -INF else NAN), (ask if ask != INF else NAN)
+
+
+def decode_wallex_trades(content: bytes) -> Optional[Tuple[float, float]]:
+    """(best bid, best ask) from a /v1/trades body, or None when it is not a success.
+
+    Best bid is the highest buy-order price, best ask the lowest sell-order price;
+    a side with no trades is NaN.
+    """
+    bid, ask = -INF, INF
+    data = None
+    if _decode_trades is not None:
+        try:
+            data = _decode_trades(content)
+        except _SchemaError:
+            pass  # unexpected shape; let the generic path handle it
+    if data is not None:
+        if not (data.success and data.result is not None):
+            return None
+        for t in data.result.latestTrades:
+            if t.isBuyOrder is None:
+                continue
+            p = float(t.price)
+            if t.isBuyOrder:
+                if p > bid:
+                    bid = p
+            elif p < ask:
+                ask = p
+        return _best(bid, ask)
+
+    data = loads(content)
+    if not (data.get("success") and "result" in data):
+        return None
+    for t in data["result"].get("latestTrades", []):
+        side = t.get("isBuyOrder")
+        if side is None:
+            continue
+        p = float(t["price"])
+        if side:
+            if p > bid:
+                bid = p
+        elif p < ask:
+            ask = p
+    return _best(bid, ask)
+
+
+def _num(x) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):  # missing or "-" in market stats
+        return NAN
+
+
+def decode_nobitex_all(content: bytes,
+                       markets: Iterable[str]) -> Dict[str, Tuple[List[Level], List[Level]]]:
+    """(bids, asks) per wanted market from a /v3/orderbook/all body.
+
+    Other markets are never decoded.
+    """
+    out: Dict[str, Tuple[List[Level], List[Level]]] = {}
+    if _decode_raw_map is not None:
+        try:
+            raw = _decode_raw_map(content)
+            for m in markets:
+                entry = raw.get(m)
+                if entry is not None:
+                    book = _decode_book(entry)
+                    out[m] = book.bids, book.asks
+            return out
+        except _SchemaError:
+            out.clear()  # unexpected shape; let the generic path handle it
+    data = loads(content)
+    for m in markets:
+        entry = data.get(m)
+        if isinstance(entry, dict):
+            out[m] = entry.get("bids") or [], entry.get("asks") or []
+    return out
+
+
+def decode_wallex_markets(content: bytes,
+                          markets: Iterable[str]) -> Optional[Dict[str, Tuple[float, float]]]:
+    """(bid, ask) per wanted market from a /v1/markets body, or None when it is not a success."""
+    out: Dict[str, Tuple[float, float]] = {}
+    if _decode_markets is not None:
+        try:
+            data = _decode_markets(content)
+            if not (data.success and data.result is not None):
+                return None
+            symbols = data.result.symbols
+            for m in markets:
+                entry = symbols.get(m)
+                if entry is not None:
+                    stats = _decode_market(entry).stats
+                    if stats is not None:
+                        out[m] = _num(stats.bidPrice), _num(stats.askPrice)
+            return out
+        except _SchemaError:
+            out.clear()  # unexpected shape; let the generic path handle it
+    data = loads(content)
+    if not (data.get("success") and isinstance(data.get("result"), dict)):
+        return None
+    symbols = data["result"].get("symbols") or {}
+    for m in markets:
+        stats = (symbols.get(m) or {}).get("stats")
+        if isinstance(stats, dict):
+            out[m] = _num(stats.get("bidPrice")), _num(stats.get("askPrice"))
+    return out
@@ -0,0 +1,20 @@
+"""Venue lookup by name (EXCHANGES).
+
+Importing a venue module registers it; add new venue modules to the import
+list below.
+"""
+from __future__ import annotations
+from typing import Dict, Optional, Sequence
+
+from ..exchanges.connections import ConnectionManager
+from .base import ADAPTERS, ExchangeAdapter
+from . import bitpin, nobitex, wallex  # noqa: F401  (registration)
+
+
+def build_clients(names: Sequence[str],
+                  connections: Optional[ConnectionManager] = None) -> Dict[str, ExchangeAdapter]:
+    """One adapter per venue name, all drawing HTTP clients from ``connections``."""
+    unknown = [name for name in names if name not in ADAPTERS]
+    if unknown:
+        raise ValueError(f"unknown exchanges {unknown}; known: {sorted(ADAPTERS)}")
+    return {name: ADAPTERS[name](connections=connections) for name in names}
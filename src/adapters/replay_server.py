@@ -0,0 +1,72 @@
+"""Local fake-exchange websocket server that replays recorded order-book frames.
+
+Recordings are JSON lines of {"t": <seconds since start>, "msg": <frame>}. Frames are
+sent verbatim, so the same server can replay normalized frames or raw captures of a
+venue's own protocol. Run with ``python -m src.adapters.replay_server rec.jsonl``.
+"""
+from __future__ import annotations
+import argparse, asyncio, json
+from typing import Any, List, Optional
+import websockets
+
+
+def load_recording(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    def __init__(self, records: List[dict], host: str = "127.0.0.1", port: int = 0,
+                 speed: float = 1.0, wait_for_subscribe: bool = True):
+        self.records = sorted(records, key=lambda r: r.get("t", 0.0))
+        self.host = host
+        self.port = port
+        self.speed = float(speed)
+        self.wait_for_subscribe = wait_for_subscribe
+        self._server: Optional[Any] = None   # websockets' Server; its class moved between releases
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> ReplayServer:
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handler(self, ws, path: Optional[str] = None) -> None:
+        if self.wait_for_subscribe:
+            await ws.recv()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for rec in self.records:
+            delay = 0.0
+            if self.speed > 0:
+                delay = rec.get("t", 0.0) / self.speed - (loop.time() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await ws.send(json.dumps(rec["msg"]))
+        # keep the connection open so the consumer doesn't treat the end of a replay as an outage
+        await ws.wait_closed()
+
+
+async def _main(args) -> None:
+    records = load_recording(args.recording)
+    server = await ReplayServer(records, args.host, args.port, args.speed).start()
+    print(f"Replaying {args.recording} on {server.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("recording")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--speed", type=float, default=1.0,
+                   help="replay speed multiplier, 0 = as fast as possible")
+    asyncio.run(_main(p.parse_args()))
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import asyncio, json, logging, time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
+import websockets
+
+from ..config import settings
+from ..domain.changes import same_price
+from ..domain.models import PriceSnapshot, utcnow
+from ..domain.orderbook import OrderBook
+from .nobitex import NobitexClient
+from ..metrics import stream_messages_total, stream_reconnects_total, stream_top_changes_total
+from ..utils.decoding import loads
+from ..utils.retry import backoff
+
+logger = logging.getLogger(__name__)
+
+# (symbol, is_snapshot, bids, asks); levels are [price, qty] and qty 0 removes a level
+BookUpdate = Tuple[str, bool, list, list]
+
+
+class IncrementalBook:
+    """In-memory price ladder that applies snapshots/diffs and tracks the best levels."""
+
+    def __init__(self):
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.best_bid = float("nan")
+        self.best_ask = float("nan")
+        self.updated_at = utcnow()
+
+    @staticmethod
+    def _apply_side(side: Dict[float, float], levels) -> None:
+        for px, qty in levels:
+            px, qty = float(px), float(qty)
+            if qty > 0:
+                side[px] = qty
+            else:
+                side.pop(px, None)
+
+    def apply(self, bids, asks, snapshot: bool = False) -> bool:
+        """Apply one update; return True when the best bid or ask price moved."""
+        if snapshot:
+            self.bids.clear()
+            self.asks.clear()
+        self._apply_side(self.bids, bids)
+        self._apply_side(self.asks, asks)
+        self.updated_at = utcnow()
+        best_bid = max(self.bids) if self.bids else float("nan")
+        best_ask = min(self.asks) if self.asks else float("nan")
+        changed = not (same_price(best_bid, self.best_bid) and same_price(best_ask, self.best_ask))
+        self.best_bid, self.best_ask = best_bid, best_ask
+        return changed
+
+    def to_orderbook(self, exchange: str, symbol: str) -> OrderBook:
+        """The full ladder as an OrderBook, for depth evaluation."""
+        bids, asks = list(self.bids.items()), list(self.asks.items())
+        return OrderBook.from_levels(exchange, symbol, bids, asks, ts=self.updated_at)
+
+
+class ReplayProtocol:
+    """Normalized wire format spoken by the local replay server.
+
+    Frames look like
+    {"type": "snapshot"|"update", "symbol": "BTC/USDT", "bids": [...], "asks": [...]}.
+    """
+
+    def subscribe_messages(self, symbols: List[str]) -> List[dict]:
+        return [{"type": "subscribe", "symbols": symbols}]
+
+    def parse(self, frame: dict) -> Iterable[BookUpdate]:
+        kind = frame.get("type")
+        if kind in ("snapshot", "update") and frame.get("symbol"):
+            bids, asks = frame.get("bids") or [], frame.get("asks") or []
+            yield frame["symbol"], kind == "snapshot", bids, asks
+
+    def reply(self, frame: dict) -> Optional[dict]:
+        return None
+
+
+class NobitexProtocol:
+    """Nobitex public order-book channels over its Centrifugo websocket."""
+
+    def __init__(self):
+        self._by_market: Dict[str, str] = {}
+
+    def subscribe_messages(self, symbols: List[str]) -> List[dict]:
+        msgs = [{"connect": {"name": "py"}, "id": 1}]
+        for n, sym in enumerate(symbols, start=2):
+            market = NobitexClient.market(sym)
+            self._by_market[market] = sym
+            msgs.append({"subscribe": {"channel": f"public:orderbook-{market}"}, "id": n})
+        return msgs
+
+    def parse(self, frame: dict) -> Iterable[BookUpdate]:
+        push = frame.get("push") or {}
+        channel = push.get("channel", "")
+        data = (push.get("pub") or {}).get("data")
+        if not channel.startswith("public:orderbook-") or data is None:
+            return
+        if isinstance(data, str):
+            data = loads(data)
+        market = channel.rsplit("-", 1)[-1]
+        sym = self._by_market.get(market, market)
+        # each push carries the full visible book
+        yield sym, True, data.get("bids") or [], data.get("asks") or []
+
+    def reply(self, frame: dict) -> Optional[dict]:
+        # Centrifugo pings are empty objects and expect an empty pong
+        return {} if frame == {} else None
+
+
+PROTOCOLS: Dict[str, Type[Union[ReplayProtocol, NobitexProtocol]]] = {
+    "replay": ReplayProtocol, "nobitex": NobitexProtocol,
+}
+
+OnTop = Callable[[PriceSnapshot], Awaitable[None]]
+
+
+class BookStream:
+    """Long-lived websocket consumer for one exchange.
+
+    Keeps an IncrementalBook per symbol and calls ``on_top`` only when the best
+    bid/ask price changes. ``is_live`` tells the REST poller whether to fall back.
+    """
+
+    def __init__(self, exchange: str, url: str, symbols: List[str], on_top: OnTop,
+                 protocol: str = "replay"):
+        self.exchange = exchange
+        self.url = url
+        self.symbols = list(symbols)
+        self.on_top = on_top
+        self.protocol = PROTOCOLS[protocol]()
+        self.books: Dict[str, IncrementalBook] = {}
+        self.connected = False
+        self.last_message_at = 0.0
+        self._messages = stream_messages_total.labels(exchange=exchange)
+        self._top_changes = stream_top_changes_total.labels(exchange=exchange)
+
+    def is_live(self) -> bool:
+        quiet = time.monotonic() - self.last_message_at
+        return self.connected and quiet < settings.STREAM_STALE_SECONDS
+
+    async def run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    attempt = 0
+                    self.connected = True
+                    self.last_message_at = time.monotonic()
+                    for msg in self.protocol.subscribe_messages(self.symbols):
+                        await ws.send(json.dumps(msg))
+                    async for raw in ws:
+                        await self._handle(ws, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{self.exchange} stream error: {e}")
+            finally:
+                self.connected = False
+            stream_reconnects_total.labels(exchange=self.exchange).inc()
+            await backoff(attempt, settings.RETRY_BASE_DELAY, settings.RETRY_MAX_DELAY)
+            attempt += 1
+
+    async def _handle(self, ws, raw) -> None:
+        self.last_message_at = time.monotonic()
+        self._messages.inc()
+        # Centrifugo may batch several JSON frames per message, one per line
+        for line in (raw.splitlines() if isinstance(raw, str) else [raw]):
+            if not line:
+                continue
+            frame = loads(line)
+            pong = self.protocol.reply(frame)
+            if pong is not None:
+                await ws.send(json.dumps(pong))
+            for sym, snapshot, bids, asks in self.protocol.parse(frame):
+                if sym not in self.symbols:
+                    continue
+                book = self.books.setdefault(sym, IncrementalBook())
+                if book.apply(bids, asks, snapshot=snapshot):
+                    self._top_changes.inc()
+                    await self.on_top(PriceSnapshot(
+                        exchange=self.exchange, symbol=sym, bid=book.best_bid, ask=book.best_ask,
+                        ts=utcnow(), bid_size=book.bids.get(book.best_bid),
+                        ask_size=book.asks.get(book.best_ask),
+                    ))
@@ -1,77 +1,77 @@
-import httpx, time, asyncio
 from typing import Dict, List, Optional
 from ..domain.models import PriceSnapshot, utcnow
+from ..domain.orderbook import OrderBook
 from ..config import settings
-from ..exchanges.common import WALLEX_SYMBOL_MAP, TokenBucket, CircuitBreaker, resilient_get
-from ..metrics import requests_total, fetch_errors_total, http_client_latency_seconds, last_bid, last_ask
+from .base import ExchangeAdapter, register
+from .payloads import decode_wallex_markets, decode_wallex_trades
+from ..utils.decoding import loads
+from ..utils.tracing import span
 
 
-class WallexClient:
-    def __init__(self, client: Optional[httpx.AsyncClient] = None):
-        self.base = settings.WALLEX_BASE_URL.rstrip('/')
-        headers = {}
-        if settings.WALLEX_API_KEY:
-            headers["x-api-key"] = settings.WALLEX_API_KEY
-        self._client = client or httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS, headers=headers)
-        # Keep headers available for the resilient_get helper
-        setattr(self._client, "_extra_headers", headers)
-        # Basic rate limiting and circuit breaker setup
-        self._limiter = TokenBucket(rate_per_sec=5, capacity=5)
-        self._breaker = CircuitBreaker(failure_threshold=3, open_seconds=1.5)
+def parse_trades(sym: str, content: bytes) -> Optional[PriceSnapshot]:
+    """Top of book from a /v1/trades body; None when it is not a success."""
+    best = decode_wallex_trades(content)
+    if best is None:
+        return None
+    return PriceSnapshot(exchange="wallex", symbol=sym, bid=best[0], ask=best[1], ts=utcnow())
 
-    async def close(self):
-        await self._client.aclose()
 
-    async def fetch_ticker(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
-        result: Dict[str, PriceSnapshot] = {}
-        for sym in symbols:
-            mapped = WALLEX_SYMBOL_MAP.get(sym, sym.replace('/', ''))
-            # Using the /v1/trades endpoint to pull recent trades
-            url = f"{self.base}/trades?symbol={mapped}"
-            start = time.perf_counter()
-            try:
-                r = await resilient_get(self._client, url, "wallex", self._limiter, self._breaker)
-                latency = time.perf_counter() - start
-                http_client_latency_seconds.labels(exchange="wallex").observe(latency)
-
-                if r and r.status_code == 200:
-                    data = r.json()
-                    if data.get("success") and "result" in data:
-                        trades = data["result"].get("latestTrades", [])
-                        if trades:
-                            # Split trades by side (buy vs sell)
-                            buy_trades = [t for t in trades if t.get("isBuyOrder", False)]
-                            sell_trades = [t for t in trades if not t.get("isBuyOrder", True)]
+@register
+class WallexClient(ExchangeAdapter):
+    name = "wallex"
+    base_url = "https://api.wallex.ir/v1"
+    supports_bulk = True
 
-                            # Highest buy price → best bid
-                            bid = max([float(t["price"]) for t in buy_trades], default=float('nan'))
-                            # Lowest sell price → best ask
-                            ask = min([float(t["price"]) for t in sell_trades], default=float('nan'))
+    def bulk(self, symbols: List[str]) -> bool:
+        # the markets list has no depth, so depth mode stays per symbol
+        return super().bulk(symbols) and not settings.DEPTH_EVAL_ENABLED
 
-                            snap = PriceSnapshot(
-                                exchange="wallex", symbol=sym, bid=bid, ask=ask, ts=utcnow()
-                            )
-                            result[sym] = snap
-                            requests_total.labels(exchange="wallex", outcome="success").inc()
-                            if bid == bid:
-                                last_bid.labels(exchange="wallex", symbol=sym).set(bid)
-                            if ask == ask:
-                                last_ask.labels(exchange="wallex", symbol=sym).set(ask)
-                        else:
-                            # No trades found — return NaN values
-                            snap = PriceSnapshot(
-                                exchange="wallex", symbol=sym, bid=float('nan'), ask=float('nan'), ts=utcnow()
-                            )
-                            result[sym] = snap
-                            requests_total.labels(exchange="wallex", outcome="success").inc()
-                    else:
-                        requests_total.labels(exchange="wallex", outcome="http_error").inc()
-                        fetch_errors_total.labels(exchange="wallex").inc()
-                elif r is not None:
-                    requests_total.labels(exchange="wallex", outcome="http_error").inc()
-                    fetch_errors_total.labels(exchange="wallex").inc()
-            except Exception:
-                requests_total.labels(exchange="wallex", outcome="exception").inc()
-                fetch_errors_total.labels(exchange="wallex").inc()
-                await asyncio.sleep(0.2)
+    async def fetch_all(self, symbols: List[str]) -> Dict[str, PriceSnapshot]:
+        # one /v1/markets request; its per-market stats carry the current best bid/ask
+        markets = {self.market(sym): sym for sym in symbols}
+        r = await self.get("/markets", "/markets")
+        result: Dict[str, PriceSnapshot] = {}
+        if r is None:
+            return result
+        with span("decode", "wallex"):
+            quotes = decode_wallex_markets(r.content, markets)
+        if quotes is None:
+            self._metrics.failed("http_error")
+            return result
+        ts = utcnow()
+        for market, (bid, ask) in quotes.items():
+            sym = markets[market]
+            snap = PriceSnapshot(exchange="wallex", symbol=sym, bid=bid, ask=ask, ts=ts)
+            result[sym] = self.store(snap)
         return result
+
+    async def fetch_symbol(self, sym: str) -> Optional[PriceSnapshot]:
+        if settings.DEPTH_EVAL_ENABLED:
+            return await self._fetch_depth(sym)
+        # Using the /v1/trades endpoint to pull recent trades
+        r = await self.get("/trades", f"/trades?symbol={self.market(sym)}")
+        if r is None:
+            return None
+        with span("decode", "wallex"):
+            snap = parse_trades(sym, r.content)
+        if snap is None:
+            self._metrics.failed("http_error")
+            return None
+        return self.store(snap)
+
+    async def _fetch_depth(self, sym: str) -> Optional[PriceSnapshot]:
+        # /v1/depth returns the order book; top of book comes from it instead of trades
+        r = await self.get("/depth", f"/depth?symbol={self.market(sym)}")
+        if r is None:
+            return None
+        with span("decode", "wallex"):
+            data = loads(r.content)
+        if not (data.get("success") and "result" in data):
+            self._metrics.failed("http_error")
+            return None
+        res = data["result"]
+        bids = [(lvl["price"], lvl["quantity"]) for lvl in res.get("bid") or []]
+        asks = [(lvl["price"], lvl["quantity"]) for lvl in res.get("ask") or []]
+        book = OrderBook.from_levels("wallex", sym, bids, asks, ts=utcnow())
+        self.books[sym] = book
+        return self.store(book.to_snapshot())
@@ -0,0 +1,82 @@
+"""Compact on-disk recording of PriceSnapshots.
+
+A recording is a flat file of fixed-size NumPy records (``RECORD_DTYPE``) that
+can be memory-mapped for replay, plus a ``.meta.json`` sidecar holding the
+exchange and symbol name tables the records index into.
+"""
+from __future__ import annotations
+import json
+import os
+from typing import Dict, List, Tuple
+import numpy as np
+
+from ..domain.models import PriceSnapshot
+
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),        # epoch seconds
+    ("exchange", "<u2"),  # index into meta["exchanges"]
+    ("symbol", "<u2"),    # index into meta["symbols"]
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+])
+
+
+def _meta_path(path: str) -> str:
+    return path + ".meta.json"
+
+
+class SnapshotRecorder:
+    """Appends snapshots to ``path`` in fixed-size chunks; ``record`` never does I/O itself."""
+
+    def __init__(self, path: str, chunk_size: int = 4096):
+        self.path = path
+        self._buf = np.zeros(chunk_size, dtype=RECORD_DTYPE)
+        self._n = 0
+        self.exchanges: List[str] = []
+        self.symbols: List[str] = []
+        if os.path.exists(_meta_path(path)):
+            with open(_meta_path(path), encoding="utf-8") as f:
+                meta = json.load(f)
+            self.exchanges, self.symbols = meta["exchanges"], meta["symbols"]
+        self._ex_index: Dict[str, int] = {name: i for i, name in enumerate(self.exchanges)}
+        self._sym_index: Dict[str, int] = {name: i for i, name in enumerate(self.symbols)}
+
+    def _index(self, index: Dict[str, int], names: List[str], name: str) -> int:
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    def record(self, snap: PriceSnapshot) -> None:
+        row = self._buf[self._n]
+        row["ts"] = snap.ts.timestamp()
+        row["exchange"] = self._index(self._ex_index, self.exchanges, snap.exchange)
+        row["symbol"] = self._index(self._sym_index, self.symbols, snap.symbol)
+        row["bid"] = snap.bid
+        row["ask"] = snap.ask
+        self._n += 1
+        if self._n == len(self._buf):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._n:
+            with open(self.path, "ab") as f:
+                self._buf[:self._n].tofile(f)
+            self._n = 0
+        with open(_meta_path(self.path), "w", encoding="utf-8") as f:
+            json.dump({"exchanges": self.exchanges, "symbols": self.symbols}, f)
+
+    def close(self) -> None:
+        self.flush()
+
+
+def load_recording(path: str) -> Tuple[np.ndarray, List[str], List[str]]:
+    """Memory-map a recording; return (records, exchanges, symbols)."""
+    with open(_meta_path(path), encoding="utf-8") as f:
+        meta = json.load(f)
+    if os.path.getsize(path) == 0:
+        records = np.zeros(0, dtype=RECORD_DTYPE)
+    else:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+    return records, meta["exchanges"], meta["symbols"]
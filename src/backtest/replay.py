@@ -0,0 +1,157 @@
+"""Replay recorded snapshots through ArbEngine and sweep engine parameters.
+
+Usage:
+    python -m src.backtest.replay snapshots.bin \\
+        --threshold 0.2,0.3,0.5 --cooldown 15,45 --hysteresis 0.05,0.15 [--csv out.csv]
+"""
+from __future__ import annotations
+import argparse
+import csv
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from ..domain.arbitrage_engine import ArbEngine
+from ..domain.costs import USD_QUOTES, CostModel
+from ..domain.models import PriceSnapshot
+from .recorder import load_recording
+
+
+@dataclass(frozen=True)
+class ReplayConfig:
+    threshold_pct: float
+    cooldown_seconds: float
+    hysteresis_delta_pct: float
+
+
+def replay(records: np.ndarray, exchanges: Sequence[str], symbols: Sequence[str],
+           config: ReplayConfig, costs: Optional[CostModel] = None) -> Dict:
+    """Stream ``records`` through a fresh engine as fast as possible and summarise its alerts.
+
+    Spreads are net of ``costs``, by default the worker's ``CostModel.from_settings()``.
+    A window opens when a directed spread reaches the threshold and closes when
+    it falls back below. Latency is the time from a window opening to its first
+    alert; windows that close without any alert count as missed.
+    """
+    costs = CostModel.from_settings() if costs is None else costs
+    engine = ArbEngine(config.threshold_pct, config.cooldown_seconds, config.hysteresis_delta_pct,
+                       export_metrics=False, costs=costs)
+    # USDT/IRT-style markets carry the USD rate of their quote currency, as in the worker
+    rate_markets = {
+        m for m, sym in enumerate(symbols)
+        if sym.partition("/")[0] in USD_QUOTES and sym.partition("/")[2] not in ("", *USD_QUOTES)
+    }
+    n_ex, n_sym = len(exchanges), len(symbols)
+    ex_index = {name: i for i, name in enumerate(exchanges)}
+    bid = np.full((n_ex, n_sym), np.nan)
+    ask = np.full((n_ex, n_sym), np.nan)
+    ts = np.full((n_ex, n_sym), np.nan)
+    window_open = np.full((n_ex, n_ex, n_sym), np.nan)
+    window_alerted = np.zeros((n_ex, n_ex, n_sym), dtype=bool)
+    off_diag = ~np.eye(n_ex, dtype=bool)
+
+    alerts = 0
+    spreads: List[float] = []
+    latencies: List[float] = []
+    missed = 0
+    order = np.argsort(records["ts"], kind="stable")
+    cols = [records[name][order].tolist() for name in ("ts", "exchange", "symbol", "bid", "ask")]
+    for t, e, m, b, a in zip(*cols):
+        bid[e, m], ask[e, m], ts[e, m] = b, a, t
+        if m in rate_markets:
+            costs.observe(PriceSnapshot(exchange=exchanges[e], symbol=symbols[m], bid=b, ask=a,
+                                        ts=datetime.fromtimestamp(t, timezone.utc)))
+        col = slice(m, m + 1)
+        # the spread the engine alerts on: [buy i, sell j]
+        net_pct = costs.net_batch(exchanges, [symbols[m]], bid[:, col], ask[:, col])[0][:, :, 0]
+        with np.errstate(invalid="ignore"):
+            above = off_diag & (net_pct >= config.threshold_pct)
+        win, alerted = window_open[:, :, m], window_alerted[:, :, m]
+        closed = ~above & ~np.isnan(win)
+        missed += int(np.count_nonzero(closed & ~alerted))
+        win[closed] = np.nan
+        alerted[closed] = False
+        win[above & np.isnan(win)] = t
+
+        opps = engine.evaluate_batch(exchanges, [symbols[m]], bid[:, col], ask[:, col], ts[:, col])
+        for opp in opps:
+            i, j = ex_index[opp.buy_from], ex_index[opp.sell_to]
+            alerts += 1
+            spreads.append(opp.net_pct)
+            if not alerted[i, j]:
+                alerted[i, j] = True
+                latencies.append(t - win[i, j])
+
+    missed += int(np.count_nonzero(~np.isnan(window_open) & ~window_alerted))
+    return {
+        **asdict(config),
+        "alerts": alerts,
+        "captured_spread_pct": float(np.sum(spreads)) if spreads else 0.0,
+        "mean_spread_pct": float(np.mean(spreads)) if spreads else 0.0,
+        "mean_latency_s": float(np.mean(latencies)) if latencies else 0.0,
+        "max_latency_s": float(np.max(latencies)) if latencies else 0.0,
+        "missed_windows": missed,
+    }
+
+
+def _run_one(args) -> Dict:
+    path, config = args
+    records, exchanges, symbols = load_recording(path)
+    return replay(records, exchanges, symbols, config)
+
+
+def sweep(path: str, thresholds: Sequence[float], cooldowns: Sequence[float],
+          hystereses: Sequence[float], processes: Optional[int] = None) -> List[Dict]:
+    """Replay ``path`` once per parameter combination, spread across a process pool."""
+    grid = itertools.product(thresholds, cooldowns, hystereses)
+    configs = [ReplayConfig(*combo) for combo in grid]
+    jobs = [(path, cfg) for cfg in configs]
+    if processes == 1:
+        return [_run_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_run_one, jobs))
+
+
+def format_table(rows: List[Dict]) -> str:
+    if not rows:
+        return ""
+    headers = list(rows[0])
+    cells = [
+        [f"{r[h]:.4g}" if isinstance(r[h], float) else str(r[h]) for h in headers] for r in rows
+    ]
+    widths = [max(len(h), *(len(c[k]) for c in cells)) for k, h in enumerate(headers)]
+    lines = ["  ".join(h.rjust(w) for h, w in zip(headers, widths))]
+    lines += ["  ".join(c.rjust(w) for c, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def _floats(raw: str) -> List[float]:
+    return [float(x) for x in raw.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Sweep ArbEngine parameters over a snapshot recording")
+    p.add_argument("recording")
+    p.add_argument("--threshold", type=_floats, default=[0.3])
+    p.add_argument("--cooldown", type=_floats, default=[45.0])
+    p.add_argument("--hysteresis", type=_floats, default=[0.15])
+    p.add_argument("--processes", type=int, default=None)
+    p.add_argument("--csv", help="also write the table to this CSV file")
+    args = p.parse_args(argv)
+
+    rows = sweep(args.recording, args.threshold, args.cooldown, args.hysteresis, args.processes)
+    rows.sort(key=lambda r: r["captured_spread_pct"], reverse=True)
+    print(format_table(rows))
+    if args.csv and rows:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
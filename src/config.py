@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
-from typing import List
+from typing import Dict, List, Tuple
 
 class Settings(BaseSettings):
     APP_HOST: str = "0.0.0.0"
@@ -8,11 +8,59 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     ENABLE_WORKER: bool = True
 
+    # Venues to poll, by adapter name (src.adapters.registry)
+    EXCHANGES: str = "nobitex,wallex"
     FETCH_INTERVAL_SECONDS: float = 3.0
+    CONCURRENT_FETCH: bool = True
+    FETCH_CONCURRENCY: int = 5
+    # Exchange rate limits; the limiter adapts below these from 429s and rate-limit headers
+    NOBITEX_RATE_PER_SEC: float = 5.0
+    NOBITEX_RATE_BURST: int = 5
+    WALLEX_RATE_PER_SEC: float = 5.0
+    WALLEX_RATE_BURST: int = 5
+    BITPIN_RATE_PER_SEC: float = 5.0
+    BITPIN_RATE_BURST: int = 5
+    ENDPOINT_WEIGHTS: str = ""  # exchange:/endpoint:weight, e.g. nobitex:/v3/orderbook/all:5
+    # Set to share one rate budget per exchange across every worker process on the host
+    RATE_LIMIT_SHARED_NAME: str | None = None
+    # Sharding: this worker polls only the symbols the hash ring assigns to its shard
+    WORKER_SHARD_INDEX: int = 0
+    WORKER_SHARD_COUNT: int = 1
+    # Bus between workers and the API (redis://...); unset = in-process
+    BUS_URL: str | None = None
+    BUS_STREAM_MAXLEN: int = 10_000
+    # API quote history: ring buffer slots per (exchange, symbol), and how far back queries reach
+    HISTORY_CAPACITY: int = 3600
+    HISTORY_WINDOW_SECONDS: float = 3600.0
+    # /ws and /stream: frames buffered per subscriber before the oldest are dropped
+    FANOUT_BUFFER_SIZE: int = 1000
+    # Triangular / cross-currency cycles over every quoted market
+    TRIANGULAR_ENABLED: bool = False
+    TRIANGULAR_MAX_LEGS: int = 4
+    # Costs: alerts fire on profit net of these (src.domain.costs)
+    # exchange:pct, or exchange:SYMBOL:pct overrides
+    TAKER_FEES_PCT: str = "nobitex:0.25,wallex:0.2"
+    TRANSFER_FEE_PCT: float = 0.0   # cost of moving a currency between exchanges, per hop
+    WITHDRAWAL_FEES: str = ""       # exchange:CURRENCY:amount, flat, in that currency
+    SLIPPAGE_PCT: float = 0.0       # per trade, on top-of-book prices
+    NET_NOTIONAL_USD: float = 1000.0  # trade size flat fees and est_profit_usd are sized against
+    # Adaptive polling: per-symbol intervals between the min and max, on fixed-rate ticks
+    ADAPTIVE_POLLING_ENABLED: bool = False
+    POLL_TICK_SECONDS: float = 0.5
+    POLL_MIN_INTERVAL_SECONDS: float = 1.0
+    POLL_MAX_INTERVAL_SECONDS: float = 30.0
+    # one all-markets request per exchange once this many symbols are configured (0 = never)
+    BULK_FETCH_MIN_SYMBOLS: int = 4
+    # auto picks msgspec, then orjson, then stdlib json
+    JSON_DECODER: str = "auto"
     THRESHOLD_PERCENT: float = 0.3
     COOLDOWN_SECONDS: float = 45.0
     HYSTERESIS_DELTA_PCT: float = 0.15
 
+    # Depth mode: evaluate executable VWAP spreads for these quote-currency notionals
+    DEPTH_EVAL_ENABLED: bool = False
+    DEPTH_NOTIONALS: str = "100,1000,10000"
+
     SYMBOLS: str = "BTC/USDT,USDT/IRT"
 
     TELEGRAM_TOKEN: str | None = None
@@ -21,15 +69,69 @@ class Settings(BaseSettings):
     BALE_TOKEN: str | None = None
     BALE_CHAT_ID: str | None = None
 
+    # Bot API delivery: shared keep-alive pool, per-chat pacing and burst coalescing
+    ALERT_HTTP_POOL_SIZE: int = 10
+    ALERT_QUEUE_SIZE: int = 100
+    ALERT_DISPATCHERS: int = 2
+    ALERT_CHAT_RATE_PER_SEC: float = 1.0
+    ALERT_GLOBAL_RATE_PER_SEC: float = 30.0
+    ALERT_COALESCE_WINDOW_SECONDS: float = 0.5
+    ALERT_COALESCE_MAX: int = 10
+
     NOBITEX_BASE_URL: str = "https://api.nobitex.ir"
     NOBITEX_API_KEY: str | None = None
     WALLEX_BASE_URL: str = "https://api.wallex.ir/v1"
     WALLEX_API_KEY: str | None = None
+    BITPIN_BASE_URL: str = "https://api.bitpin.ir"
+    BITPIN_API_KEY: str | None = None
+
+    # Push-based ingestion; REST polling covers any exchange whose stream is down or stale
+    STREAM_ENABLED: bool = False
+    STREAM_STALE_SECONDS: float = 10.0
+    NOBITEX_WS_URL: str | None = "wss://ws.nobitex.ir/connection/websocket"
+    NOBITEX_WS_PROTOCOL: str = "nobitex"
+    WALLEX_WS_URL: str | None = None
+    WALLEX_WS_PROTOCOL: str = "replay"
+
+    # Buffered persistence of ticks/opportunities (needs DATABASE_URL)
+    DB_PERSIST_ENABLED: bool = False
+    DB_FLUSH_MAX_ROWS: int = 500
+    DB_FLUSH_INTERVAL_SECONDS: float = 1.0
+    DB_BUFFER_MAX_ROWS: int = 100_000
+    DB_USE_COPY: bool = True
+    # Tick partitions, rollups and retention (maintenance loop of whichever process writes ticks)
+    DB_PARTITION_DAYS_AHEAD: int = 3
+    DB_TICK_RETENTION_DAYS: int = 7
+    DB_ROLLUP_INTERVAL_SECONDS: float = 30.0
+    DB_ROLLUP_LOOKBACK_SECONDS: float = 120.0
+    DB_ROLLUP_1S_RETENTION_DAYS: int = 30
+    DB_ROLLUP_1M_RETENTION_DAYS: int = 365
+    # Append every fetched snapshot to this file for offline replay (src.backtest)
+    RECORD_SNAPSHOTS_PATH: str | None = None
+    # Metrics: export per-symbol gauges only for the top-K symbols by spread (0 = all),
+    # and record one in 1/rate HTTP/alert latency observations
+    METRICS_TOP_K: int = 0
+    METRICS_LATENCY_SAMPLE_RATE: float = 1.0
+    # Also emit tracing spans as OpenTelemetry spans (needs the opentelemetry packages)
+    OTEL_TRACING_ENABLED: bool = False
+    # GET /debug/profile on the API: sampling profile of the in-process worker
+    PROFILER_ENABLED: bool = False
+    PROFILER_MAX_SECONDS: float = 60.0
 
     HTTP_TIMEOUT_SECONDS: float = 5.0
+    # Exchange HTTP pools, one per host; HTTP/2 multiplexes when the h2 package is installed
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_KEEPALIVE_SECONDS: float = 30.0
     RETRY_MAX_TRIES: int = 5
     RETRY_BASE_DELAY: float = 0.2
     RETRY_MAX_DELAY: float = 3.0
+    # Fetches give up this long after their cycle starts (0 = no deadline)
+    FETCH_DEADLINE_SECONDS: float = 2.5
+    # Hedging: resend a request still pending after the exchange's recent p95 latency
+    HEDGE_ENABLED: bool = False
+    HEDGE_QUANTILE: float = 0.95
+    HEDGE_MIN_DELAY_SECONDS: float = 0.05
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -37,4 +139,40 @@ class Settings(BaseSettings):
     def symbols_list(self) -> List[str]:
         return [s.strip().upper() for s in self.SYMBOLS.split(",") if s.strip()]
 
+    @property
+    def exchanges_list(self) -> List[str]:
+        return [s.strip().lower() for s in self.EXCHANGES.split(",") if s.strip()]
+
+    @property
+    def depth_notionals_list(self) -> List[float]:
+        return sorted(float(s) for s in self.DEPTH_NOTIONALS.split(",") if s.strip())
+
+    def _keyed_table(self, raw: str, parts: int) -> Dict[Tuple[str, ...], float]:
+        # "a:b:value,..." entries with exactly ``parts`` fields, keyed by the leading fields
+        out: Dict[Tuple[str, ...], float] = {}
+        for item in raw.split(","):
+            fields = [f.strip() for f in item.split(":")]
+            if len(fields) == parts:
+                out[tuple(fields[:-1])] = float(fields[-1])
+        return out
+
+    @property
+    def taker_fees(self) -> Dict[str, float]:
+        return {ex: pct for (ex,), pct in self._keyed_table(self.TAKER_FEES_PCT, 2).items()}
+
+    @property
+    def symbol_taker_fees(self) -> Dict[Tuple[str, str], float]:
+        table = self._keyed_table(self.TAKER_FEES_PCT, 3)
+        return {(ex, sym.upper()): pct for (ex, sym), pct in table.items()}
+
+    @property
+    def endpoint_weights(self) -> Dict[Tuple[str, str], float]:
+        table = self._keyed_table(self.ENDPOINT_WEIGHTS, 3)
+        return {(ex, ep): w for (ex, ep), w in table.items()}
+
+    @property
+    def withdrawal_fees(self) -> Dict[Tuple[str, str], float]:
+        table = self._keyed_table(self.WITHDRAWAL_FEES, 3)
+        return {(ex, cur.upper()): amt for (ex, cur), amt in table.items()}
+
 settings = Settings()
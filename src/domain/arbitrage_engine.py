@@ -1,15 +1,41 @@
 from __future__ import annotations
+from ..domain.costs import CostModel
 from ..domain.models import PriceSnapshot, ArbOpportunity
-from ..metrics import last_diff_pct, opportunities_found_total
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from ..domain.orderbook import OrderBook, vwap_spreads, max_profitable_qty
+from ..metrics import last_diff_pct, last_vwap_diff_pct, opportunities_found_total
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime, timedelta, timezone
+import numpy as np
 
 class ArbEngine:
-    def __init__(self, threshold_pct: float, cooldown_seconds: float, hysteresis_delta_pct: float):
+    def __init__(self, threshold_pct: float, cooldown_seconds: float, hysteresis_delta_pct: float,
+                 notionals: Sequence[float] = (), export_metrics: bool = True,
+                 costs: Optional[CostModel] = None):
         self.threshold_pct = float(threshold_pct)
         self.cooldown = timedelta(seconds=float(cooldown_seconds))
         self.hysteresis = float(hysteresis_delta_pct)
+        self.notionals = np.asarray(sorted(float(n) for n in notionals), dtype=np.float64)
+        # offline replays turn this off; Prometheus label updates dominate there
+        self.export_metrics = export_metrics
+        # with a cost model, threshold/cooldown/hysteresis apply to net instead of gross spread
+        self.costs = costs
         self._last_alert: dict[tuple[str,str], dict] = {}  # key: (symbol, direction)
+        # evaluate_batch cooldown state: [buy exchange, sell exchange, symbol]
+        self._ex_index: Dict[str, int] = {}
+        self._sym_index: Dict[str, int] = {}
+        self._alert_ts = np.full((0, 0, 0), np.nan)
+        self._alert_pct = np.full((0, 0, 0), np.nan)
+        self._directions: Dict[tuple, List[List[str]]] = {}
+        # symbols of the last evaluate_batch with a spread at or above threshold, fired or not
+        self.above_threshold: List[str] = []
+
+    def _suppressed(self, key: tuple[str, str], now: datetime, diff_pct: float) -> bool:
+        last = self._last_alert.get(key)
+        if last:
+            # Cooldown
+            if now - last["ts"] < self.cooldown and diff_pct < last["pct"] + self.hysteresis:
+                return True
+        return False
 
     def evaluate(self, a: PriceSnapshot, b: PriceSnapshot) -> Optional[ArbOpportunity]:
         # consider buy on A ask, sell on B bid
@@ -22,26 +48,170 @@ class ArbEngine:
         diff_abs = sell_price - buy_price
         diff_pct = (diff_abs / buy_price) * 100
         direction = f"{a.exchange}_to_{b.exchange}"
-        last_diff_pct.labels(symbol=a.symbol, direction=direction).set(diff_pct)
+        if self.export_metrics:
+            last_diff_pct.labels(a.symbol, direction).set(diff_pct)
 
-        if diff_pct < self.threshold_pct:
+        net_pct, profit_usd = (
+            self.costs.net(a.exchange, b.exchange, a.symbol, buy_price, sell_price)
+            if self.costs else (None, None)
+        )
+        score = diff_pct if net_pct is None else net_pct
+        if not score >= self.threshold_pct:
             return None
 
         key = (a.symbol, direction)
         now = a.ts
-        last = self._last_alert.get(key)
-        if last:
-            # Cooldown
-            if now - last["ts"] < self.cooldown and diff_pct < last["pct"] + self.hysteresis:
-                return None
+        if self._suppressed(key, now, score):
+            return None
 
         # Increment opportunities counter
-        opportunities_found_total.labels(symbol=a.symbol, direction=direction).inc()
-        
+        if self.export_metrics:
+            opportunities_found_total.labels(symbol=a.symbol, direction=direction).inc()
+
         opp = ArbOpportunity(
             symbol=a.symbol, buy_from=a.exchange, buy_price=buy_price,
             sell_to=b.exchange, sell_price=sell_price, diff_abs=diff_abs,
-            diff_pct=diff_pct, ts=now
+            diff_pct=diff_pct, ts=now, net_pct=net_pct, est_profit_usd=profit_usd,
         )
-        self._last_alert[key] = {"ts": now, "pct": diff_pct}
+        self._last_alert[key] = {"ts": now, "pct": score}
         return opp
+
+    def evaluate_depth(self, a: OrderBook, b: OrderBook) -> Optional[ArbOpportunity]:
+        # consider buying `notional` worth on A's asks and selling that quantity into B's bids;
+        # alert on the largest configured notional whose VWAP spread clears the threshold
+        if not (a and b) or self.notionals.size == 0:
+            return None
+        qty, buy_vwap, sell_vwap = vwap_spreads(a, b, self.notionals)
+        diff_pct = (sell_vwap - buy_vwap) / buy_vwap * 100
+        direction = f"{a.exchange}_to_{b.exchange}"
+        for notional, pct in zip(self.notionals, diff_pct):
+            if pct == pct and self.export_metrics:
+                last_vwap_diff_pct.labels(a.symbol, direction, f"{notional:g}").set(float(pct))
+
+        score = diff_pct
+        profit_usd: List[Optional[float]] = [None] * len(diff_pct)
+        if self.costs:
+            # VWAPs already walk the book, so no slippage allowance on top
+            net = [
+                self.costs.net(a.exchange, b.exchange, a.symbol, float(bp), float(sp),
+                               notional=float(n), slippage=False)
+                for bp, sp, n in zip(buy_vwap, sell_vwap, self.notionals)
+            ]
+            score = np.array([pct for pct, _ in net])
+            profit_usd = [usd for _, usd in net]
+        ok = np.flatnonzero(score >= self.threshold_pct)  # NaN compares False
+        if ok.size == 0:
+            return None
+        i = int(ok[-1])
+        pct = float(score[i])
+
+        key = (a.symbol, direction)
+        now = a.ts
+        if self._suppressed(key, now, pct):
+            return None
+
+        if self.export_metrics:
+            opportunities_found_total.labels(symbol=a.symbol, direction=direction).inc()
+        max_qty, _ = max_profitable_qty(a.ask_px, a.ask_qty, b.bid_px, b.bid_qty)
+        opp = ArbOpportunity(
+            symbol=a.symbol, buy_from=a.exchange, buy_price=float(buy_vwap[i]),
+            sell_to=b.exchange, sell_price=float(sell_vwap[i]),
+            diff_abs=float(sell_vwap[i] - buy_vwap[i]), diff_pct=float(diff_pct[i]), ts=now,
+            qty=float(qty[i]), max_qty=max_qty,
+            net_pct=pct if self.costs else None, est_profit_usd=profit_usd[i],
+        )
+        self._last_alert[key] = {"ts": now, "pct": pct}
+        return opp
+
+    def _state_index(self, index: Dict[str, int], names: Sequence[str]) -> np.ndarray:
+        for name in names:
+            if name not in index:
+                index[name] = len(index)
+        n_ex, n_sym = len(self._ex_index), len(self._sym_index)
+        if self._alert_ts.shape != (n_ex, n_ex, n_sym):
+            grown_ts = np.full((n_ex, n_ex, n_sym), np.nan)
+            grown_pct = np.full((n_ex, n_ex, n_sym), np.nan)
+            e, _, m = self._alert_ts.shape
+            grown_ts[:e, :e, :m] = self._alert_ts
+            grown_pct[:e, :e, :m] = self._alert_pct
+            self._alert_ts, self._alert_pct = grown_ts, grown_pct
+        return np.fromiter((index[name] for name in names), dtype=np.intp, count=len(names))
+
+    def _direction_labels(self, exchanges: Sequence[str]) -> List[List[str]]:
+        # N×(N−1) "a_to_b" labels, built once per venue list
+        key = tuple(exchanges)
+        labels = self._directions.get(key)
+        if labels is None:
+            labels = self._directions[key] = [[f"{a}_to_{b}" for b in exchanges] for a in exchanges]
+        return labels
+
+    def evaluate_batch(self, exchanges: Sequence[str], symbols: Sequence[str],
+                       bid: np.ndarray, ask: np.ndarray, ts: np.ndarray) -> List[ArbOpportunity]:
+        """Evaluate every directed exchange pair (N×(N−1) of them) for every symbol at once.
+
+        ``bid``/``ask``/``ts`` have shape (exchanges, symbols); ``ts`` is epoch seconds.
+        Same threshold/cooldown/hysteresis rules as ``evaluate``, keyed by
+        (symbol, direction), but with state kept in arrays.
+        """
+        bid = np.asarray(bid, dtype=np.float64)
+        ask = np.asarray(ask, dtype=np.float64)
+        ts = np.broadcast_to(np.asarray(ts, dtype=np.float64), ask.shape)
+        ex_idx = self._state_index(self._ex_index, exchanges)
+        sym_idx = self._state_index(self._sym_index, symbols)
+
+        # [i, j, m]: buy on exchange i's ask, sell on exchange j's bid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            diff_abs = bid[None, :, :] - ask[:, None, :]
+            diff_pct = diff_abs / ask[:, None, :] * 100
+        n_ex = len(exchanges)
+        valid = ~np.eye(n_ex, dtype=bool)[:, :, None] & np.isfinite(diff_pct)
+
+        directions = self._direction_labels(exchanges)
+        if self.export_metrics:
+            gauge = last_diff_pct.labels
+            for i, j, m in zip(*np.nonzero(valid)):
+                gauge(symbols[m], directions[i][j]).set(float(diff_pct[i, j, m]))
+
+        net_pct = profit_usd = None
+        score = diff_pct
+        if self.costs:
+            net_pct, profit_usd = self.costs.net_batch(exchanges, symbols, bid, ask)
+            score = net_pct
+
+        cells = np.ix_(ex_idx, ex_idx, sym_idx)
+        last_ts = self._alert_ts[cells]
+        last_pct = self._alert_pct[cells]
+        now = np.broadcast_to(ts[:, None, :], diff_pct.shape)
+        cooldown = self.cooldown.total_seconds()
+        with np.errstate(invalid="ignore"):
+            suppressed = (now - last_ts < cooldown) & (score < last_pct + self.hysteresis)
+            above = valid & (score >= self.threshold_pct)
+            fire = above & ~suppressed
+        self.above_threshold = [symbols[int(m)] for m in np.flatnonzero(above.any(axis=(0, 1)))]
+
+        hits = np.nonzero(fire)
+        if not hits[0].size:
+            return []
+        last_ts[fire] = now[fire]
+        last_pct[fire] = score[fire]
+        self._alert_ts[cells] = last_ts
+        self._alert_pct[cells] = last_pct
+
+        opps: List[ArbOpportunity] = []
+        for i, j, m in zip(*hits):
+            if self.export_metrics:
+                opportunities_found_total.labels(symbol=symbols[m],
+                                                 direction=directions[i][j]).inc()
+            opps.append(ArbOpportunity(
+                symbol=symbols[m], buy_from=exchanges[i], buy_price=float(ask[i, m]),
+                sell_to=exchanges[j], sell_price=float(bid[j, m]),
+                diff_abs=float(diff_abs[i, j, m]), diff_pct=float(diff_pct[i, j, m]),
+                ts=datetime.fromtimestamp(ts[i, m], timezone.utc),
+                **(_net_fields(net_pct[i, j, m], profit_usd[i, j, m]) if self.costs else {}),
+            ))
+        return opps
+
+
+def _net_fields(net_pct: float, profit_usd: float) -> dict:
+    usd = float(profit_usd) if profit_usd == profit_usd else None
+    return {"net_pct": float(net_pct), "est_profit_usd": usd}
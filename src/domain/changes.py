@@ -0,0 +1,39 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+from .models import PriceSnapshot
+
+
+def same_price(x: float, y: float) -> bool:
+    return x == y or (x != x and y != y)  # NaN-aware
+
+
+class ChangeTracker:
+    """Sequence numbers per (exchange, symbol) quote, bumped only when bid or ask moves.
+
+    ``dirty`` lists the symbols where any leg moved since ``mark_evaluated`` last saw them.
+    """
+
+    def __init__(self):
+        self._quotes: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.seq: Dict[Tuple[str, str], int] = {}
+        self._evaluated: Dict[str, Tuple[int, ...]] = {}
+
+    def observe(self, snap: PriceSnapshot) -> bool:
+        key = (snap.exchange, snap.symbol)
+        prev = self._quotes.get(key)
+        if prev is not None and same_price(prev[0], snap.bid) and same_price(prev[1], snap.ask):
+            return False
+        self._quotes[key] = (snap.bid, snap.ask)
+        self.seq[key] = self.seq.get(key, 0) + 1
+        return True
+
+    def _versions(self, exchanges: Sequence[str], symbol: str) -> Tuple[int, ...]:
+        return tuple(self.seq.get((ex, symbol), 0) for ex in exchanges)
+
+    def dirty(self, exchanges: Sequence[str], symbols: Sequence[str]) -> List[str]:
+        evaluated = self._evaluated
+        return [sym for sym in symbols if evaluated.get(sym) != self._versions(exchanges, sym)]
+
+    def mark_evaluated(self, exchanges: Sequence[str], symbols: Sequence[str]) -> None:
+        for sym in symbols:
+            self._evaluated[sym] = self._versions(exchanges, sym)
@@ -0,0 +1,126 @@
+"""Net-of-costs profit for a buy-here, move, sell-there round trip.
+
+Per trade: the exchange's taker fee (per symbol when overridden) and a flat
+slippage allowance on top-of-book prices. Per transfer: TRANSFER_FEE_PCT plus
+the buy exchange's flat withdrawal fee for the base currency, which is sized
+against a NET_NOTIONAL_USD trade. Fee and withdrawal tables are built once per
+(exchange, symbol) and kept as arrays for the batch path.
+"""
+from __future__ import annotations
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import PriceSnapshot
+
+USD_QUOTES = {"USDT": 1.0, "USD": 1.0}
+
+
+class CostModel:
+    def __init__(
+        self,
+        taker_fees_pct: Mapping[str, float] = None,
+        symbol_fees_pct: Mapping[Tuple[str, str], float] = None,
+        withdrawal_fees: Mapping[Tuple[str, str], float] = None,
+        transfer_fee_pct: float = 0.0,
+        slippage_pct: float = 0.0,
+        notional_usd: float = 1000.0,
+    ):
+        self.taker_fees_pct = dict(taker_fees_pct or {})
+        self.symbol_fees_pct = dict(symbol_fees_pct or {})   # (exchange, symbol) -> pct
+        self.withdrawal_fees = dict(withdrawal_fees or {})   # (exchange, currency) -> amount
+        self.transfer_keep = 1 - float(transfer_fee_pct) / 100
+        self.slippage = float(slippage_pct) / 100
+        self.notional_usd = float(notional_usd)
+        self.quote_usd: Dict[str, float] = dict(USD_QUOTES)
+        # [exchange, symbol] tables, grown as new names show up
+        self._ex_index: Dict[str, int] = {}
+        self._sym_index: Dict[str, int] = {}
+        self._fee = np.zeros((0, 0))
+        self._withdrawal = np.zeros((0, 0))
+
+    @classmethod
+    def from_settings(cls, s=None) -> "CostModel":
+        if s is None:
+            from ..config import settings as s
+        return cls(
+            s.taker_fees, s.symbol_taker_fees, s.withdrawal_fees,
+            s.TRANSFER_FEE_PCT, s.SLIPPAGE_PCT, s.NET_NOTIONAL_USD,
+        )
+
+    def fee(self, exchange: str, symbol: str) -> float:
+        pct = self.symbol_fees_pct.get((exchange, symbol), self.taker_fees_pct.get(exchange, 0.0))
+        return pct / 100
+
+    def withdrawal(self, exchange: str, symbol: str) -> float:
+        return self.withdrawal_fees.get((exchange, symbol.split("/", 1)[0]), 0.0)
+
+    def observe(self, snap: PriceSnapshot) -> None:
+        """Track USD rates of non-USD quote currencies from their USDT market (e.g. USDT/IRT)."""
+        base, _, quote = snap.symbol.partition("/")
+        if base in USD_QUOTES and quote and quote not in USD_QUOTES:
+            mid = (snap.bid + snap.ask) / 2
+            if mid > 0:  # NaN compares False
+                self.quote_usd[quote] = USD_QUOTES[base] / mid
+
+    def usd_rate(self, symbol: str) -> float:
+        """USD per unit of ``symbol``'s quote currency; NaN until known."""
+        return self.quote_usd.get(symbol.partition("/")[2], float("nan"))
+
+    def _tables(self, exchanges: Sequence[str],
+                symbols: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        ex_idx = _grow(self._ex_index, exchanges)
+        sym_idx = _grow(self._sym_index, symbols)
+        n_ex, n_sym = len(self._ex_index), len(self._sym_index)
+        if self._fee.shape != (n_ex, n_sym):
+            keys = [(ex, sym) for ex in self._ex_index for sym in self._sym_index]
+            fee = [self.fee(*k) for k in keys]
+            withdrawal = [self.withdrawal(*k) for k in keys]
+            self._fee = np.array(fee, dtype=np.float64).reshape(n_ex, n_sym)
+            self._withdrawal = np.array(withdrawal, dtype=np.float64).reshape(n_ex, n_sym)
+        cells = np.ix_(ex_idx, sym_idx)
+        return self._fee[cells], self._withdrawal[cells]
+
+    def net(self, buy_ex: str, sell_ex: str, symbol: str, buy_price: float, sell_price: float,
+            notional: Optional[float] = None,
+            slippage: bool = True) -> Tuple[float, Optional[float]]:
+        """(net profit %, USD profit or None) of buying ``notional`` quote worth and selling it.
+
+        ``notional`` defaults to NET_NOTIONAL_USD in the quote currency; pass
+        ``slippage=False`` for prices that already walk the book (VWAPs).
+        """
+        s = self.slippage if slippage else 0.0
+        usd = self.usd_rate(symbol)
+        notional_usd = self.notional_usd if notional is None else notional * usd
+        if notional is None:
+            notional = self.notional_usd / usd
+        gross = sell_price * (1 - s) / (buy_price * (1 + s))
+        keep = (1 - self.fee(buy_ex, symbol)) * self.transfer_keep * (1 - self.fee(sell_ex, symbol))
+        w = self.withdrawal(buy_ex, symbol)
+        fixed = w * sell_price * (1 - s) * (1 - self.fee(sell_ex, symbol)) / notional if w else 0.0
+        net_pct = (gross * keep - 1 - fixed) * 100
+        profit = net_pct / 100 * notional_usd
+        return net_pct, (profit if profit == profit else None)
+
+    def net_batch(self, exchanges: Sequence[str], symbols: Sequence[str],
+                  bid: np.ndarray, ask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """``net`` for every [buy exchange, sell exchange, symbol] at top of book."""
+        fee, withdrawal = self._tables(exchanges, symbols)
+        usd = np.array([self.usd_rate(sym) for sym in symbols])
+        notional = self.notional_usd / usd
+        buy = ask * (1 + self.slippage)
+        sell = bid * (1 - self.slippage)
+        sell_keep = sell * (1 - fee)  # [j, m]: quote received per base sold on j
+        with np.errstate(invalid="ignore", divide="ignore"):
+            keep = (1 - fee)[:, None, :] * self.transfer_keep * sell_keep[None, :, :]
+            net = keep / buy[:, None, :] - 1
+            fixed = withdrawal[:, None, :] * sell_keep[None, :, :] / notional
+            net -= np.where(withdrawal[:, None, :] > 0, fixed, 0.0)
+        return net * 100, net * self.notional_usd
+
+
+def _grow(index: Dict[str, int], names: Sequence[str]) -> np.ndarray:
+    for name in names:
+        if name not in index:
+            index[name] = len(index)
+    return np.fromiter((index[name] for name in names), dtype=np.intp, count=len(names))
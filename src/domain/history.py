@@ -0,0 +1,99 @@
+"""Recent quote history per (exchange, symbol) in preallocated ring buffers.
+
+Each ring is three float64 columns (ts as epoch seconds, bid, ask) sized once,
+so an append is three array stores and an index bump: no per-tick allocation.
+Queries copy out the window they need and downsample it with vector ops.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray]  # ts, bid, ask
+
+
+class QuoteRing:
+    __slots__ = ("capacity", "ts", "bid", "ask", "_next", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.ts = np.full(self.capacity, np.nan)
+        self.bid = np.full(self.capacity, np.nan)
+        self.ask = np.full(self.capacity, np.nan)
+        self._next = 0
+        self.size = 0
+
+    def append(self, ts: float, bid: float, ask: float) -> None:
+        i = self._next
+        self.ts[i] = ts
+        self.bid[i] = bid
+        self.ask[i] = ask
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def latest(self) -> Optional[Tuple[float, float, float]]:
+        if not self.size:
+            return None
+        i = self._next - 1
+        return float(self.ts[i]), float(self.bid[i]), float(self.ask[i])
+
+    def view(self, since: float = -np.inf) -> Columns:
+        """Quotes with ts >= ``since``, oldest first (copies)."""
+        start = (self._next - self.size) % self.capacity
+        order = np.arange(start, start + self.size) % self.capacity
+        ts = self.ts[order]
+        # appends arrive in time order, so the window is a suffix
+        first = int(np.searchsorted(ts, since, side="left"))
+        keep = order[first:]
+        return self.ts[keep], self.bid[keep], self.ask[keep]
+
+
+def downsample(ts: np.ndarray, bid: np.ndarray, ask: np.ndarray, start: float, end: float,
+               points: int) -> Columns:
+    """The last quote in each of ``points`` equal time buckets over [start, end].
+
+    Empty buckets are dropped.
+    """
+    if ts.size <= points:
+        return ts, bid, ask
+    edges = start + (end - start) * np.arange(1, points + 1) / points
+    idx = np.searchsorted(ts, edges, side="right") - 1
+    idx = np.unique(idx[idx >= 0])
+    return ts[idx], bid[idx], ask[idx]
+
+
+class QuoteHistory:
+    """One QuoteRing per (exchange, symbol), created on first sight."""
+
+    def __init__(self, capacity: int, window_seconds: float):
+        self.capacity = int(capacity)
+        self.window_seconds = float(window_seconds)
+        self._rings: Dict[Tuple[str, str], QuoteRing] = {}
+
+    def append(self, exchange: str, symbol: str, ts: float, bid: float, ask: float) -> None:
+        ring = self._rings.get((exchange, symbol))
+        if ring is None:
+            ring = self._rings[(exchange, symbol)] = QuoteRing(self.capacity)
+        ring.append(ts, bid, ask)
+
+    def rings(self) -> Iterator[Tuple[str, str, QuoteRing]]:
+        for (exchange, symbol), ring in self._rings.items():
+            yield exchange, symbol, ring
+
+    def query(self, symbol: str, now: float, seconds: Optional[float] = None,
+              points: Optional[int] = None) -> Dict[str, Columns]:
+        """Per exchange, ``symbol``'s quotes over the last ``seconds``, downsampled.
+
+        ``seconds`` is capped at the window.
+        """
+        window = self.window_seconds
+        seconds = window if seconds is None else min(float(seconds), window)
+        start = now - seconds
+        out = {}
+        for (exchange, sym), ring in self._rings.items():
+            if sym != symbol:
+                continue
+            cols = ring.view(start)
+            out[exchange] = downsample(*cols, start, now, points) if points else cols
+        return out
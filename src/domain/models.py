@@ -1,15 +1,18 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Literal
+from typing import Dict, Sequence, Tuple
 from datetime import datetime, timezone
+import numpy as np
 
 @dataclass(frozen=True, slots=True)
 class PriceSnapshot:
-    exchange: Literal["nobitex", "wallex"]
+    exchange: str         # adapter name, e.g. "nobitex"
     symbol: str           # normalized like "BTC/USDT"
     bid: float            # best buy (what we can sell at)
     ask: float            # best sell (what we can buy at)
     ts: datetime
+    bid_size: float | None = None   # quantity at the best bid, when the source exposes it
+    ask_size: float | None = None
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -17,10 +20,37 @@ def utcnow() -> datetime:
 @dataclass(frozen=True, slots=True)
 class ArbOpportunity:
     symbol: str
-    buy_from: Literal["nobitex","wallex"]
+    buy_from: str
     buy_price: float
-    sell_to: Literal["nobitex","wallex"]
+    sell_to: str
     sell_price: float
     diff_abs: float
     diff_pct: float
     ts: datetime
+    qty: float | None = None       # base quantity filled at the VWAP prices (depth mode)
+    max_qty: float | None = None   # largest base quantity that is still profitable (depth mode)
+    route: str | None = None       # legs of a multi-market cycle (triangular mode)
+    net_pct: float | None = None   # diff_pct after fees, transfer and slippage (CostModel)
+    est_profit_usd: float | None = None
+
+@dataclass(frozen=True, slots=True)
+class SnapshotBatch:
+    snapshots: Dict[str, Dict[str, PriceSnapshot]]  # exchange -> symbol -> snapshot
+    started_at: datetime
+    skew_seconds: float   # latest minus earliest snapshot ts in the batch
+
+    def get(self, exchange: str, symbol: str) -> PriceSnapshot | None:
+        return self.snapshots.get(exchange, {}).get(symbol)
+
+    def to_arrays(self, exchanges: Sequence[str],
+                  symbols: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (bid, ask, ts) matrices of shape (exchanges, symbols); missing quotes are NaN."""
+        shape = (len(exchanges), len(symbols))
+        bid, ask, ts = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for i, ex in enumerate(exchanges):
+            per_ex = self.snapshots.get(ex, {})
+            for m, sym in enumerate(symbols):
+                snap = per_ex.get(sym)
+                if snap is not None:
+                    bid[i, m], ask[i, m], ts[i, m] = snap.bid, snap.ask, snap.ts.timestamp()
+        return bid, ask, ts
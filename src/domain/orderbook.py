@@ -0,0 +1,142 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence, Tuple, Union
+import numpy as np
+
+from .models import PriceSnapshot, utcnow
+
+_EMPTY = np.empty(0, dtype=np.float64)
+
+
+def _levels_to_arrays(levels) -> Tuple[np.ndarray, np.ndarray]:
+    # levels like [["price","qty"], ...] straight from the exchange payload
+    if not levels:
+        return _EMPTY, _EMPTY
+    arr = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    return arr[:, 0].copy(), arr[:, 1].copy()
+
+
+@dataclass(frozen=True, slots=True)
+class OrderBook:
+    exchange: str
+    symbol: str
+    bid_px: np.ndarray    # descending (best first)
+    bid_qty: np.ndarray
+    ask_px: np.ndarray    # ascending (best first)
+    ask_qty: np.ndarray
+    ts: datetime
+
+    @classmethod
+    def from_levels(cls, exchange: str, symbol: str, bids, asks,
+                    ts: datetime | None = None) -> OrderBook:
+        bid_px, bid_qty = _levels_to_arrays(bids)
+        ask_px, ask_qty = _levels_to_arrays(asks)
+        # exchanges normally send sorted books; enforce it cheaply
+        if bid_px.size > 1 and np.any(bid_px[1:] > bid_px[:-1]):
+            order = np.argsort(-bid_px, kind="stable")
+            bid_px, bid_qty = bid_px[order], bid_qty[order]
+        if ask_px.size > 1 and np.any(ask_px[1:] < ask_px[:-1]):
+            order = np.argsort(ask_px, kind="stable")
+            ask_px, ask_qty = ask_px[order], ask_qty[order]
+        return cls(exchange, symbol, bid_px, bid_qty, ask_px, ask_qty, ts or utcnow())
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_px[0]) if self.bid_px.size else float("nan")
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_px[0]) if self.ask_px.size else float("nan")
+
+    def to_snapshot(self) -> PriceSnapshot:
+        return PriceSnapshot(
+            exchange=self.exchange, symbol=self.symbol, bid=self.best_bid, ask=self.best_ask,
+            ts=self.ts,
+            bid_size=float(self.bid_qty[0]) if self.bid_qty.size else None,
+            ask_size=float(self.ask_qty[0]) if self.ask_qty.size else None,
+        )
+
+
+def buy_with_quote(ask_px: np.ndarray, ask_qty: np.ndarray,
+                   notionals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Spend each quote-currency notional on the asks; return (base qty, vwap).
+
+    NaN if the book is too thin.
+    """
+    notionals = np.asarray(notionals, dtype=np.float64)
+    if ask_px.size == 0:
+        nan = np.full(notionals.shape, np.nan)
+        return nan, nan
+    cum_quote = np.cumsum(ask_px * ask_qty)
+    cum_qty = np.cumsum(ask_qty)
+    idx = np.searchsorted(cum_quote, notionals, side="left")
+    ok = idx < ask_px.size
+    safe = np.minimum(idx, ask_px.size - 1)
+    prev_quote = np.where(safe > 0, cum_quote[safe - 1], 0.0)
+    prev_qty = np.where(safe > 0, cum_qty[safe - 1], 0.0)
+    qty = prev_qty + (notionals - prev_quote) / ask_px[safe]
+    qty = np.where(ok, qty, np.nan)
+    return qty, notionals / qty
+
+
+def sell_base(bid_px: np.ndarray, bid_qty: np.ndarray,
+              qtys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sell each base quantity into the bids; return (quote proceeds, vwap).
+
+    NaN if the book is too thin.
+    """
+    qtys = np.asarray(qtys, dtype=np.float64)
+    if bid_px.size == 0:
+        nan = np.full(qtys.shape, np.nan)
+        return nan, nan
+    cum_qty = np.cumsum(bid_qty)
+    cum_quote = np.cumsum(bid_px * bid_qty)
+    # NaN quantities sort past the end and come back as NaN
+    idx = np.searchsorted(cum_qty, qtys, side="left")
+    ok = idx < bid_px.size
+    safe = np.minimum(idx, bid_px.size - 1)
+    prev_quote = np.where(safe > 0, cum_quote[safe - 1], 0.0)
+    prev_qty = np.where(safe > 0, cum_qty[safe - 1], 0.0)
+    proceeds = prev_quote + (qtys - prev_qty) * bid_px[safe]
+    proceeds = np.where(ok, proceeds, np.nan)
+    return proceeds, proceeds / qtys
+
+
+def max_profitable_qty(ask_px: np.ndarray, ask_qty: np.ndarray,
+                       bid_px: np.ndarray, bid_qty: np.ndarray) -> Tuple[float, float]:
+    """Largest base quantity where buying the asks and selling the bids still gains.
+
+    Returns (qty, quote profit).
+    """
+    if ask_px.size == 0 or bid_px.size == 0 or bid_px[0] <= ask_px[0]:
+        return 0.0, 0.0
+    cum_ask = np.cumsum(ask_qty)
+    cum_bid = np.cumsum(bid_qty)
+    # segment boundaries where the marginal price on either side changes
+    edges = np.union1d(cum_ask, cum_bid)
+    edges = edges[edges <= min(cum_ask[-1], cum_bid[-1])]
+    if edges.size == 0:
+        return 0.0, 0.0
+    marg_ask = ask_px[np.searchsorted(cum_ask, edges, side="left")]
+    marg_bid = bid_px[np.searchsorted(cum_bid, edges, side="left")]
+    seg = np.diff(edges, prepend=0.0)
+    # asks only get worse and bids only get worse, so profitable segments form a prefix
+    gain = marg_bid > marg_ask
+    n = edges.size if gain.all() else int(np.argmin(gain))
+    if n == 0:
+        return 0.0, 0.0
+    profit = float(np.sum((marg_bid[:n] - marg_ask[:n]) * seg[:n]))
+    return float(edges[n - 1]), profit
+
+
+def vwap_spreads(
+    a: OrderBook, b: OrderBook, notionals: Union[Sequence[float], np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Buy on ``a`` asks, sell the same quantity on ``b`` bids.
+
+    Returns (qty, buy vwap, sell vwap), one entry per notional.
+    """
+    qty, buy_vwap = buy_with_quote(a.ask_px, a.ask_qty, np.asarray(notionals, dtype=np.float64))
+    _, sell_vwap = sell_base(b.bid_px, b.bid_qty, qty)
+    return qty, buy_vwap, sell_vwap
@@ -0,0 +1,165 @@
+"""Cross-currency cycle search over every quoted market on every exchange.
+
+Nodes are ``exchange:CURRENCY``. A quote for BASE/QUOTE on an exchange adds two
+edges: QUOTE→BASE at 1/ask and BASE→QUOTE at bid, both net of that exchange's
+taker fee. The same currency on two exchanges is joined by transfer edges. Edge
+weights are -log(rate), so a profitable round trip is a negative-weight cycle.
+
+Updates are incremental: a new quote only rewrites its two edges, and only
+cycles through those edges are searched (depth-limited, ``max_legs``).
+"""
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .models import ArbOpportunity, PriceSnapshot
+from ..metrics import opportunities_found_total
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    exchange: str
+    market: Optional[str]   # None for a transfer between exchanges
+    side: str               # buy | sell | transfer
+    price: float            # quote per base for buy/sell; 1 for transfers
+
+    def describe(self, src: str, dst: str) -> str:
+        if self.market is None:
+            return f"move {src.split(':')[1]} {src.split(':')[0]}→{dst.split(':')[0]}"
+        return f"{self.side} {self.market} on {self.exchange} @ {self.price:g}"
+
+
+Edge = Tuple[float, Leg]  # (weight = -log(rate), leg)
+
+
+def node(exchange: str, currency: str) -> str:
+    return f"{exchange}:{currency}"
+
+
+class CurrencyGraph:
+    def __init__(self, fees_pct: Mapping[str, float] = None, transfer_fee_pct: float = 0.0):
+        self.fees_pct = dict(fees_pct or {})
+        self.transfer_weight = -math.log1p(-transfer_fee_pct / 100)
+        self.adj: Dict[str, Dict[str, Edge]] = {}
+        self._venues: Dict[str, set] = {}  # currency -> exchanges it is quoted on
+
+    def _add_currency(self, exchange: str, currency: str) -> List[Tuple[str, str]]:
+        here = node(exchange, currency)
+        self.adj.setdefault(here, {})
+        venues = self._venues.setdefault(currency, set())
+        changed = []
+        if exchange not in venues:
+            for other in venues:
+                there = node(other, currency)
+                self.adj[here][there] = (self.transfer_weight, Leg(exchange, None, "transfer", 1.0))
+                self.adj[there][here] = (self.transfer_weight, Leg(other, None, "transfer", 1.0))
+                changed += [(here, there), (there, here)]
+            venues.add(exchange)
+        return changed
+
+    def update(self, snap: PriceSnapshot) -> List[Tuple[str, str]]:
+        """Apply one quote; return the edges whose weight changed."""
+        if "/" not in snap.symbol:
+            return []
+        base, quote = snap.symbol.split("/", 1)
+        changed = self._add_currency(snap.exchange, base) + self._add_currency(snap.exchange, quote)
+        b, q = node(snap.exchange, base), node(snap.exchange, quote)
+        keep = 1 - self.fees_pct.get(snap.exchange, 0.0) / 100
+        for src, dst, price, rate, side in (
+            (q, b, snap.ask, (keep / snap.ask) if snap.ask > 0 else float("nan"), "buy"),
+            (b, q, snap.bid, keep * snap.bid, "sell"),
+        ):
+            if rate == rate and rate > 0:
+                self.adj[src][dst] = (-math.log(rate), Leg(snap.exchange, snap.symbol, side, price))
+            else:
+                self.adj[src].pop(dst, None)
+            changed.append((src, dst))
+        return changed
+
+    def cycles_through(self, u: str, v: str,
+                       max_legs: int) -> Iterable[Tuple[float, List[str], List[Leg]]]:
+        """Every simple cycle u→v→…→u of at most ``max_legs`` edges, with its total weight."""
+        first = self.adj.get(u, {}).get(v)
+        if first is None:
+            return
+        path, legs, seen = [u, v], [first[1]], {u, v}
+
+        def walk(x: str, weight: float):
+            for y, (w, leg) in self.adj.get(x, {}).items():
+                if y == u and len(legs) >= 2:
+                    yield weight + w, path + [u], legs + [leg]
+                elif y not in seen and len(legs) + 1 < max_legs:
+                    seen.add(y)
+                    path.append(y)
+                    legs.append(leg)
+                    yield from walk(y, weight + w)
+                    legs.pop()
+                    path.pop()
+                    seen.discard(y)
+
+        yield from walk(v, first[0])
+
+
+class TriangularEngine:
+    """Alerts on cycles whose round-trip return beats ``threshold_pct`` after fees.
+
+    Cycles trading a single market are left to ArbEngine. Cooldown and hysteresis
+    work per cycle, as ArbEngine does per symbol and direction.
+    """
+
+    def __init__(self, threshold_pct: float, cooldown_seconds: float, hysteresis_delta_pct: float,
+                 fees_pct: Mapping[str, float] = None, transfer_fee_pct: float = 0.0,
+                 max_legs: int = 4):
+        self.threshold_pct = float(threshold_pct)
+        self.cooldown = timedelta(seconds=float(cooldown_seconds))
+        self.hysteresis = float(hysteresis_delta_pct)
+        self.max_legs = int(max_legs)
+        self.graph = CurrencyGraph(fees_pct, transfer_fee_pct)
+        self._max_weight = -math.log1p(self.threshold_pct / 100)
+        self._last_alert: Dict[Tuple[str, ...], Tuple[datetime, float]] = {}
+
+    @staticmethod
+    def _canonical(path: List[str],
+                   legs: List[Leg]) -> Tuple[Tuple[str, ...], List[str], List[Leg]]:
+        nodes = path[:-1]
+        k = min(range(len(nodes)), key=nodes.__getitem__)
+        nodes = nodes[k:] + nodes[:k]
+        return tuple(nodes), nodes + [nodes[0]], legs[k:] + legs[:k]
+
+    def on_snapshot(self, snap: PriceSnapshot) -> List[ArbOpportunity]:
+        found: Dict[Tuple[str, ...], Tuple[float, List[str], List[Leg]]] = {}
+        for u, v in self.graph.update(snap):
+            for weight, path, legs in self.graph.cycles_through(u, v, self.max_legs):
+                if weight > self._max_weight:
+                    continue
+                if len({leg.market for leg in legs if leg.market}) < 2:
+                    continue
+                key, path, legs = self._canonical(path, legs)
+                found.setdefault(key, (weight, path, legs))
+
+        out = []
+        for key, (weight, path, legs) in sorted(found.items(), key=lambda kv: kv[1][0]):
+            ret = math.exp(-weight)
+            pct = (ret - 1) * 100
+            last = self._last_alert.get(key)
+            if last and snap.ts - last[0] < self.cooldown and pct < last[1] + self.hysteresis:
+                continue
+            self._last_alert[key] = (snap.ts, pct)
+            out.append(self._opportunity(path, legs, ret, snap.ts))
+        return out
+
+    def _opportunity(self, path: List[str], legs: List[Leg], ret: float,
+                     ts: datetime) -> ArbOpportunity:
+        currencies = "→".join(n.split(":")[1] for n in path)
+        trades = [leg for leg in legs if leg.market]
+        # one fixed series: every distinct route as a label value would be unbounded
+        opportunities_found_total.labels(symbol="triangular", direction="cycle").inc()
+        return ArbOpportunity(
+            symbol=currencies,
+            buy_from=trades[0].exchange, buy_price=1.0,
+            sell_to=trades[-1].exchange, sell_price=ret,
+            diff_abs=ret - 1, diff_pct=(ret - 1) * 100, ts=ts,
+            route="; ".join(leg.describe(a, b) for leg, a, b in zip(legs, path, path[1:])),
+        )
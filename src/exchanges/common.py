@@ -1,42 +1,162 @@
-from typing import Dict, Optional, Callable, Awaitable
-import asyncio, time
+from typing import (
+    TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Tuple,
+    Union,
+)
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+import asyncio, sys, time
 import httpx
 from ..config import settings
+from ..domain.models import PriceSnapshot, SnapshotBatch, utcnow
+from ..metrics import fetch_deadline_misses_total, hedged_requests_total, snapshot_skew_seconds
 from ..utils.retry import backoff
+from ..utils.tracing import span
+from .slots import LocalSlots, SharedSlots
 
-# Map normalized 'BTC/USDT' -> per-exchange symbols if needed
-NOBITEX_SYMBOL_MAP: Dict[str, str] = {
-    "BTC/USDT": "BTCUSDT",
-    "ETH/USDT": "ETHUSDT",
-    "USDT/IRT": "USDTIRT",
-}
+if TYPE_CHECKING:
+    from ..adapters.base import ExchangeAdapter  # imports this module
 
-WALLEX_SYMBOL_MAP: Dict[str, str] = {
-    "BTC/USDT": "BTCUSDT",
-    "ETH/USDT": "ETHUSDT",
-    "USDT/IRT": "USDTIRT",
-}
 
 class TokenBucket:
-    def __init__(self, rate_per_sec: float, capacity: int):
-        self.rate = float(rate_per_sec)
+    """Rate limiter that hands out future slots instead of queueing callers on a lock.
+
+    ``acquire`` books the next free slot (GCRA: a theoretical arrival time
+    advanced by ``weight / rate``) and then sleeps until it without holding
+    anything, so concurrent callers wait in parallel for their own slots.
+    ``observe`` adapts the rate to the server: Retry-After and 429 halve it and
+    pause new slots; X-RateLimit-Remaining/Reset cap it at what is left in the
+    window; plain successes creep it back up to ``rate_per_sec``. With
+    ``shared_name`` the state sits in shared memory and is one budget for
+    every process on the host.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: int, shared_name: Optional[str] = None,
+                 min_rate_per_sec: Optional[float] = None):
+        self.max_rate = float(rate_per_sec)
+        self.min_rate = (
+            float(min_rate_per_sec) if min_rate_per_sec is not None else self.max_rate / 20
+        )
         self.capacity = int(capacity)
-        self.tokens = float(capacity)
-        self.updated_at = time.perf_counter()
-        self._lock = asyncio.Lock()
+        self._slots: Union[LocalSlots, SharedSlots] = (
+            SharedSlots(shared_name, self.max_rate) if shared_name else LocalSlots(self.max_rate)
+        )
+
+    @property
+    def rate(self) -> float:
+        return self._slots.rate
+
+    def reserve(self, weight: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """Book ``weight`` tokens; return how long to wait before using them.
+
+        With ``max_wait``, a slot further out than that is not booked and None is returned.
+        """
+        now = time.monotonic()
+        with self._slots.update() as st:
+            if st.rate <= 0:
+                return 0.05
+            interval = 1.0 / st.rate
+            tat = max(st.tat, now) + weight * interval
+            wait = max(0.0, tat - self.capacity * interval - now)
+            if max_wait is not None and wait > max_wait:
+                return None
+            st.tat = tat
+        return wait
+
+    def release(self, weight: float = 1.0) -> None:
+        """Give back a booked slot that will not be used."""
+        now = time.monotonic()
+        with self._slots.update() as st:
+            if st.rate > 0:
+                st.tat = max(now, st.tat - weight / st.rate)
+
+    async def acquire(self, weight: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """Wait for a slot; False (nothing booked) when it is more than ``max_wait`` away."""
+        wait = self.reserve(weight, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # cancelled before its turn: the slot goes back to later callers
+                self.release(weight)
+                raise
+        return True
+
+    def available(self) -> float:
+        """Tokens that could be taken right now without waiting."""
+        with self._slots.update() as st:
+            debt = max(0.0, st.tat - time.monotonic()) * st.rate
+        return max(0.0, self.capacity - debt)
+
+    def pause_until(self, when: float) -> None:
+        """No slot starts before monotonic time ``when``."""
+        with self._slots.update() as st:
+            # the next reservation lands exactly at ``when``
+            st.tat = max(st.tat, when + (self.capacity - 1) / st.rate)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        retry_after, remaining, reset = rate_limit_headers(headers)
+        now = time.monotonic()
+        if status_code == 429 or retry_after is not None:
+            with self._slots.update() as st:
+                st.rate = max(self.min_rate, st.rate / 2)
+            self.pause_until(now + (retry_after if retry_after is not None else 1.0 / self.rate))
+        elif remaining is not None and reset:
+            with self._slots.update() as st:
+                st.rate = min(self.max_rate, max(self.min_rate, remaining / reset))
+            if remaining < 1:
+                self.pause_until(now + reset)
+        elif self.rate < self.max_rate:
+            with self._slots.update() as st:
+                st.rate = min(self.max_rate, st.rate + self.max_rate / 20)
+
+    def close(self) -> None:
+        self._slots.close()
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                if name.lower() == "retry-after":
+                    # HTTP-date form
+                    try:
+                        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        pass
+    return None
 
-    async def acquire(self) -> None:
-        async with self._lock:
-            now = time.perf_counter()
-            elapsed = now - self.updated_at
-            self.updated_at = now
-            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
-            if self.tokens < 1:
-                # wait until 1 token is available
-                wait_time = (1 - self.tokens) / self.rate if self.rate > 0 else 0.05
-                await asyncio.sleep(wait_time)
-                self.tokens = min(self.capacity, self.tokens + wait_time * self.rate)
-            self.tokens -= 1
+
+def rate_limit_headers(
+    headers: Mapping[str, str],
+) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """(retry-after seconds, requests remaining, seconds until the window resets).
+
+    Each is None when its header is absent.
+    """
+    retry_after = _header(headers, "Retry-After")
+    remaining = _header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+    reset = _header(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+    if reset is not None and reset > 1e9:
+        # an epoch timestamp (seconds, or milliseconds) rather than a delta
+        reset = max(0.0, (reset / 1000 if reset > 1e12 else reset) - time.time())
+    return retry_after, remaining, reset
+
+
+def endpoint_weight(exchange: str, endpoint: str) -> float:
+    """Limiter weight of one request to ``endpoint`` (ENDPOINT_WEIGHTS, default 1)."""
+    return settings.endpoint_weights.get((exchange, endpoint), 1.0)
+
+
+def exchange_limiter(exchange: str, rate_per_sec: float, burst: int) -> TokenBucket:
+    shared = settings.RATE_LIMIT_SHARED_NAME
+    return TokenBucket(rate_per_sec, burst, shared_name=f"{shared}-{exchange}" if shared else None)
 
 class CircuitBreaker:
     def __init__(self, failure_threshold: int = 3, open_seconds: float = 2.0):
@@ -65,6 +185,95 @@ class CircuitBreaker:
                 self.open_until = time.monotonic() + self.open_seconds
                 self.failures = 0
 
+_deadline: ContextVar[Optional[float]] = ContextVar("fetch_deadline", default=None)
+
+
+@contextmanager
+def fetch_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Every resilient_get started inside gives up ``seconds`` from now (falsy = no deadline).
+
+    The deadline rides a context variable, so it reaches tasks fanned out with
+    gather/create_task; nested deadlines can only tighten it.
+    """
+    if not seconds:
+        yield
+        return
+    when = asyncio.get_running_loop().time() + seconds
+    current = _deadline.get()
+    token = _deadline.set(when if current is None else min(current, when))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class LatencyWindow:
+    """Recent request latencies of one exchange; hedges fire after their ``q`` quantile."""
+
+    def __init__(self, size: int = 256, refresh: int = 32):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._refresh = refresh
+        self._since = 0
+        self._cached: Dict[float, float] = {}
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since += 1
+        if self._since >= self._refresh:
+            self._since = 0
+            self._cached.clear()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """None until enough samples to trust; recomputed every ``refresh`` observations."""
+        if len(self._samples) < self._refresh:
+            return None
+        if q not in self._cached:
+            ordered = sorted(self._samples)
+            self._cached[q] = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return self._cached[q]
+
+
+_latency: Dict[str, LatencyWindow] = {}
+
+
+async def _hedged_get(client, url: str, headers, exchange_name: str, delay: float,
+                      limiter: Optional[TokenBucket], weight: float) -> httpx.Response:
+    # a duplicate goes out if the first request outlives ``delay``; whichever succeeds first wins
+    tasks = {asyncio.ensure_future(client.get(url, headers=headers)): "primary"}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        # the hedge only goes out if a slot is free right now; nothing is booked otherwise
+        if done or (limiter and limiter.reserve(weight, max_wait=0.0) is None):
+            return await next(iter(tasks))
+        tasks[asyncio.ensure_future(client.get(url, headers=headers))] = "hedge"
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    hedged_requests_total.labels(exchange=exchange_name, winner=tasks[task]).inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _get(client, url: str, exchange_name: str, limiter: Optional[TokenBucket], weight: float,
+               headers: Optional[Mapping[str, str]]) -> httpx.Response:
+    window = _latency.setdefault(exchange_name, LatencyWindow())
+    delay = window.quantile(settings.HEDGE_QUANTILE) if settings.HEDGE_ENABLED else None
+    start = time.monotonic()
+    if delay is None:
+        resp = await client.get(url, headers=headers)
+    else:
+        delay = max(delay, settings.HEDGE_MIN_DELAY_SECONDS)
+        resp = await _hedged_get(client, url, headers, exchange_name, delay, limiter, weight)
+    window.observe(time.monotonic() - start)
+    return resp
+
+
 async def resilient_get(
     client: httpx.AsyncClient,
     url: str,
@@ -72,25 +281,59 @@ async def resilient_get(
     limiter: Optional[TokenBucket] = None,
     breaker: Optional[CircuitBreaker] = None,
     max_tries: int = None,
+    weight: float = 1.0,
+    headers: Optional[Mapping[str, str]] = None,
 ) -> Optional[httpx.Response]:
+    """GET with pacing, breaker, retries and (HEDGE_ENABLED) hedging.
+
+    Everything runs within the current fetch_deadline; returns None when retries
+    are exhausted or the deadline passes first.
+    """
+    args = (client, url, exchange_name, limiter, breaker, max_tries, weight, headers)
+    deadline = _deadline.get()
+    if deadline is None:
+        return await _attempts(*args)
+    try:
+        async with asyncio.timeout_at(deadline):
+            return await _attempts(*args)
+    except TimeoutError:
+        fetch_deadline_misses_total.labels(exchange=exchange_name).inc()
+        return None
+
+
+async def _attempts(client, url, exchange_name, limiter, breaker, max_tries, weight,
+                    headers) -> Optional[httpx.Response]:
     tries = max_tries or settings.RETRY_MAX_TRIES
-    for attempt in range(tries):
-        if limiter:
-            await limiter.acquire()
+    attempt = 0
+    while attempt < tries:
         if breaker and not await breaker.allow():
-            await asyncio.sleep(0.1)
+            # wait out the open breaker instead of burning attempts (the deadline still applies)
+            with span("retry_wait", exchange_name):
+                await asyncio.sleep(max(0.0, breaker.open_until - time.monotonic()))
             continue
+        attempt += 1
+        if limiter:
+            # a slot past the deadline is not booked at all, so abandoned cycles cannot pile up debt
+            deadline = _deadline.get()
+            budget = None if deadline is None else deadline - asyncio.get_running_loop().time()
+            with span("rate_limit", exchange_name):
+                if not await limiter.acquire(weight, max_wait=budget):
+                    raise TimeoutError
         try:
-            resp = await client.get(url, headers=getattr(client, "_extra_headers", None))
+            with span("network", exchange_name):
+                resp = await _get(client, url, exchange_name, limiter, weight, headers)
+            if limiter:
+                limiter.observe(resp.status_code, resp.headers)
             # backoff on 429/5xx
             if resp.status_code in (429, 500, 502, 503, 504):
                 if breaker:
                     await breaker.on_failure()
-                await backoff(
-                    attempt,
-                    settings.RETRY_BASE_DELAY,
-                    settings.RETRY_MAX_DELAY,
-                )
+                with span("retry_wait", exchange_name):
+                    await backoff(
+                        attempt - 1,
+                        settings.RETRY_BASE_DELAY,
+                        settings.RETRY_MAX_DELAY,
+                    )
                 continue
             if breaker:
                 await breaker.on_success()
@@ -98,10 +341,60 @@ async def resilient_get(
         except httpx.RequestError:
             if breaker:
                 await breaker.on_failure()
-            await backoff(
-                attempt,
-                settings.RETRY_BASE_DELAY,
-                settings.RETRY_MAX_DELAY,
-            )
+            with span("retry_wait", exchange_name):
+                await backoff(
+                    attempt - 1,
+                    settings.RETRY_BASE_DELAY,
+                    settings.RETRY_MAX_DELAY,
+                )
             continue
     return None
+
+
+def use_bulk(symbols: List[str]) -> bool:
+    """Whether one all-markets request beats a request per symbol for this symbol list."""
+    return 0 < settings.BULK_FETCH_MIN_SYMBOLS <= len(symbols)
+
+
+def request_budget(clients: Dict[str, "ExchangeAdapter"]) -> int:
+    """Requests every client can make right now without waiting on its TokenBucket."""
+    limiters = [c._limiter for c in clients.values() if getattr(c, "_limiter", None)]
+    if not limiters:
+        return sys.maxsize
+    return int(min(lim.available() for lim in limiters))
+
+
+async def fetch_concurrently(
+    fetch_one: Callable[[str], Awaitable[Optional[PriceSnapshot]]],
+    symbols: List[str],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, PriceSnapshot]:
+    # Fan out over symbols; the semaphore bounds in-flight requests and the
+    # client's TokenBucket (inside resilient_get) still paces them.
+    async def run(sym: str) -> Optional[PriceSnapshot]:
+        async with semaphore:
+            return await fetch_one(sym)
+
+    snaps = await asyncio.gather(*(run(sym) for sym in symbols))
+    return {sym: snap for sym, snap in zip(symbols, snaps) if snap is not None}
+
+
+async def fetch_batch(clients: Dict[str, "ExchangeAdapter"], symbols: List[str]) -> SnapshotBatch:
+    """Fetch all symbols from all exchanges at once and return one batch per cycle."""
+    started_at = utcnow()
+    names = list(clients)
+    if settings.CONCURRENT_FETCH:
+        results = await asyncio.gather(
+            *(clients[name].fetch_ticker(symbols) for name in names), return_exceptions=True
+        )
+    else:
+        results = [await clients[name].fetch_ticker(symbols) for name in names]
+    snapshots: Dict[str, Dict[str, PriceSnapshot]] = {}
+    for name, res in zip(names, results):
+        snapshots[name] = res if isinstance(res, dict) else {}
+
+    stamps = [snap.ts for per_ex in snapshots.values() for snap in per_ex.values()]
+    skew = (max(stamps) - min(stamps)).total_seconds() if stamps else 0.0
+    if stamps:
+        snapshot_skew_seconds.observe(skew)
+    return SnapshotBatch(snapshots=snapshots, started_at=started_at, skew_seconds=skew)
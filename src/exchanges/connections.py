@@ -0,0 +1,59 @@
+"""Pooled HTTP clients for the exchange adapters, one per host.
+
+Adapters ask for ``client(base_url)`` instead of opening their own, so venues
+(or endpoints) on the same host share one pool. With HTTP2_ENABLED and the
+``h2`` package installed, concurrent requests to a host multiplex over a single
+connection; otherwise HTTP/1.1 keeps up to HTTP_MAX_CONNECTIONS_PER_HOST
+connections alive between cycles.
+"""
+from __future__ import annotations
+import importlib.util
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class ConnectionManager:
+    def __init__(self, http2: Optional[bool] = None, max_connections: Optional[int] = None,
+                 keepalive_seconds: Optional[float] = None, timeout: Optional[float] = None):
+        want = settings.HTTP2_ENABLED if http2 is None else http2
+        self.http2 = want and http2_available()
+        if want and not self.http2:
+            logger.info("HTTP2_ENABLED is set but h2 is not installed; "
+                        "using HTTP/1.1 keep-alive pools")
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=max_connections or settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=keepalive_seconds or settings.HTTP_KEEPALIVE_SECONDS,
+        )
+        self.timeout = timeout or settings.HTTP_TIMEOUT_SECONDS
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """The shared client for ``base_url``'s scheme, host and port."""
+        url = httpx.URL(base_url)
+        host = f"{url.scheme}://{url.netloc.decode()}"
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._clients[host] = httpx.AsyncClient(
+                http2=self.http2, limits=self.limits, timeout=self.timeout,
+            )
+        return client
+
+    @property
+    def hosts(self) -> list:
+        return list(self._clients)
+
+    async def close(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
@@ -0,0 +1,89 @@
+"""Where a TokenBucket keeps its state: the next free slot time and the current rate.
+
+``LocalSlots`` lives in the process. ``SharedSlots`` lives in a named
+shared-memory block, so every worker process on the host reserves from one
+budget per exchange. Updates take an ``flock`` only for the few instructions
+of a read-modify-write, never across a sleep. The block counts the processes
+attached to it; the last one to close unlinks it.
+"""
+from __future__ import annotations
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+_LAYOUT = struct.Struct("ddq")  # tat (monotonic seconds), rate (tokens/s), attached processes
+
+
+class LocalSlots:
+    def __init__(self, rate: float):
+        self.tat = 0.0
+        self.rate = float(rate)
+
+    @contextmanager
+    def update(self) -> Iterator["LocalSlots"]:
+        # one event loop thread and no await inside the block: nothing to lock
+        yield self
+
+    def close(self) -> None:
+        pass
+
+
+class SharedSlots:
+    """Slot state in shared memory ``name``; created by whichever process comes first."""
+
+    def __init__(self, name: str, rate: float):
+        import fcntl
+        from multiprocessing import shared_memory
+
+        self._fcntl = fcntl
+        self._lock = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+        with self._locked():
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=_LAYOUT.size)
+                attached = 0
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=name)
+                attached = _LAYOUT.unpack_from(self._shm.buf, 0)[2]
+            if attached <= 0:
+                # first one in, or a block left over by processes that died without
+                # closing: start from the configured rate, not a stale backed-off one
+                _LAYOUT.pack_into(self._shm.buf, 0, 0.0, float(rate), 1)
+            else:
+                tat, shared_rate, _ = _LAYOUT.unpack_from(self._shm.buf, 0)
+                _LAYOUT.pack_into(self._shm.buf, 0, tat, shared_rate, attached + 1)
+        # before 3.13 every attaching process registers the block with its resource
+        # tracker, which unlinks it at exit and pulls it from under the other workers
+        try:
+            from multiprocessing import resource_tracker
+            # registered under the private, "/"-prefixed name, not .name
+            resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            pass
+        self.tat, self.rate, _ = _LAYOUT.unpack_from(self._shm.buf, 0)
+
+    @contextmanager
+    def _locked(self):
+        self._fcntl.flock(self._lock, self._fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            self._fcntl.flock(self._lock, self._fcntl.LOCK_UN)
+
+    @contextmanager
+    def update(self) -> Iterator["SharedSlots"]:
+        with self._locked():
+            self.tat, self.rate, attached = _LAYOUT.unpack_from(self._shm.buf, 0)
+            yield self
+            _LAYOUT.pack_into(self._shm.buf, 0, self.tat, self.rate, attached)
+
+    def close(self) -> None:
+        with self._locked():
+            tat, rate, attached = _LAYOUT.unpack_from(self._shm.buf, 0)
+            attached -= 1
+            _LAYOUT.pack_into(self._shm.buf, 0, tat, rate, attached)
+            self._shm.close()
+            if attached <= 0:
+                self._shm.unlink()
+        self._lock.close()
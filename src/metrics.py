@@ -1,4 +1,101 @@
-from prometheus_client import Counter, Gauge, Histogram
+import heapq
+from typing import Dict, Optional, Set, Tuple
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from .config import settings
+
+
+class _LatestChild:
+    __slots__ = ("_values", "_key")
+
+    def __init__(self, values: Dict[Tuple[str, ...], float], key: Tuple[str, ...]):
+        self._values, self._key = values, key
+
+    def set(self, value: float) -> None:
+        self._values[self._key] = value
+
+
+class LatestGauge:
+    """Last-value gauge whose ``set`` is a plain dict write, exported at scrape time.
+
+    Children are created once per label set and cached, so the hot path skips
+    prometheus_client's label validation and per-child lock. With METRICS_TOP_K,
+    label sets with a ``symbol`` label are exported only for the top-K symbols.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames, registry=REGISTRY):
+        self.name, self.documentation, self.labelnames = name, documentation, list(labelnames)
+        self._sym = self.labelnames.index("symbol") if "symbol" in self.labelnames else None
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._children: Dict[Tuple[str, ...], _LatestChild] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values, **kwargs) -> _LatestChild:
+        key = values or tuple(kwargs[n] for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = _LatestChild(self._values, tuple(str(v) for v in key))
+        return child
+
+    def get(self, *values) -> Optional[float]:
+        return self._values.get(tuple(str(v) for v in values))
+
+    def describe(self):
+        return [GaugeMetricFamily(self.name, self.documentation, labels=self.labelnames)]
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        top = top_symbols() if self._sym is not None else None
+        for key, value in list(self._values.items()):
+            if top is None or key[self._sym] in top:
+                family.add_metric(key, value)
+        yield family
+
+
+def top_symbols(k: Optional[int] = None) -> Optional[Set[str]]:
+    """Symbols with the highest last spread (any direction, top of book or VWAP).
+
+    None means no limit.
+    """
+    k = settings.METRICS_TOP_K if k is None else k
+    if k <= 0:
+        return None
+    best: Dict[str, float] = {}
+    for gauge in (last_diff_pct, last_vwap_diff_pct):
+        for key, value in list(gauge._values.items()):
+            sym = key[gauge._sym]
+            if value > best.get(sym, float("-inf")):  # NaN compares False
+                best[sym] = value
+    return set(heapq.nlargest(k, best, key=best.__getitem__))
+
+
+class _Sampled:
+    __slots__ = ("_child", "_every", "_n")
+
+    def __init__(self, child, every: float):
+        # inf: never observe (rate 0)
+        self._child, self._every, self._n = child, every, 0
+
+    def observe(self, value: float) -> None:
+        self._n += 1
+        if self._n >= self._every:
+            self._n = 0
+            self._child.observe(value)
+
+
+def sampled(child, rate: Optional[float] = None):
+    """Histogram child that records every 1/``rate``-th observation (METRICS_LATENCY_SAMPLE_RATE).
+
+    Deterministic rather than random: no RNG call on the hot path, and counts
+    scale back up by exactly 1/rate.
+    """
+    rate = settings.METRICS_LATENCY_SAMPLE_RATE if rate is None else rate
+    if rate >= 1:
+        return child
+    return _Sampled(child, round(1 / rate) if rate > 0 else float("inf"))
 
 requests_total = Counter(
     "requests_total", "Total HTTP requests to exchanges", ["exchange", "outcome"]
@@ -12,6 +109,24 @@ alerts_sent_total = Counter(
     "alerts_sent_total", "Total arbitrage alerts sent", ["symbol", "direction"]
 )
 
+alert_delivery_latency_seconds = Histogram(
+    "alert_delivery_latency_seconds", "Time from opportunity detection to bot API delivery",
+    ["channel"], buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+alert_queue_dropped_total = Counter(
+    "alert_queue_dropped_total", "Alerts dropped because the outbound queue was full", ["channel"]
+)
+
+alert_queue_depth = Gauge(
+    "alert_queue_depth", "Alerts waiting in the outbound queue", ["channel"]
+)
+
+alert_queue_age_seconds = Histogram(
+    "alert_queue_age_seconds", "Time an alert spent queued before a dispatcher picked it up",
+    ["channel"], buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
 opportunities_found_total = Counter(
     "opportunities_found_total", "Arbitrage opportunities evaluated as >= threshold", ["symbol", "direction"]
 )
@@ -20,9 +135,118 @@ http_client_latency_seconds = Histogram(
     "http_client_latency_seconds", "HTTP client latency", ["exchange"]
 )
 
-last_diff_pct = Gauge(
+fetch_deadline_misses_total = Counter(
+    "fetch_deadline_misses_total", "Fetches abandoned because their cycle deadline passed",
+    ["exchange"]
+)
+hedged_requests_total = Counter(
+    # winner: primary | hedge
+    "hedged_requests_total", "Hedged requests by which copy answered first", ["exchange", "winner"]
+)
+
+snapshot_skew_seconds = Histogram(
+    "snapshot_skew_seconds", "Spread between earliest and latest snapshot ts in one fetch cycle",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+symbol_evaluations_total = Counter(
+    # outcome: evaluated | skipped
+    "symbol_evaluations_total", "Per-symbol evaluation decisions", ["outcome"]
+)
+
+evaluation_skip_ratio = Gauge(
+    "evaluation_skip_ratio", "Share of symbols skipped in the last cycle because no quote changed"
+)
+
+last_diff_pct = LatestGauge(
     "last_diff_pct", "Last observed percentage difference", ["symbol", "direction"]
 )
 
-last_bid = Gauge("last_bid", "Last best bid", ["exchange", "symbol"])
-last_ask = Gauge("last_ask", "Last best ask", ["exchange", "symbol"])
+last_vwap_diff_pct = LatestGauge(
+    "last_vwap_diff_pct", "Last executable VWAP percentage difference at a notional size",
+    ["symbol", "direction", "notional"],
+)
+
+last_bid = LatestGauge("last_bid", "Last best bid", ["exchange", "symbol"])
+last_ask = LatestGauge("last_ask", "Last best ask", ["exchange", "symbol"])
+
+stream_messages_total = Counter(
+    "stream_messages_total", "Websocket market-data messages received", ["exchange"]
+)
+stream_reconnects_total = Counter(
+    "stream_reconnects_total", "Websocket market-data reconnects", ["exchange"]
+)
+stream_top_changes_total = Counter(
+    "stream_top_changes_total", "Top-of-book changes seen on the stream", ["exchange"]
+)
+
+db_buffer_rows = Gauge(
+    "db_buffer_rows", "Rows buffered in memory waiting for the next DB flush", ["table"]
+)
+db_rows_total = Counter(
+    # outcome: written | failed | dropped | rejected
+    "db_rows_total", "Buffered DB rows by outcome", ["table", "outcome"]
+)
+db_flush_latency_seconds = Histogram(
+    "db_flush_latency_seconds", "Time to write one buffered batch to the database"
+)
+
+db_dimension_cache_total = Counter(
+    "db_dimension_cache_total", "Exchange/pair id lookups served from the in-process cache",
+    ["table", "outcome"]
+)
+
+poll_interval_seconds = LatestGauge(
+    "poll_interval_seconds", "Current adaptive polling interval per symbol", ["symbol"]
+)
+worker_tick_overruns_total = Counter(
+    "worker_tick_overruns_total", "Worker ticks that started late because the previous one overran"
+)
+
+fanout_subscribers = Gauge(
+    "fanout_subscribers", "Connected /ws and /stream subscribers"
+)
+fanout_dropped_total = Counter(
+    "fanout_dropped_total", "Frames dropped from slow subscribers' buffers (oldest first)"
+)
+
+bus_published_total = Counter(
+    "bus_published_total", "Entries published to the worker bus", ["stream"]
+)
+bus_consumed_total = Counter(
+    "bus_consumed_total", "Entries read from the worker bus", ["stream"]
+)
+
+
+class ExchangeMetrics:
+    """One exchange's request/quote metric children, bound once instead of per request."""
+
+    def __init__(self, exchange: str):
+        self.exchange = exchange
+        self.success = requests_total.labels(exchange=exchange, outcome="success")
+        self.http_error = requests_total.labels(exchange=exchange, outcome="http_error")
+        self.exception = requests_total.labels(exchange=exchange, outcome="exception")
+        self.errors = fetch_errors_total.labels(exchange=exchange)
+        self.latency = sampled(http_client_latency_seconds.labels(exchange=exchange))
+        self._quotes: Dict[str, Tuple[_LatestChild, _LatestChild]] = {}
+
+    def failed(self, outcome: str) -> None:
+        getattr(self, outcome).inc()
+        self.errors.inc()
+
+    def quote(self, symbol: str, bid: float, ask: float) -> None:
+        children = self._quotes.get(symbol)
+        if children is None:
+            children = self._quotes[symbol] = (
+                last_bid.labels(self.exchange, symbol), last_ask.labels(self.exchange, symbol)
+            )
+        if bid == bid:
+            children[0].set(bid)
+        if ask == ask:
+            children[1].set(ask)
+
+stage_latency_seconds = Histogram(
+    "stage_latency_seconds", "Time spent in one pipeline stage (src.utils.tracing spans)",
+    ["stage", "exchange"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import asyncio, heapq, itertools, time
+from typing import List, Optional, Tuple
+from ..domain.models import ArbOpportunity
+from ..metrics import alert_queue_depth, alert_queue_age_seconds, alert_queue_dropped_total, sampled
+
+
+class AlertQueue:
+    """Bounded priority queue of opportunities, highest ``diff_pct`` first.
+
+    ``put_nowait`` never blocks: when the queue is full the weakest alert (the
+    queued one or the incoming one) is dropped. ``put`` waits for room instead.
+    """
+
+    def __init__(self, maxsize: int, channel: str = "default"):
+        self.maxsize = max(1, int(maxsize))
+        self.channel = channel
+        # (-pct, seq, enqueued_at, opp)
+        self._heap: List[Tuple[float, int, float, ArbOpportunity]] = []
+        self._seq = itertools.count()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._depth = alert_queue_depth.labels(channel=channel)
+        self._age = sampled(alert_queue_age_seconds.labels(channel=channel))
+        self._dropped = alert_queue_dropped_total.labels(channel=channel)
+
+    def qsize(self) -> int:
+        return len(self._heap)
+
+    def empty(self) -> bool:
+        return not self._heap
+
+    def _changed(self) -> None:
+        self._depth.set(len(self._heap))
+        if self._heap:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+        if len(self._heap) < self.maxsize:
+            self._not_full.set()
+        else:
+            self._not_full.clear()
+
+    def put_nowait(self, opp: ArbOpportunity) -> Optional[ArbOpportunity]:
+        """Enqueue; return whichever alert was dropped to make room, if any."""
+        item = (-opp.diff_pct, next(self._seq), time.monotonic(), opp)
+        dropped = None
+        if len(self._heap) < self.maxsize:
+            heapq.heappush(self._heap, item)
+        else:
+            weakest = max(range(len(self._heap)), key=lambda k: self._heap[k][:2])
+            if self._heap[weakest][:2] > item[:2]:
+                dropped = self._heap[weakest][3]
+                self._heap[weakest] = item
+                heapq.heapify(self._heap)
+            else:
+                dropped = opp
+            self._dropped.inc()
+        self._changed()
+        return dropped
+
+    async def put(self, opp: ArbOpportunity) -> None:
+        while len(self._heap) >= self.maxsize:
+            await self._not_full.wait()
+        self.put_nowait(opp)
+
+    def get_entry_nowait(self) -> Tuple[ArbOpportunity, float]:
+        """(opportunity, monotonic time it was submitted), i.e. when it was detected."""
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        _, _, enqueued_at, opp = heapq.heappop(self._heap)
+        self._age.observe(time.monotonic() - enqueued_at)
+        self._changed()
+        return opp, enqueued_at
+
+    async def get_entry(self) -> Tuple[ArbOpportunity, float]:
+        while not self._heap:
+            await self._not_empty.wait()
+        return self.get_entry_nowait()
+
+    def get_nowait(self) -> ArbOpportunity:
+        return self.get_entry_nowait()[0]
+
+    async def get(self) -> ArbOpportunity:
+        return (await self.get_entry())[0]
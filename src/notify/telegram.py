@@ -1,16 +1,51 @@
 # src/notify/telegram.py
 from __future__ import annotations
-from typing import Optional, Iterable, List, Union
+from typing import Optional, Iterable, List, Tuple, Union
 from ..domain.models import ArbOpportunity
-from ..metrics import alerts_sent_total
+from ..exchanges.common import TokenBucket
+from ..metrics import alerts_sent_total, alert_delivery_latency_seconds
+from ..utils.tracing import span
+from .queue import AlertQueue
 from ..config import settings
 import asyncio
+import json
 import logging
-from telegram import Bot
+import time
 import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive connection pool shared by every bot channel
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.ALERT_HTTP_POOL_SIZE, keepalive_timeout=60
+            ),
+            timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT_SECONDS),
+        )
+    return _session
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _retry_after(body: str, header: Optional[str]) -> float:
+    # a 429 body carries {"parameters": {"retry_after": seconds}}; fall back to the header
+    try:
+        return float(json.loads(body)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(header)
+    except (TypeError, ValueError):
+        return 1.0
+
 def _normalize_chat_ids(raw):
     if not raw:
         return []
@@ -28,112 +63,201 @@ def _normalize_chat_ids(raw):
     except Exception:
         return [str(x) for x in raw]
 
-class TelegramNotifier:
-    """Handles sending messages and arbitrage alerts via Telegram bot."""
-    def __init__(self):
-        self.token = settings.TELEGRAM_TOKEN
-        raw_ids = settings.TELEGRAM_CHAT_ID
-        self.chat_ids: List[Union[int, str]] = _normalize_chat_ids(raw_ids)
-        self._bot: Optional[Bot] = Bot(token=self.token) if self.token else None
-        self._bale_notifier = BaleNotifier()
+def _net_line(opp: ArbOpportunity) -> str:
+    if opp.net_pct is None:
+        return ""
+    usd = f" (~${opp.est_profit_usd:,.2f})" if opp.est_profit_usd is not None else ""
+    return f"Net: {opp.net_pct:.2f}%{usd}\n"
 
-    async def _send_one(self, chat_id, text: str) -> None:
-        if not self._bot:
-            return
-        await self._bot.send_message(chat_id=chat_id, text=text, disable_web_page_preview=True)
+def format_opportunity(opp: ArbOpportunity) -> str:
+    return (
+        f"Pair: {opp.symbol}\n"
+        f"Buy from: {opp.buy_from} @ {opp.buy_price:.4f}\n"
+        f"Sell to: {opp.sell_to} @ {opp.sell_price:.4f}\n"
+        f"Spread: {opp.diff_abs:.4f} ({opp.diff_pct:.2f}%)\n"
+        + (f"Size: {opp.qty:.6f} (max {opp.max_qty:.6f})\n" if opp.qty is not None else "")
+        + _net_line(opp)
+        + (f"Route: {opp.route}\n" if opp.route else "")
+        + f"Time: {opp.ts.isoformat()}"
+    )
 
-    async def send(self, opp: ArbOpportunity) -> None:
-        text = (
-            "Arbitrage Opportunity\n"
-            f"Pair: {opp.symbol}\n"
-            f"Buy from: {opp.buy_from} @ {opp.buy_price:.4f}\n"
-            f"Sell to: {opp.sell_to} @ {opp.sell_price:.4f}\n"
-            f"Spread: {opp.diff_abs:.4f} ({opp.diff_pct:.2f}%)\n"
-            f"Time: {opp.ts.isoformat()}"
-        )
-        
-        # Send to Telegram
-        if self._bot and self.chat_ids:
-            try:
-                await asyncio.gather(*[self._send_one(cid, text) for cid in self.chat_ids], return_exceptions=True)
-                logger.info(f"✅ Telegram alert sent for {opp.symbol}")
-            except Exception as e:
-                logger.error(f"❌ Failed to send Telegram alert: {e}", exc_info=True)
-        
-        # Send to Bale
-        try:
-            await self._bale_notifier.send(opp)
-        except Exception as e:
-            logger.error(f"❌ Failed to send Bale alert: {e}", exc_info=True)
-        
-        # Update metrics
-        direction = f"{opp.buy_from}_to_{opp.sell_to}"
-        alerts_sent_total.labels(symbol=opp.symbol, direction=direction).inc()
+def format_batch(opps: List[ArbOpportunity]) -> str:
+    if len(opps) == 1:
+        return "Arbitrage Opportunity\n" + format_opportunity(opps[0])
+    body = "\n\n".join(format_opportunity(o) for o in opps)
+    return f"Arbitrage Opportunities ({len(opps)})\n\n" + body
 
-    async def send_text(self, text: str) -> None:
-        # Send to Telegram
-        if self._bot and self.chat_ids:
-            try:
-                await asyncio.gather(*[self._send_one(cid, text) for cid in self.chat_ids], return_exceptions=True)
-                logger.info("✅ Telegram test message sent")
-            except Exception as e:
-                logger.error(f"❌ Failed to send Telegram test message: {e}", exc_info=True)
-        
-        # Send to Bale
-        try:
-            await self._bale_notifier.send_text(text)
-        except Exception as e:
-            logger.error(f"❌ Failed to send Bale test message: {e}", exc_info=True)
 
+class BotChannel:
+    """Bot API sender with per-chat pacing and a bounded outbound queue.
 
-class BaleNotifier:
-    """Handles sending messages and arbitrage alerts via Bale bot."""
-    def __init__(self):
-        self.token = settings.BALE_TOKEN
-        raw_ids = settings.BALE_CHAT_ID
+    ``submit`` only enqueues and never blocks the caller; a pool of dispatcher
+    tasks drains the queue (best ``diff_pct`` first) and coalesces whatever
+    piled up during a burst into a single message.
+    """
+    name = "bot"
+    base_url = ""
+    max_send_attempts = 3   # per chat and message; only 429s are retried
+
+    def __init__(self, token: Optional[str], raw_ids):
+        self.token = token
         self.chat_ids: List[Union[int, str]] = _normalize_chat_ids(raw_ids)
-        self.base_url = "https://tapi.bale.ai/bot"
+        self._chat_limiters = {
+            cid: TokenBucket(settings.ALERT_CHAT_RATE_PER_SEC, 1) for cid in self.chat_ids
+        }
+        self._global_limiter = TokenBucket(
+            settings.ALERT_GLOBAL_RATE_PER_SEC, max(1, int(settings.ALERT_GLOBAL_RATE_PER_SEC))
+        )
+        self._queue: Optional[AlertQueue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token and self.chat_ids)
 
     async def _send_one(self, chat_id, text: str) -> None:
+        """Deliver ``text`` to one chat; raises unless the API answered 200."""
         if not self.token:
             return
-        
         url = f"{self.base_url}{self.token}/sendMessage"
         data = {
             "chat_id": chat_id,
             "text": text,
             "disable_web_page_preview": True
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data) as response:
-                if response.status != 200:
-                    logger.error(f"Bale API error: {response.status} - {await response.text()}")
+        limiter = self._chat_limiters.get(chat_id)
+        for attempt in range(1, self.max_send_attempts + 1):
+            if limiter:
+                await limiter.acquire()
+            await self._global_limiter.acquire()
+            async with get_http_session().post(url, json=data) as response:
+                if response.status == 200:
+                    return
+                status, body = response.status, await response.text()
+                header = response.headers.get("Retry-After")
+            if status != 429 or attempt == self.max_send_attempts:
+                raise RuntimeError(f"{self.name} API error: {status} - {body}")
+            wait = _retry_after(body, header)
+            logger.warning(f"{self.name} rate limited for chat {chat_id}, retrying in {wait:g}s")
+            await asyncio.sleep(wait)
 
-    async def send(self, opp: ArbOpportunity) -> None:
-        if not (self.token and self.chat_ids):
-            return
-        text = (
-            "Arbitrage Opportunity\n"
-            f"Pair: {opp.symbol}\n"
-            f"Buy from: {opp.buy_from} @ {opp.buy_price:.4f}\n"
-            f"Sell to: {opp.sell_to} @ {opp.sell_price:.4f}\n"
-            f"Spread: {opp.diff_abs:.4f} ({opp.diff_pct:.2f}%)\n"
-            f"Time: {opp.ts.isoformat()}"
+    async def _broadcast(self, text: str) -> int:
+        """Send ``text`` to every chat; return how many got it. Failed chats are logged."""
+        results = await asyncio.gather(
+            *[self._send_one(cid, text) for cid in self.chat_ids], return_exceptions=True
         )
-        try:
-            await asyncio.gather(*[self._send_one(cid, text) for cid in self.chat_ids], return_exceptions=True)
-            direction = f"{opp.buy_from}_to_{opp.sell_to}"
-            alerts_sent_total.labels(symbol=opp.symbol, direction=direction).inc()
-            logger.info(f"✅ Bale alert sent for {opp.symbol}")
-        except Exception as e:
-            logger.error(f"❌ Failed to send Bale alert: {e}", exc_info=True)
+        failed = 0
+        for cid, result in zip(self.chat_ids, results):
+            if isinstance(result, BaseException):
+                failed += 1
+                logger.error(f"❌ {self.name} send to chat {cid} failed: {result!r}")
+        return len(results) - failed
+
+    def _ensure_dispatchers(self) -> AlertQueue:
+        if self._queue is None:
+            self._queue = AlertQueue(settings.ALERT_QUEUE_SIZE, channel=self.name)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < max(1, settings.ALERT_DISPATCHERS):
+            self._tasks.append(asyncio.create_task(self._deliver_loop()))
+        return self._queue
+
+    def submit(self, opp: ArbOpportunity) -> None:
+        if not self.enabled:
+            return
+        dropped = self._ensure_dispatchers().put_nowait(opp)
+        if dropped is not None:
+            logger.warning(f"{self.name} outbound queue full, dropped alert for {dropped.symbol}")
+
+    async def send(self, opp: ArbOpportunity) -> None:
+        self.submit(opp)
+
+    async def _next_batch(self) -> List[Tuple[ArbOpportunity, float]]:
+        # (opportunity, monotonic submit time) pairs
+        queue = self._queue
+        batch = [await queue.get_entry()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ALERT_COALESCE_WINDOW_SECONDS
+        while len(batch) < settings.ALERT_COALESCE_MAX:
+            if not queue.empty():
+                batch.append(queue.get_entry_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get_entry(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _deliver_loop(self) -> None:
+        while True:
+            entries = await self._next_batch()
+            batch = [opp for opp, _ in entries]
+            symbols = ", ".join(o.symbol for o in batch)
+            try:
+                with span("delivery", self.name):
+                    delivered = await self._broadcast(format_batch(batch))
+            except Exception as e:
+                logger.error(f"❌ Failed to send {self.name} alert: {e}", exc_info=True)
+                continue
+            if not delivered:
+                logger.error(f"❌ Failed to send {self.name} alert for {symbols} to any chat")
+                continue
+            logger.info(f"✅ {self.name} alert sent for {symbols} "
+                        f"({delivered}/{len(self.chat_ids)} chats)")
+            # from submit (detection), not opp.ts, which is when the buy leg's quote was fetched
+            delivered_at = time.monotonic()
+            latency = alert_delivery_latency_seconds.labels(channel=self.name)
+            for opp, submitted_at in entries:
+                latency.observe(delivered_at - submitted_at)
+                direction = f"{opp.buy_from}_to_{opp.sell_to}"
+                alerts_sent_total.labels(symbol=opp.symbol, direction=direction).inc()
 
     async def send_text(self, text: str) -> None:
-        if not (self.token and self.chat_ids):
+        if not self.enabled:
             return
-        try:
-            await asyncio.gather(*[self._send_one(cid, text) for cid in self.chat_ids], return_exceptions=True)
-            logger.info("✅ Bale test message sent")
-        except Exception as e:
-            logger.error(f"❌ Failed to send Bale test message: {e}", exc_info=True)
+        if await self._broadcast(text):
+            logger.info(f"✅ {self.name} test message sent")
+        else:
+            logger.error(f"❌ Failed to send {self.name} test message to any chat")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+class TelegramNotifier(BotChannel):
+    """Handles sending messages and arbitrage alerts via Telegram bot.
+
+    Also sends through Bale when it is configured.
+    """
+    name = "telegram"
+    base_url = "https://api.telegram.org/bot"
+
+    def __init__(self):
+        super().__init__(settings.TELEGRAM_TOKEN, settings.TELEGRAM_CHAT_ID)
+        self._bale_notifier = BaleNotifier()
+
+    def submit(self, opp: ArbOpportunity) -> None:
+        super().submit(opp)
+        self._bale_notifier.submit(opp)
+
+    async def send_text(self, text: str) -> None:
+        await super().send_text(text)
+        await self._bale_notifier.send_text(text)
+
+    async def close(self) -> None:
+        await super().close()
+        await self._bale_notifier.close()
+        await close_http_session()
+
+
+class BaleNotifier(BotChannel):
+    """Handles sending messages and arbitrage alerts via Bale bot."""
+    name = "bale"
+    base_url = "https://tapi.bale.ai/bot"
+
+    def __init__(self):
+        super().__init__(settings.BALE_TOKEN, settings.BALE_CHAT_ID)
@@ -1,37 +1,58 @@
-from fastapi import FastAPI
-from starlette.responses import Response
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from collections import deque
+from typing import Any, Dict
 import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
 
 from ..config import settings
-from ..adapters.nobitex import NobitexClient
-from ..adapters.wallex import WallexClient
-from ..domain.arbitrage_engine import ArbEngine
-from ..notify.telegram import TelegramNotifier
-from ..domain.models import PriceSnapshot
+from ..domain.history import QuoteHistory
+from .fanout import Broadcaster
+from ..worker.bus import (
+    OPPORTUNITIES, SNAPSHOTS, decode_opportunity, decode_snapshot, encode, make_bus,
+)
+from ..worker.loop import build_worker
+from ..utils.profiler import profile
 
-app = FastAPI(title="Arbitrage Notifier", version="1.0.0")
+logger = logging.getLogger(__name__)
 
-engine = ArbEngine(settings.THRESHOLD_PERCENT, settings.COOLDOWN_SECONDS, settings.HYSTERESIS_DELTA_PCT)
-notifier = TelegramNotifier()
+app = FastAPI(title="Arbitrage Notifier", version="1.0.0")
 
-state = {"latest": {}}
+# read-only view of what the workers publish on the bus
+state: Dict[str, Any] = {
+    "latest": {},
+    "opportunities": deque(maxlen=500),
+    "history": QuoteHistory(settings.HISTORY_CAPACITY, settings.HISTORY_WINDOW_SECONDS),
+    "started_at": time.time(),
+    "fanout": Broadcaster(settings.FANOUT_BUFFER_SIZE),
+}
 
 @app.on_event("startup")
 async def startup():
-    app.state.nobitex = NobitexClient()
-    app.state.wallex = WallexClient()
+    app.state.bus = make_bus()
+    app.state.worker = None
     if settings.ENABLE_WORKER:
-        app.state.worker_task = asyncio.create_task(worker_loop())
+        # single-process mode: run this process's shard in-process on the same bus
+        app.state.worker = build_worker(bus=app.state.bus)
+        app.state.worker_task = asyncio.create_task(app.state.worker.run())
+    app.state.aggregator_task = asyncio.create_task(aggregate(app.state.bus))
 
 @app.on_event("shutdown")
 async def shutdown():
-    task = getattr(app.state, "worker_task", None)
-    if task:
-        task.cancel()
+    for name in ("aggregator_task", "worker_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
     try:
-        await app.state.nobitex.close()
-        await app.state.wallex.close()
+        if app.state.worker:
+            await app.state.worker.close()  # also closes the shared bus
+        else:
+            await app.state.bus.close()
     except Exception:
         pass
 
@@ -44,25 +65,149 @@ def metrics():
     data = generate_latest()
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
 
-async def worker_loop():
-    nb = app.state.nobitex
-    wx = app.state.wallex
-    symbols = settings.symbols_list
+# handlers reading worker state are async so they run on the loop,
+# never in the threadpool while the aggregator is mid-update
+
+@app.get("/latest")
+async def latest():
+    return {
+        sym: {ex: encode(snap) for ex, snap in per_ex.items()}
+        for sym, per_ex in state["latest"].items()
+    }
+
+@app.get("/opportunities")
+def opportunities(limit: int = 50):
+    recent = list(state["opportunities"])[-limit:]
+    return [encode(opp) for opp in reversed(recent)]
+
+def _floats(values: np.ndarray) -> list:
+    # JSON has no NaN
+    return [None if v != v else v for v in values.tolist()]
+
+@app.get("/status")
+async def status():
+    """Per exchange and symbol: last quote, its age and how many quotes the history window holds."""
+    history = state["history"]
+    now = time.time()
+    since = now - history.window_seconds
+    symbols: dict = {}
+    for exchange, symbol, ring in history.rings():
+        ts, bid, ask = ring.latest()
+        symbols.setdefault(symbol, {})[exchange] = {
+            "bid": None if bid != bid else bid,
+            "ask": None if ask != ask else ask,
+            "ts": ts,
+            "age_seconds": now - ts,
+            "points": int(np.count_nonzero(ring.ts[:ring.size] >= since)),
+        }
+    return {
+        "uptime_seconds": now - state["started_at"],
+        "worker_enabled": settings.ENABLE_WORKER,
+        "history_window_seconds": history.window_seconds,
+        "opportunities": len(state["opportunities"]),
+        "symbols": symbols,
+    }
+
+@app.get("/history/{symbol:path}")
+async def history(symbol: str, seconds: float | None = None, points: int = 300):
+    """Columnar bid/ask/ts per exchange for ``symbol`` (BTC/USDT or BTC-USDT).
+
+    One row per time bucket, holding its last quote.
+    """
+    symbol = symbol.upper().replace("-", "/").replace("_", "/")
+    series = state["history"].query(symbol, time.time(), seconds, max(1, points))
+    if not series:
+        raise HTTPException(status_code=404, detail=f"no history for {symbol}")
+    return {
+        "symbol": symbol,
+        "exchanges": {
+            ex: {"ts": ts.tolist(), "bid": _floats(bid), "ask": _floats(ask)}
+            for ex, (ts, bid, ask) in series.items()
+        },
+    }
+
+def _symbols(raw: str | None):
+    if not raw:
+        return None
+    return [s.strip().upper().replace("-", "/") for s in raw.split(",") if s.strip()]
+
+@app.websocket("/ws")
+async def ws_stream(websocket: WebSocket, symbols: str | None = None):
+    """Quote and opportunity events as JSON text frames; ``symbols`` filters (comma-separated)."""
+    await websocket.accept()
+    fanout = state["fanout"]
+    sub = fanout.subscribe(_symbols(symbols))
+
+    async def pump():
+        while True:
+            for frame in await sub.get():
+                await websocket.send_text(frame.text)
+
+    sender = asyncio.create_task(pump())
+    try:
+        # reading is how a close is noticed even while no frames flow; client messages are ignored
+        while True:
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        sender.cancel()
+        fanout.unsubscribe(sub)
+
+@app.get("/stream")
+async def sse_stream(symbols: str | None = None):
+    """The /ws events as Server-Sent Events."""
+    fanout = state["fanout"]
+    sub = fanout.subscribe(_symbols(symbols))
+
+    async def events():
+        try:
+            while True:
+                for frame in await sub.get():
+                    yield frame.sse
+        finally:
+            fanout.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(seconds: float = 10.0, interval_ms: float = 5.0):
+    """Sampled stacks of the event loop (and so the in-process worker).
+
+    Returned in collapsed-stack format.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404)
+    seconds = min(max(seconds, 0.1), settings.PROFILER_MAX_SECONDS)
+    # handlers run on the loop thread; sample it from a helper thread while it keeps working
+    loop_thread = threading.get_ident()
+    try:
+        return await asyncio.to_thread(profile, loop_thread, seconds, max(interval_ms, 1.0) / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+def apply_entry(stream: str, payload: dict) -> None:
+    if stream == SNAPSHOTS:
+        snap = decode_snapshot(payload)
+        state["latest"].setdefault(snap.symbol, {})[snap.exchange] = snap
+        state["history"].append(snap.exchange, snap.symbol, snap.ts.timestamp(), snap.bid, snap.ask)
+        state["fanout"].publish("quote", snap.symbol, payload)
+    elif stream == OPPORTUNITIES:
+        opp = decode_opportunity(payload)
+        state["opportunities"].append(opp)
+        state["fanout"].publish("opportunity", opp.symbol, payload)
+
+async def aggregate(bus):
+    # start from whatever the bus still retains so a restarted API catches up
+    last_ids = {SNAPSHOTS: "0", OPPORTUNITIES: "0"}
     while True:
         try:
-            nb_data = await nb.fetch_ticker(symbols)
-            wx_data = await wx.fetch_ticker(symbols)
-            for sym in symbols:
-                a = nb_data.get(sym)
-                b = wx_data.get(sym)
-                if a:
-                    state["latest"].setdefault(sym, {})["nobitex"] = a
-                if b:
-                    state["latest"].setdefault(sym, {})["wallex"] = b
-                if a and b:
-                    for opp in (engine.evaluate(a, b), engine.evaluate(b, a)):
-                        if opp:
-                            await notifier.send(opp)
-        except Exception:
-            pass
-        await asyncio.sleep(settings.FETCH_INTERVAL_SECONDS)
+            for stream, entry_id, payload in await bus.read(last_ids, block_ms=1000):
+                last_ids[stream] = entry_id
+                apply_entry(stream, payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"bus read failed: {e}")
+            await asyncio.sleep(1.0)
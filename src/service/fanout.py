@@ -0,0 +1,107 @@
+"""Push quotes and opportunities to many WebSocket/SSE subscribers.
+
+An event is serialized once into a Frame. Every subscriber gets that same
+object, and the text and SSE forms are derived from its bytes at most once.
+Each subscriber has a bounded buffer that drops its oldest frames when the
+consumer falls behind, so a slow client never backs up the publisher.
+Symbol filters live in an index (symbol -> subscribers), so a publish
+touches only the subscribers that want that symbol.
+"""
+from __future__ import annotations
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+
+from ..metrics import fanout_dropped_total, fanout_subscribers
+from ..utils.decoding import dumps
+
+
+class Frame:
+    __slots__ = ("data", "_text", "_sse")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._text: Optional[str] = None
+        self._sse: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode()
+        return self._text
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = b"data: " + self.data + b"\n\n"
+        return self._sse
+
+
+class Subscriber:
+    def __init__(self, symbols: Optional[frozenset], maxlen: int):
+        self.symbols = symbols  # None = everything
+        self.buffer: Deque[Frame] = deque(maxlen=maxlen)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, frame: Frame) -> None:
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+            fanout_dropped_total.inc()
+        self.buffer.append(frame)  # the deque evicts the oldest
+        self._ready.set()
+
+    async def get(self) -> List[Frame]:
+        """Everything buffered, waiting for at least one frame."""
+        while not self.buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        frames = list(self.buffer)
+        self.buffer.clear()
+        return frames
+
+
+class Broadcaster:
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = int(buffer_size)
+        self._everything: Set[Subscriber] = set()
+        self._by_symbol: Dict[str, Set[Subscriber]] = {}
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None) -> Subscriber:
+        wanted = frozenset(symbols) if symbols else None
+        sub = Subscriber(wanted, self.buffer_size)
+        if wanted is None:
+            self._everything.add(sub)
+        else:
+            for sym in wanted:
+                self._by_symbol.setdefault(sym, set()).add(sub)
+        fanout_subscribers.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        if sub.symbols is None:
+            self._everything.discard(sub)
+        else:
+            for sym in sub.symbols:
+                subs = self._by_symbol.get(sym)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_symbol[sym]
+        fanout_subscribers.dec()
+
+    def publish(self, kind: str, symbol: str, payload: dict) -> int:
+        """Send ``payload`` (tagged with ``type``) to every interested subscriber.
+
+        Returns how many subscribers got it.
+        """
+        targeted = self._by_symbol.get(symbol)
+        if not self._everything and not targeted:
+            return 0  # nobody listening: don't even serialize
+        frame = Frame(dumps({"type": kind, **payload}))
+        for sub in self._everything:
+            sub.push(frame)
+        if targeted:
+            for sub in targeted:
+                sub.push(frame)
+        return len(self._everything) + (len(targeted) if targeted else 0)
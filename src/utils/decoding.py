@@ -0,0 +1,68 @@
+"""JSON through the fastest backend installed: msgspec, then orjson, then stdlib json.
+
+``loads`` decodes; ``dumps`` encodes to compact bytes with the same backend.
+
+``JSON_DECODER`` (auto|msgspec|orjson|json) pins a backend; a pinned backend that
+is not installed falls back to ``auto``.
+"""
+from __future__ import annotations
+import json
+from typing import Any, Callable, Dict, Optional, Type, Union
+
+from ..config import settings
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+def _backends() -> Dict[str, Callable[[Union[bytes, str]], Any]]:
+    out: Dict[str, Callable[[Union[bytes, str]], Any]] = {}
+    if msgspec is not None:
+        out["msgspec"] = msgspec.json.Decoder().decode
+    if orjson is not None:
+        out["orjson"] = orjson.loads
+    out["json"] = json.loads
+    return out
+
+
+def _encoders() -> Dict[str, Callable[[Any], bytes]]:
+    out: Dict[str, Callable[[Any], bytes]] = {}
+    if msgspec is not None:
+        out["msgspec"] = msgspec.json.Encoder().encode
+    if orjson is not None:
+        out["orjson"] = orjson.dumps
+    out["json"] = lambda obj: json.dumps(obj, separators=(",", ":")).encode()
+    return out
+
+
+BACKENDS = _backends()
+ENCODERS = _encoders()
+
+
+def resolve_backend(name: str = "auto") -> str:
+    if name in BACKENDS:
+        return name
+    return next(iter(BACKENDS))
+
+
+BACKEND = resolve_backend(settings.JSON_DECODER)
+loads: Callable[[Union[bytes, str]], Any] = BACKENDS[BACKEND]
+dumps: Callable[[Any], bytes] = ENCODERS[BACKEND]
+
+
+def typed_decoder(schema: Type) -> Optional[Callable[[bytes], Any]]:
+    """A msgspec decoder straight into ``schema``.
+
+    None when msgspec is unavailable or not the selected backend.
+    """
+    if BACKEND != "msgspec":
+        return None
+    return msgspec.json.Decoder(schema).decode
+
@@ -0,0 +1,51 @@
+"""Wall-clock sampling profiler for one thread, in collapsed-stack format.
+
+Each output line is ``frame;frame;...;leaf count``, which flamegraph.pl,
+speedscope and inferno read directly. Sampling runs in its own thread via
+``sys._current_frames``, so the profiled event loop keeps running untouched.
+"""
+from __future__ import annotations
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Counter
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample(thread_id: int, seconds: float, interval: float = 0.005) -> Counter[str]:
+    """Stack counts of ``thread_id`` sampled every ``interval`` for ``seconds``."""
+    counts: Counter[str] = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed(counts: Counter[str]) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+_busy = threading.Lock()
+
+
+def profile(thread_id: int, seconds: float, interval: float = 0.005) -> str:
+    """Collapsed stacks for ``thread_id``; raises RuntimeError if a profile is already running."""
+    if not _busy.acquire(blocking=False):
+        raise RuntimeError("a profile is already running")
+    try:
+        return collapsed(sample(thread_id, seconds, interval))
+    finally:
+        _busy.release()
@@ -0,0 +1,81 @@
+"""Per-stage timing spans.
+
+    with span("decode", "nobitex"):
+        ...
+
+Every span lands in the ``stage_latency_seconds{stage, exchange}`` histogram
+(sampled like the other latency histograms). With OTEL_TRACING_ENABLED and the
+opentelemetry packages installed, each span is also an OpenTelemetry span, so
+stages nest under the worker's ``cycle`` span in a trace backend.
+
+Stages: rate_limit, network, retry_wait, decode, evaluate, notify_enqueue,
+delivery, and cycle around one worker fetch/evaluate pass.
+"""
+from __future__ import annotations
+import logging
+import time
+from typing import Dict, Tuple
+
+from ..config import settings
+from ..metrics import sampled, stage_latency_seconds
+
+logger = logging.getLogger(__name__)
+
+_children: Dict[Tuple[str, str], object] = {}
+_tracer = None
+
+
+def configure_tracing() -> bool:
+    """Turn on OpenTelemetry spans when enabled and installed; safe to call more than once."""
+    global _tracer
+    if not settings.OTEL_TRACING_ENABLED or _tracer is not None:
+        return _tracer is not None
+    try:
+        from opentelemetry import trace  # optional dependency
+    except ImportError:
+        logger.warning("OTEL_TRACING_ENABLED is set but opentelemetry is not installed")
+        return False
+    try:
+        # export over OTLP (OTEL_EXPORTER_OTLP_* env vars) unless the app already set a provider
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        if not isinstance(trace.get_tracer_provider(), TracerProvider):
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+    except ImportError:
+        pass  # API only: spans go to whatever provider the host configured
+    _tracer = trace.get_tracer("arbitrage")
+    return True
+
+
+def _child(stage: str, exchange: str):
+    child = _children.get((stage, exchange))
+    if child is None:
+        hist = stage_latency_seconds.labels(stage=stage, exchange=exchange)
+        child = _children[(stage, exchange)] = sampled(hist)
+    return child
+
+
+class span:
+    __slots__ = ("_hist", "_otel", "_start")
+
+    def __init__(self, stage: str, exchange: str = "all"):
+        self._hist = _child(stage, exchange)
+        self._otel = (
+            _tracer.start_as_current_span(stage, attributes={"exchange": exchange})
+            if _tracer is not None else None
+        )
+
+    def __enter__(self) -> "span":
+        if self._otel is not None:
+            self._otel.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._hist.observe(time.perf_counter() - self._start)
+        if self._otel is not None:
+            self._otel.__exit__(*exc)
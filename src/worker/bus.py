@@ -0,0 +1,187 @@
+"""Snapshot/opportunity bus between sharded workers and the API aggregator.
+
+``publish`` never blocks the caller (like ``BufferedWriter.add_*``): entries are
+handed to the backend directly in memory, or pipelined to Redis streams by a
+background task. Readers get ``(stream, entry_id, payload)`` tuples in order.
+"""
+from __future__ import annotations
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from dataclasses import fields
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..domain.models import ArbOpportunity, PriceSnapshot
+from ..metrics import bus_consumed_total, bus_published_total
+from ..utils.decoding import loads
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS = "snapshots"
+OPPORTUNITIES = "opportunities"
+
+Entry = Tuple[str, str, dict]  # (stream, entry id, payload)
+
+
+_FIELDS = {cls: tuple(f.name for f in fields(cls)) for cls in (PriceSnapshot, ArbOpportunity)}
+
+
+def encode(obj) -> dict:
+    """PriceSnapshot/ArbOpportunity → JSON-safe dict."""
+    d = {}
+    for k in _FIELDS[type(obj)]:
+        v = getattr(obj, k)
+        d[k] = None if v != v else v  # NaN travels as null
+    d["ts"] = obj.ts.isoformat()
+    return d
+
+
+def _decode(cls, payload: dict):
+    names = _FIELDS[cls]
+    kwargs = {k: v for k, v in payload.items() if k in names}
+    kwargs["ts"] = datetime.fromisoformat(kwargs["ts"])
+    for key in ("bid", "ask"):  # NaN travels as null
+        if key in names and kwargs.get(key) is None:
+            kwargs[key] = float("nan")
+    return cls(**kwargs)
+
+
+def decode_snapshot(payload: dict) -> PriceSnapshot:
+    return _decode(PriceSnapshot, payload)
+
+
+def decode_opportunity(payload: dict) -> ArbOpportunity:
+    return _decode(ArbOpportunity, payload)
+
+
+class MemoryBus:
+    """In-process bus: one bounded log per stream with consecutive integer ids."""
+
+    def __init__(self, maxlen: int = None):
+        self.maxlen = maxlen or settings.BUS_STREAM_MAXLEN
+        self._logs: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._seq: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+
+    def publish(self, stream: str, payload: dict) -> None:
+        seq = self._seq[stream] = self._seq.get(stream, 0) + 1
+        self._logs.setdefault(stream, deque(maxlen=self.maxlen)).append((seq, payload))
+        bus_published_total.labels(stream=stream).inc()
+        self._changed.set()
+
+    async def read(self, last_ids: Dict[str, str], block_ms: int = 1000,
+                   count: int = 1000) -> List[Entry]:
+        """Entries after ``last_ids[stream]`` ("0" = from the start).
+
+        Waits up to ``block_ms`` for any when none are there yet.
+        """
+        out = self._collect(last_ids, count)
+        if not out and block_ms:
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), block_ms / 1000)
+            except asyncio.TimeoutError:
+                return []
+            out = self._collect(last_ids, count)
+        for stream, _, _ in out:
+            bus_consumed_total.labels(stream=stream).inc()
+        return out
+
+    def _collect(self, last_ids: Dict[str, str], count: int) -> List[Entry]:
+        out: List[Entry] = []
+        for stream, last in last_ids.items():
+            log = self._logs.get(stream)
+            if not log:
+                continue
+            # ids are consecutive, so the first unread entry sits at a known offset
+            start = max(0, int(last) + 1 - log[0][0])
+            for seq, payload in itertools.islice(log, start, start + count - len(out)):
+                out.append((stream, str(seq), payload))
+            if len(out) >= count:
+                break
+        return out
+
+    def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisStreamBus:
+    """Redis streams backend: XADD (pipelined, approximately trimmed) and XREAD BLOCK."""
+
+    def __init__(self, url: str, maxlen: int = None, batch: int = 500):
+        import redis.asyncio as aioredis  # optional dependency, only needed with BUS_URL
+
+        self._redis = aioredis.from_url(url)
+        self.maxlen = maxlen or settings.BUS_STREAM_MAXLEN
+        self.batch = batch
+        self._pending: Deque[Tuple[str, dict]] = deque(maxlen=self.maxlen)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, stream: str, payload: dict) -> None:
+        self._pending.append((stream, payload))
+        self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            pipe = self._redis.pipeline(transaction=False)
+            sent: Dict[str, int] = {}
+            for _ in range(min(self.batch, len(self._pending))):
+                stream, payload = self._pending.popleft()
+                pipe.xadd(stream, {"data": json.dumps(payload)}, maxlen=self.maxlen,
+                          approximate=True)
+                sent[stream] = sent.get(stream, 0) + 1
+            await pipe.execute()
+            for stream, n in sent.items():
+                bus_published_total.labels(stream=stream).inc(n)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"bus publish failed: {e}")
+                await asyncio.sleep(1.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def read(self, last_ids: Dict[str, str], block_ms: int = 1000,
+                   count: int = 1000) -> List[Entry]:
+        streams = {s: ("0-0" if i == "0" else i) for s, i in last_ids.items()}
+        reply = await self._redis.xread(streams, count=count, block=block_ms or None)
+        out: List[Entry] = []
+        for stream, entries in reply or []:
+            stream = stream.decode() if isinstance(stream, bytes) else stream
+            for entry_id, data in entries:
+                entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                raw = data[b"data"] if b"data" in data else data["data"]
+                out.append((stream, entry_id, loads(raw)))
+            bus_consumed_total.labels(stream=stream).inc(len(entries))
+        return out
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            await self._redis.aclose()
+
+
+def make_bus(url: Optional[str] = None):
+    url = url if url is not None else settings.BUS_URL
+    if url:
+        return RedisStreamBus(url)
+    return MemoryBus()
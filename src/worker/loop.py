@@ -0,0 +1,352 @@
+"""Standalone fetch → evaluate → publish worker.
+
+Run one process per shard:
+    python -m src.worker.loop --shard 0 --shards 4
+Each worker polls only the symbols the hash ring gives its shard, alerts on
+them, and publishes snapshots and opportunities to the bus (BUS_URL) for the
+API to aggregate.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from ..config import settings
+from ..adapters.base import ExchangeAdapter
+from ..adapters.registry import build_clients
+from ..adapters.stream import BookStream
+from ..domain.arbitrage_engine import ArbEngine
+from ..domain.changes import ChangeTracker
+from ..domain.costs import CostModel
+from ..domain.models import ArbOpportunity, PriceSnapshot
+from ..domain.orderbook import OrderBook
+from ..domain.triangular import TriangularEngine
+from ..exchanges.common import fetch_batch, fetch_deadline, request_budget, use_bulk
+from ..exchanges.connections import ConnectionManager
+from ..metrics import evaluation_skip_ratio, symbol_evaluations_total, worker_tick_overruns_total
+from ..utils.tracing import configure_tracing, span
+from .bus import OPPORTUNITIES, SNAPSHOTS, encode, make_bus
+from .scheduler import PollScheduler
+from .sharding import shard_symbols
+
+logger = logging.getLogger(__name__)
+
+
+async def sleep_until_next_tick(prev_tick: float, period: float) -> float:
+    # fixed-rate ticks: a slow cycle eats into the sleep instead of stretching the period
+    loop = asyncio.get_running_loop()
+    next_tick = prev_tick + period
+    now = loop.time()
+    if next_tick < now:
+        worker_tick_overruns_total.inc()
+        next_tick = now  # skip the missed ticks rather than bursting to catch up
+    await asyncio.sleep(next_tick - now)
+    return next_tick
+
+
+class Worker:
+    """Polls ``symbols`` on every exchange client, evaluates them and fans results out.
+
+    Opportunities go to the notifier and every snapshot/opportunity to the bus
+    (and the DB writer / recorder when given); nothing here waits on their I/O.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        bus=None,
+        clients: Optional[Dict[str, ExchangeAdapter]] = None,
+        engine: Optional[ArbEngine] = None,
+        notifier=None,
+        db_writer=None,
+        recorder=None,
+        triangular: Optional[bool] = None,
+    ):
+        self.symbols = list(symbols)
+        self.bus = bus if bus is not None else make_bus()
+        # every venue draws from one set of per-host pools
+        self.connections = ConnectionManager() if clients is None else None
+        if clients is None:
+            clients = build_clients(settings.exchanges_list, self.connections)
+        self.clients = clients
+        self.engine = engine or ArbEngine(
+            settings.THRESHOLD_PERCENT, settings.COOLDOWN_SECONDS, settings.HYSTERESIS_DELTA_PCT,
+            notionals=settings.depth_notionals_list, costs=CostModel.from_settings(),
+        )
+        if notifier is None:
+            from ..notify.telegram import TelegramNotifier
+            notifier = TelegramNotifier()
+        self.notifier = notifier
+        self.db_writer = db_writer
+        self.recorder = recorder
+        self.triangular = TriangularEngine(
+            settings.THRESHOLD_PERCENT, settings.COOLDOWN_SECONDS, settings.HYSTERESIS_DELTA_PCT,
+            fees_pct=settings.taker_fees, transfer_fee_pct=settings.TRANSFER_FEE_PCT,
+            max_legs=settings.TRIANGULAR_MAX_LEGS,
+        ) if (settings.TRIANGULAR_ENABLED if triangular is None else triangular) else None
+        self.changes = ChangeTracker()
+        self.open_spreads: Set[str] = set()
+        self.latest: Dict[str, Dict[str, PriceSnapshot]] = {}
+        self.streams: Dict[str, BookStream] = {}
+        self.scheduler: Optional[PollScheduler] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def exchanges(self) -> List[str]:
+        return list(self.clients)
+
+    def latest_arrays(self, exchanges, symbols):
+        shape = (len(exchanges), len(symbols))
+        bid, ask, ts = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for m, sym in enumerate(symbols):
+            per_sym = self.latest.get(sym, {})
+            for i, ex in enumerate(exchanges):
+                snap = per_sym.get(ex)
+                if snap is not None:
+                    bid[i, m], ask[i, m], ts[i, m] = snap.bid, snap.ask, snap.ts.timestamp()
+        return bid, ask, ts
+
+    def depth_book(self, exchange: str, symbol: str) -> Optional[OrderBook]:
+        # a live stream's ladder is current; the REST book stops updating while the stream is live
+        stream = self.streams.get(exchange)
+        if stream is not None and stream.is_live():
+            book = stream.books.get(symbol)
+            if book is not None:
+                return book.to_orderbook(exchange, symbol)
+        return self.clients[exchange].books.get(symbol)
+
+    def evaluate_and_notify(self, exchanges, symbols) -> None:
+        with span("evaluate"):
+            if settings.DEPTH_EVAL_ENABLED:
+                opps = []
+                for sym in symbols:
+                    books = [self.depth_book(name, sym) for name in self.clients]
+                    books = [b for b in books if b is not None]
+                    opps += [
+                        self.engine.evaluate_depth(a, b) for a in books for b in books if a is not b
+                    ]
+            else:
+                arrays = self.latest_arrays(exchanges, symbols)
+                opps = self.engine.evaluate_batch(exchanges, symbols, *arrays)
+                self.open_spreads.difference_update(symbols)
+                self.open_spreads.update(self.engine.above_threshold)
+        for opp in opps:
+            if opp:
+                self.emit(opp)
+
+    def emit(self, opp: ArbOpportunity) -> None:
+        # hand off to the notifier's dispatchers; never wait on bot API I/O here
+        with span("notify_enqueue"):
+            self.notifier.submit(opp)
+        self.bus.publish(OPPORTUNITIES, encode(opp))
+        if self.db_writer:
+            self.db_writer.add_opportunity(opp)
+
+    def record(self, snap: PriceSnapshot) -> bool:
+        if self.recorder:
+            self.recorder.record(snap)
+        # always keep the fresh quote and its ts: the engine's cooldown clock runs on it
+        self.latest.setdefault(snap.symbol, {})[snap.exchange] = snap
+        if not self.changes.observe(snap):
+            return False
+        if self.engine.costs:
+            self.engine.costs.observe(snap)  # keeps quote-currency USD rates current
+        self.bus.publish(SNAPSHOTS, encode(snap))
+        if self.db_writer:
+            self.db_writer.add_tick(
+                snap.exchange, snap.symbol, snap.bid, snap.ask, snap.bid_size, snap.ask_size,
+                snap.ts,
+            )
+        if self.triangular:
+            # only cycles through this quote's edges can have changed
+            with span("evaluate", "triangular"):
+                opps = self.triangular.on_snapshot(snap)
+            for opp in opps:
+                self.emit(opp)
+        return True
+
+    def evaluate_changed(self, exchanges, symbols) -> None:
+        # depth mode can move below the top of book, so it always evaluates; otherwise
+        # unmoved symbols are skipped unless their spread is still open (its cooldown has
+        # to be able to expire and alert again)
+        if settings.DEPTH_EVAL_ENABLED:
+            dirty = symbols
+        else:
+            dirty = self.changes.dirty(exchanges, symbols)
+            if self.open_spreads:
+                moved = set(dirty)
+                dirty += [sym for sym in symbols if sym in self.open_spreads and sym not in moved]
+        skipped = len(symbols) - len(dirty)
+        symbol_evaluations_total.labels(outcome="evaluated").inc(len(dirty))
+        symbol_evaluations_total.labels(outcome="skipped").inc(skipped)
+        if symbols:
+            evaluation_skip_ratio.set(skipped / len(symbols))
+        if dirty:
+            self.changes.mark_evaluated(exchanges, dirty)
+            self.evaluate_and_notify(exchanges, dirty)
+
+    async def on_stream_top(self, snap: PriceSnapshot):
+        # streams only call in on a top-of-book move, so evaluate just that symbol
+        self.record(snap)
+        try:
+            self.evaluate_changed(self.exchanges, [snap.symbol])
+        except Exception:
+            pass
+
+    def start_streams(self) -> None:
+        for name in self.clients:
+            # <NAME>_WS_URL / <NAME>_WS_PROTOCOL, for the venues that have a stream
+            url = getattr(settings, f"{name.upper()}_WS_URL", None)
+            if url:
+                protocol = getattr(settings, f"{name.upper()}_WS_PROTOCOL", "replay")
+                self.streams[name] = BookStream(name, url, self.symbols, self.on_stream_top,
+                                                protocol)
+        self._tasks += [asyncio.create_task(st.run()) for st in self.streams.values()]
+
+    async def run_cycle(self, symbols: List[str]) -> None:
+        """One fetch → record → evaluate pass over every exchange without a live stream."""
+        streams = self.streams
+        polled = {
+            name: c for name, c in self.clients.items()
+            if not (name in streams and streams[name].is_live())
+        }
+        if polled:
+            with span("cycle"):
+                # a slow symbol must not hold the cycle while the other legs' quotes go stale
+                with fetch_deadline(settings.FETCH_DEADLINE_SECONDS):
+                    batch = await fetch_batch(polled, symbols)
+                for sym in symbols:
+                    for ex in polled:
+                        snap = batch.get(ex, sym)
+                        if snap:
+                            self.record(snap)
+                self.evaluate_changed(self.exchanges, symbols)
+        elif settings.DEPTH_EVAL_ENABLED:
+            # every leg streams; depth can still move below the top, which on_stream_top never sees
+            with span("cycle"):
+                self.evaluate_changed(self.exchanges, symbols)
+
+    async def run_fixed(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                await self.run_cycle(self.symbols)
+            except Exception:
+                pass
+            next_tick = await sleep_until_next_tick(next_tick, settings.FETCH_INTERVAL_SECONDS)
+
+    def pop_cycle(self, scheduler: PollScheduler, now: float) -> List[str]:
+        """The due symbols this cycle polls.
+
+        Bulk mode is decided on the due list, as fetch_ticker will: one bulk request
+        covers any number of symbols, otherwise each costs a request and only what the
+        limiters allow right now goes out; the rest stay due for the next tick.
+        """
+        due = scheduler.pop_due(now)
+        if not use_bulk(due):
+            budget = max(1, request_budget(self.clients))
+            scheduler.requeue(due[budget:], now)
+            due = due[:budget]
+        return due
+
+    async def run_adaptive(self) -> None:
+        self.scheduler = scheduler = PollScheduler(
+            self.symbols, settings.THRESHOLD_PERCENT,
+            settings.POLL_MIN_INTERVAL_SECONDS, settings.POLL_MAX_INTERVAL_SECONDS,
+        )
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            now = loop.time()
+            due = self.pop_cycle(scheduler, now)
+            try:
+                if due:
+                    await self.run_cycle(due)
+            except Exception:
+                pass
+            finally:
+                for sym in due:
+                    scheduler.observe(sym, self.latest.get(sym, {}))
+                    scheduler.schedule(sym, now)
+            next_tick = await sleep_until_next_tick(next_tick, settings.POLL_TICK_SECONDS)
+
+    async def run(self) -> None:
+        configure_tracing()
+        self.bus.start()
+        if self.db_writer:
+            self.db_writer.start()
+            # partitions must exist wherever ticks are written, API process or standalone shard
+            from ..DB.database import maintenance_loop
+            self._tasks.append(asyncio.create_task(maintenance_loop()))
+        if settings.STREAM_ENABLED:
+            self.start_streams()
+        if settings.ADAPTIVE_POLLING_ENABLED:
+            await self.run_adaptive()
+        else:
+            await self.run_fixed()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for client in self.clients.values():
+            await client.close()
+        if self.connections:
+            await self.connections.close()
+        await self.notifier.close()
+        if self.db_writer:
+            await self.db_writer.close()
+        if self.recorder:
+            self.recorder.close()
+        await self.bus.close()
+
+
+def build_worker(shard_index: int = None, shard_count: int = None, bus=None) -> Worker:
+    """Worker for one shard with the persistence the settings ask for."""
+    index = settings.WORKER_SHARD_INDEX if shard_index is None else shard_index
+    count = settings.WORKER_SHARD_COUNT if shard_count is None else shard_count
+    symbols = shard_symbols(settings.symbols_list, index, count)
+    db_writer = recorder = None
+    if settings.DB_PERSIST_ENABLED:
+        from ..DB.writer import BufferedWriter
+        db_writer = BufferedWriter()
+    if settings.RECORD_SNAPSHOTS_PATH:
+        from ..backtest.recorder import SnapshotRecorder
+        path = settings.RECORD_SNAPSHOTS_PATH
+        if count > 1:
+            path = f"{path}.{index}"
+        recorder = SnapshotRecorder(path)
+    logger.info(f"worker shard {index}/{count}: {len(symbols)} symbols")
+    triangular = settings.TRIANGULAR_ENABLED
+    if triangular and count > 1:
+        # a shard only sees its own markets, so cycles whose legs hash elsewhere would go unseen
+        logger.warning("TRIANGULAR_ENABLED needs every market in one worker; disabled with "
+                       f"WORKER_SHARD_COUNT={count}")
+        triangular = False
+    return Worker(symbols, bus=bus, db_writer=db_writer, recorder=recorder, triangular=triangular)
+
+
+async def run_worker(shard_index: int = None, shard_count: int = None) -> None:
+    worker = build_worker(shard_index, shard_count)
+    try:
+        await worker.run()
+    finally:
+        await worker.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Run one arbitrage worker shard")
+    p.add_argument("--shard", type=int, default=None,
+                   help="this worker's shard index (WORKER_SHARD_INDEX)")
+    p.add_argument("--shards", type=int, default=None,
+                   help="total number of shards (WORKER_SHARD_COUNT)")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    asyncio.run(run_worker(args.shard, args.shards))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Per-symbol adaptive polling schedule."""
+from __future__ import annotations
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ..domain.models import PriceSnapshot
+from ..metrics import poll_interval_seconds
+
+
+class PollScheduler:
+    """Min-heap of per-symbol due times with intervals that follow market activity.
+
+    After each poll a symbol gets a score in [0, 1]: the larger of how close its
+    best cross-exchange spread is to ``threshold_pct`` and how fast its mid moves
+    between polls (an EWMA of |Δmid| relative to ``vol_ref_pct``). The interval is
+    then interpolated geometrically from ``max_interval`` (score 0) down to
+    ``min_interval`` (score 1).
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        threshold_pct: float,
+        min_interval: float,
+        max_interval: float,
+        vol_ref_pct: Optional[float] = None,
+        alpha: float = 0.3,
+    ):
+        self.threshold_pct = threshold_pct
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.vol_ref_pct = vol_ref_pct or threshold_pct / 2
+        self.alpha = alpha
+        self._seq = itertools.count()
+        self._heap: List[Tuple[float, int, str]] = []
+        self.interval: Dict[str, float] = {}
+        self._mid: Dict[Tuple[str, str], float] = {}
+        self._vol: Dict[str, float] = {}
+        for sym in symbols:
+            # everything is due on the first tick
+            self.interval[sym] = min_interval
+            self._vol[sym] = 0.0
+            heapq.heappush(self._heap, (float("-inf"), next(self._seq), sym))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[str]:
+        """Remove and return symbols due at ``now``, most overdue first.
+
+        Each must be ``schedule``d again.
+        """
+        out: List[str] = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(out) < limit):
+            out.append(heapq.heappop(self._heap)[2])
+        return out
+
+    def requeue(self, symbols: Iterable[str], due: float) -> None:
+        """Put popped symbols back, still due at ``due``, without rescheduling them."""
+        for symbol in symbols:
+            heapq.heappush(self._heap, (due, next(self._seq), symbol))
+
+    def schedule(self, symbol: str, now: float) -> None:
+        heapq.heappush(self._heap, (now + self.interval[symbol], next(self._seq), symbol))
+
+    def score(self, symbol: str, quotes: Mapping[str, PriceSnapshot]) -> float:
+        snaps = [s for s in quotes.values() if s.bid == s.bid and s.ask == s.ask and s.ask > 0]
+        best_pct = max(
+            ((b.bid - a.ask) / a.ask * 100 for a in snaps for b in snaps if a is not b),
+            default=0.0,
+        )
+        moves = []
+        for s in snaps:
+            mid = (s.bid + s.ask) / 2
+            prev = self._mid.get((s.exchange, symbol))
+            if prev:
+                moves.append(abs(mid - prev) / prev * 100)
+            self._mid[(s.exchange, symbol)] = mid
+        if moves:
+            self._vol[symbol] = (1 - self.alpha) * self._vol[symbol] + self.alpha * max(moves)
+        proximity = best_pct / self.threshold_pct if self.threshold_pct > 0 else 1.0
+        activity = self._vol[symbol] / self.vol_ref_pct
+        return min(1.0, max(0.0, proximity, activity))
+
+    def observe(self, symbol: str, quotes: Mapping[str, PriceSnapshot]) -> float:
+        """Update ``symbol``'s interval from its latest quotes per exchange; return it."""
+        score = self.score(symbol, quotes)
+        interval = self.max_interval * (self.min_interval / self.max_interval) ** score
+        self.interval[symbol] = interval
+        poll_interval_seconds.labels(symbol=symbol).set(interval)
+        return interval
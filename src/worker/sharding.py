@@ -0,0 +1,43 @@
+"""Consistent hashing of symbols onto worker shards."""
+from __future__ import annotations
+import bisect
+import hashlib
+from typing import Iterable, List, Sequence
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Each node owns ``replicas`` points on a 64-bit ring.
+
+    A key belongs to the next point clockwise, so adding or removing a node
+    only moves the keys of its own arcs.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        points = sorted((_hash(f"{node}#{r}"), node) for node in nodes for r in range(replicas))
+        if not points:
+            raise ValueError("HashRing needs at least one node")
+        self._keys = [p[0] for p in points]
+        self._nodes = [p[1] for p in points]
+
+    def owner(self, key: str) -> str:
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[i]
+
+
+def shard_name(index: int) -> str:
+    return f"shard-{index}"
+
+
+def shard_symbols(symbols: Sequence[str], index: int, count: int) -> List[str]:
+    """Symbols owned by shard ``index`` of ``count``, in their configured order."""
+    if count <= 1:
+        return list(symbols)
+    if not 0 <= index < count:
+        raise ValueError(f"shard index {index} out of range for {count} shards")
+    ring = HashRing(shard_name(i) for i in range(count))
+    me = shard_name(index)
+    return [sym for sym in symbols if ring.owner(sym) == me]
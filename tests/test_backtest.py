@@ -0,0 +1,89 @@
+import numpy as np
+from datetime import datetime, timedelta, timezone
+
+from src.backtest.recorder import SnapshotRecorder, load_recording
+from src.backtest.replay import ReplayConfig, replay, sweep
+from src.domain.costs import CostModel
+from src.domain.models import PriceSnapshot
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _snap(ex, sym, bid, ask, sec):
+    return PriceSnapshot(exchange=ex, symbol=sym, bid=bid, ask=ask, ts=T0 + timedelta(seconds=sec))
+
+
+def _write(path):
+    rec = SnapshotRecorder(path, chunk_size=3)
+    # BTC: wallex bids 1% over nobitex's ask from t=0 to t=20; ETH stays flat
+    for sec in range(0, 30, 2):
+        rec.record(_snap("nobitex", "BTCUSDT", 99.0, 100.0, sec))
+        wallex_bid = 101.0 if sec <= 20 else 99.5
+        rec.record(_snap("wallex", "BTCUSDT", wallex_bid, wallex_bid + 0.5, sec + 0.1))
+        rec.record(_snap("wallex", "ETHUSDT", 10.0, 10.01, sec + 0.2))
+    rec.close()
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "snaps.bin")
+    _write(path)
+    records, exchanges, symbols = load_recording(path)
+    assert len(records) == 45
+    assert exchanges == ["nobitex", "wallex"]
+    assert symbols == ["BTCUSDT", "ETHUSDT"]
+    assert records["bid"][1] == 101.0
+
+
+def test_replay_respects_cooldown(tmp_path):
+    path = str(tmp_path / "snaps.bin")
+    _write(path)
+    records, exchanges, symbols = load_recording(path)
+
+    loose = replay(records, exchanges, symbols, ReplayConfig(0.5, 0.0, 0.0))
+    strict = replay(records, exchanges, symbols, ReplayConfig(0.5, 15.0, 10.0))
+    assert loose["alerts"] == 22  # every BTC update while the window is open
+    assert loose["mean_latency_s"] == 0.0
+    assert strict["alerts"] == 2  # first tick, then again once the cooldown expires
+    assert loose["missed_windows"] == strict["missed_windows"] == 0
+    assert replay(records, exchanges, symbols, ReplayConfig(2.0, 0.0, 0.0))["alerts"] == 0
+
+
+def test_replay_counts_late_and_missed_windows(tmp_path):
+    path = str(tmp_path / "snaps.bin")
+    _write(path)
+    records, exchanges, symbols = load_recording(path)
+    # a prior alert on the same direction keeps the whole BTC window in cooldown
+    warm = records.copy()
+    warm["ts"] += 100.0
+    both = np.concatenate([records, warm])
+    out = replay(both, exchanges, symbols, ReplayConfig(0.5, 200.0, 10.0))
+    assert out["alerts"] == 1
+    assert out["missed_windows"] == 1
+
+
+def test_replay_alerts_on_spreads_net_of_the_worker_costs(tmp_path, monkeypatch):
+    from src.config import settings
+    path = str(tmp_path / "snaps.bin")
+    _write(path)
+    records, exchanges, symbols = load_recording(path)
+    config = ReplayConfig(0.5, 0.0, 0.0)
+
+    gross = replay(records, exchanges, symbols, config, costs=CostModel())
+    net = replay(records, exchanges, symbols, config,
+                 costs=CostModel({"nobitex": 0.25, "wallex": 0.2}))
+    assert gross["alerts"] == net["alerts"] == 22
+    assert 0.5 < net["mean_spread_pct"] < gross["mean_spread_pct"] - 0.4
+    # by default the replay pays the fees the worker is configured with
+    monkeypatch.setattr(settings, "TAKER_FEES_PCT", "nobitex:0.3,wallex:0.3")
+    out = replay(records, exchanges, symbols, config)
+    assert out["alerts"] == 0 and out["missed_windows"] == 0
+
+
+def test_sweep_grid(tmp_path):
+    path = str(tmp_path / "snaps.bin")
+    _write(path)
+    rows = sweep(path, [0.5, 2.0], [0.0, 15.0], [0.0], processes=2)
+    assert len(rows) == 4
+    grid = {(r["threshold_pct"], r["cooldown_seconds"]) for r in rows}
+    assert grid == {(0.5, 0.0), (0.5, 15.0), (2.0, 0.0), (2.0, 15.0)}
+    assert max(rows, key=lambda r: r["alerts"])["alerts"] == 22
@@ -0,0 +1,12 @@
+from benchmarks.harness import bench, compare, make_report
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    fast = bench("noop", lambda: None, ops=1, rounds=2)
+    report = make_report([fast])
+    base = {"results": {"noop": {**report["results"]["noop"], "per_op_us": fast.per_op_us / 2}}}
+    [row] = compare(report, base, tolerance=0.2)
+    assert row["ratio"] > 1.2 and row["regressed"]
+    [row] = compare(report, base, tolerance=5.0)
+    assert not row["regressed"]
+    assert compare(report, {"results": {}}) == []
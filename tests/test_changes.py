@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from src.domain.changes import ChangeTracker
+from src.domain.models import PriceSnapshot
+
+EX = ["nobitex", "wallex"]
+
+def snap(ex, sym, bid, ask):
+    return PriceSnapshot(exchange=ex, symbol=sym, bid=bid, ask=ask, ts=datetime.now(timezone.utc))
+
+def test_only_changed_symbols_are_dirty():
+    tracker = ChangeTracker()
+    for ex in EX:
+        for sym in ("BTC/USDT", "ETH/USDT"):
+            assert tracker.observe(snap(ex, sym, 1.0, 2.0))
+    assert tracker.dirty(EX, ["BTC/USDT", "ETH/USDT"]) == ["BTC/USDT", "ETH/USDT"]
+    tracker.mark_evaluated(EX, ["BTC/USDT", "ETH/USDT"])
+
+    assert not tracker.observe(snap("nobitex", "BTC/USDT", 1.0, 2.0))  # same quote, new ts
+    assert tracker.observe(snap("wallex", "ETH/USDT", 1.0, 2.5))
+    assert tracker.dirty(EX, ["BTC/USDT", "ETH/USDT"]) == ["ETH/USDT"]
+    assert tracker.seq[("wallex", "ETH/USDT")] == 2
+
+def test_nan_quotes_are_not_changes():
+    tracker = ChangeTracker()
+    assert tracker.observe(snap("wallex", "BTC/USDT", float("nan"), float("nan")))
+    assert not tracker.observe(snap("wallex", "BTC/USDT", float("nan"), float("nan")))
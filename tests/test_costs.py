@@ -0,0 +1,76 @@
+import numpy as np
+from datetime import datetime, timezone
+
+from src.config import Settings
+from src.domain.arbitrage_engine import ArbEngine
+from src.domain.costs import CostModel
+from src.domain.models import PriceSnapshot
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def snap(ex, sym, bid, ask):
+    return PriceSnapshot(exchange=ex, symbol=sym, bid=bid, ask=ask, ts=T0)
+
+
+def test_fees_turn_a_gross_spread_into_a_loss():
+    costs = CostModel({"nobitex": 0.25, "wallex": 0.2})
+    engine = ArbEngine(0.3, 45, 0.15, costs=costs)
+    # 0.4% gross, 0.45% in taker fees
+    nb = snap("nobitex", "BTC/USDT", 99, 100)
+    assert engine.evaluate(nb, snap("wallex", "BTC/USDT", 100.4, 101)) is None
+    opp = engine.evaluate(nb, snap("wallex", "BTC/USDT", 101, 102))
+    assert abs(opp.net_pct - (1.01 * 0.9975 * 0.998 - 1) * 100) < 1e-9
+    assert abs(opp.est_profit_usd - opp.net_pct / 100 * 1000) < 1e-9
+    assert opp.diff_pct > opp.net_pct
+
+
+def test_symbol_overrides_and_withdrawal_sized_in_usd():
+    costs = CostModel({"nobitex": 0.25}, symbol_fees_pct={("nobitex", "BTC/IRT"): 0.0},
+                      withdrawal_fees={("nobitex", "BTC"): 0.0001}, notional_usd=1000)
+    assert costs.fee("nobitex", "BTC/IRT") == 0 and costs.fee("nobitex", "ETH/IRT") == 0.0025
+    # IRT's USD rate is unknown until its USDT market is seen: a flat fee can't be sized
+    pct, usd = costs.net("nobitex", "wallex", "BTC/IRT", 6_000_000_000, 6_060_000_000)
+    assert pct != pct and usd is None
+    costs.observe(snap("nobitex", "USDT/IRT", 59_900, 60_100))
+    pct, usd = costs.net("nobitex", "wallex", "BTC/IRT", 6_000_000_000, 6_060_000_000)
+    # 1000 USD = 60M IRT; 0.0001 BTC withdrawn is worth 606k IRT, ~1.01%
+    assert abs(pct - (1.01 - 1 - 0.0001 * 6_060_000_000 / 60_000_000) * 100) < 1e-9
+    assert abs(usd - pct * 10) < 1e-9
+
+
+def test_batch_matches_scalar():
+    costs = CostModel({"nobitex": 0.25, "wallex": 0.2}, withdrawal_fees={("wallex", "ETH"): 0.002},
+                      transfer_fee_pct=0.05, slippage_pct=0.02)
+    exchanges, symbols = ["nobitex", "wallex"], ["BTC/USDT", "ETH/USDT"]
+    bid = np.array([[100.0, 2000.0], [101.5, 2030.0]])
+    ask = np.array([[100.2, 2001.0], [101.7, 2031.0]])
+    net_pct, profit = costs.net_batch(exchanges, symbols, bid, ask)
+    for i, buy in enumerate(exchanges):
+        for j, sell in enumerate(exchanges):
+            for m, sym in enumerate(symbols):
+                pct, usd = costs.net(buy, sell, sym, ask[i, m], bid[j, m])
+                assert abs(net_pct[i, j, m] - pct) < 1e-9 and abs(profit[i, j, m] - usd) < 1e-9
+
+    batch = ArbEngine(0.1, 45, 0.15, costs=costs)
+    scalar = ArbEngine(0.1, 45, 0.15, costs=costs)
+    ts = np.full(bid.shape, T0.timestamp())
+    opps = batch.evaluate_batch(exchanges, symbols, bid, ask, ts)
+    got = {(o.symbol, o.buy_from, o.sell_to, round(o.net_pct, 9)) for o in opps}
+    want = set()
+    for m, sym in enumerate(symbols):
+        for i, j in ((0, 1), (1, 0)):
+            o = scalar.evaluate(snap(exchanges[i], sym, bid[i, m], ask[i, m]),
+                                snap(exchanges[j], sym, bid[j, m], ask[j, m]))
+            if o:
+                want.add((o.symbol, o.buy_from, o.sell_to, round(o.net_pct, 9)))
+    assert got == want and got
+
+
+def test_cost_tables_from_settings():
+    s = Settings(TAKER_FEES_PCT="nobitex:0.25,wallex:0.2,nobitex:btc/irt:0.1",
+                 WITHDRAWAL_FEES="wallex:usdt:1.5")
+    costs = CostModel.from_settings(s)
+    assert s.taker_fees == {"nobitex": 0.25, "wallex": 0.2}
+    assert costs.fee("nobitex", "BTC/IRT") == 0.001
+    assert costs.withdrawal("wallex", "USDT/IRT") == 1.5
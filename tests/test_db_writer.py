@@ -0,0 +1,155 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timezone
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+)
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.DB.writer import BufferedWriter
+from src.domain.models import ArbOpportunity
+
+# SQLite stand-in for the PostgreSQL schema in src/DB/database.py
+SCHEMA = [
+    "CREATE TABLE exchanges (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)",
+    "CREATE TABLE pairs (id INTEGER PRIMARY KEY, symbol TEXT UNIQUE NOT NULL)",
+    "CREATE TABLE ticks (exchange_id INT NOT NULL, pair_id INT NOT NULL, bid REAL, ask REAL,"
+    " bid_size REAL, ask_size REAL, fetched_at TIMESTAMP NOT NULL)",
+    "CREATE TABLE opportunities (id INTEGER PRIMARY KEY, pair_id INT NOT NULL,"
+    " buy_exchange_id INT NOT NULL, sell_exchange_id INT NOT NULL, diff_abs REAL NOT NULL,"
+    " diff_pct REAL NOT NULL, est_profit_usd REAL, detected_at TIMESTAMP NOT NULL)",
+]
+
+def make_engine(tmp_path):
+    return create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'writer.db'}")
+
+async def create_schema(engine):
+    async with engine.begin() as conn:
+        for stmt in SCHEMA:
+            await conn.execute(text(stmt))
+
+def test_buffered_rows_are_written_in_one_flush(tmp_path):
+    async def run():
+        engine = make_engine(tmp_path)
+        await create_schema(engine)
+        writer = BufferedWriter(engine=engine, max_rows=10_000, flush_interval=60)
+        now = datetime.now(timezone.utc)
+        for i in range(1200):
+            exchange = "nobitex" if i % 2 else "wallex"
+            writer.add_tick(exchange, "BTC/USDT", 100 + i, 101 + i, 0.5, None, now)
+        writer.add_tick("wallex", "BTC/USDT", float("nan"), float("nan"), fetched_at=now)  # skipped
+        opp = ArbOpportunity("BTC/USDT", "nobitex", 100, "wallex", 101, 1, 1.0, now)
+        writer.add_opportunity(opp)
+        assert await writer.flush() == 1201
+        assert await writer.flush() == 0
+        async with engine.connect() as conn:
+            ticks = (await conn.execute(text(
+                "SELECT count(*), count(DISTINCT exchange_id), count(ask_size) FROM ticks"
+            ))).one()
+            opps = (await conn.execute(text("SELECT count(*) FROM opportunities"))).scalar_one()
+        await engine.dispose()
+        return tuple(ticks), opps
+
+    assert asyncio.run(run()) == ((1200, 2, 0), 1)
+
+def test_failed_flush_keeps_rows_for_retry(tmp_path):
+    async def run():
+        engine = make_engine(tmp_path)  # no schema yet: flush fails
+        writer = BufferedWriter(engine=engine, max_rows=10_000, flush_interval=60)
+        writer.add_tick("nobitex", "BTC/USDT", 100.0, 101.0)
+        assert await writer.flush() == 0
+        await create_schema(engine)
+        written = await writer.flush()
+        await engine.dispose()
+        return written
+
+    assert asyncio.run(run()) == 1
+
+def test_size_threshold_triggers_background_flush(tmp_path):
+    async def run():
+        engine = make_engine(tmp_path)
+        await create_schema(engine)
+        writer = BufferedWriter(engine=engine, max_rows=5, flush_interval=60)
+        writer.start()
+        await asyncio.sleep(0)
+        for i in range(5):
+            writer.add_tick("nobitex", "BTC/USDT", 100.0 + i, float("nan"))
+        await asyncio.sleep(0.5)
+        async with engine.connect() as conn:
+            n = (await conn.execute(text("SELECT count(*) FROM ticks"))).scalar_one()
+        await writer.close()
+        await engine.dispose()
+        return n
+
+    assert asyncio.run(run()) == 5
+
+def test_dimension_cache_hits_after_first_lookup(tmp_path):
+    from src.DB.database import DimensionCache
+
+    async def run():
+        engine = make_engine(tmp_path)
+        await create_schema(engine)
+        async with engine.begin() as conn:
+            await conn.execute(text("INSERT INTO exchanges(name) VALUES ('nobitex')"))
+        cache = DimensionCache()
+        async with engine.begin() as conn:
+            await cache.warm(conn)
+            assert len(cache) == 1
+            nb = await cache.get_id(conn, "exchanges", "name", "nobitex")    # warmed: hit
+            wx = await cache.get_id(conn, "exchanges", "name", "wallex")     # miss: upsert
+            again = await cache.get_id(conn, "exchanges", "name", "wallex")  # hit
+        fresh = DimensionCache()
+        async with engine.begin() as conn:
+            # miss on a row that already exists
+            existing = await fresh.get_id(conn, "exchanges", "name", "nobitex")
+        await engine.dispose()
+        return nb, wx, again, existing
+
+    nb, wx, again, existing = asyncio.run(run())
+    assert nb != wx and wx == again and existing == nb
+
+def test_a_bad_row_is_dropped_without_blocking_the_batch(tmp_path):
+    async def run():
+        engine = make_engine(tmp_path)
+        async with engine.begin() as conn:
+            for stmt in SCHEMA:
+                # stands in for a row no partition accepts
+                stmt = stmt.replace("bid REAL,", "bid REAL CHECK (bid < 1000),")
+                await conn.execute(text(stmt))
+        writer = BufferedWriter(engine=engine, max_rows=10_000, flush_interval=60)
+        for i in range(20):
+            writer.add_tick("nobitex", "BTC/USDT", 5000.0 if i == 7 else 100.0 + i, 101.0)
+        writer.add_opportunity(ArbOpportunity("BTC/USDT", "nobitex", 100, "wallex", 101, 1, 1.0,
+                                              datetime.now(timezone.utc)))
+        first = await writer.flush()
+        second = await writer.flush()
+        async with engine.connect() as conn:
+            n = (await conn.execute(text("SELECT count(*) FROM ticks"))).scalar_one()
+        await engine.dispose()
+        return first, second, n
+
+    assert asyncio.run(run()) == (20, 0, 19)
+
+def test_an_unavailable_database_is_not_bisected(tmp_path):
+    from sqlalchemy.exc import OperationalError
+
+    async def run():
+        writer = BufferedWriter(engine=make_engine(tmp_path), max_rows=10_000, flush_interval=60)
+        attempts = []
+
+        async def down(ticks, opps):
+            attempts.append(len(ticks) + len(opps))
+            raise OperationalError("INSERT", {}, ConnectionRefusedError("database is down"))
+
+        writer._write = down
+        for i in range(1000):
+            writer.add_tick("nobitex", "BTC/USDT", 100.0 + i, 101.0)
+        written = await writer.flush()
+        return written, attempts, len(writer._ticks)
+
+    written, attempts, pending = asyncio.run(run())
+    assert written == 0 and attempts == [1000]
+    assert pending == 1000
@@ -0,0 +1,140 @@
+import asyncio
+import gc
+import time
+
+import httpx
+from prometheus_client import REGISTRY
+
+from src.config import settings
+from src.exchanges.common import (
+    CircuitBreaker, LatencyWindow, TokenBucket, _latency, fetch_deadline, resilient_get,
+)
+
+
+def _count(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _client(delays):
+    # the n-th request takes delays[n] seconds (the last one repeats)
+    calls = []
+
+    async def handler(request):
+        n = len(calls)
+        calls.append(n)
+        await asyncio.sleep(delays[min(n, len(delays) - 1)])
+        return httpx.Response(200, json={"n": n})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+def test_deadline_abandons_a_slow_fetch():
+    async def main():
+        client, _ = _client([1.0])
+        start = time.monotonic()
+        with fetch_deadline(0.1):
+            r = await resilient_get(client, "http://x/slow", "deadline-test")
+        return r, time.monotonic() - start
+
+    before = _count("fetch_deadline_misses_total", exchange="deadline-test")
+    r, took = asyncio.run(main())
+    assert r is None and took < 0.5
+    assert _count("fetch_deadline_misses_total", exchange="deadline-test") == before + 1
+
+
+def test_open_breaker_waits_within_the_deadline_without_burning_tries():
+    async def main():
+        client, calls = _client([0.0])
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.1)
+        await breaker.on_failure()
+        with fetch_deadline(1.0):
+            r = await resilient_get(client, "http://x/ok", "breaker-test", breaker=breaker,
+                                    max_tries=1)
+        breaker.open_until = time.monotonic() + 5
+        start = time.monotonic()
+        with fetch_deadline(0.1):
+            late = await resilient_get(client, "http://x/ok", "breaker-test", breaker=breaker)
+        return r, late, time.monotonic() - start, calls
+
+    r, late, took, calls = asyncio.run(main())
+    assert r is not None and r.status_code == 200 and calls == [0]
+    assert late is None and took < 0.5
+
+
+def test_nested_deadlines_only_tighten():
+    async def main():
+        client, _ = _client([0.3])
+        with fetch_deadline(0.1):
+            with fetch_deadline(5.0):
+                return await resilient_get(client, "http://x/slow", "nested-test")
+
+    assert asyncio.run(main()) is None
+
+
+def test_hedge_wins_when_the_first_request_stalls(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_SECONDS", 0.02)
+    window = _latency["hedge-test"] = LatencyWindow()
+    for _ in range(32):
+        window.observe(0.02)
+
+    async def main():
+        client, calls = _client([1.0, 0.0])
+        start = time.monotonic()
+        r = await resilient_get(client, "http://x/h", "hedge-test", limiter=TokenBucket(100, 10))
+        return r, time.monotonic() - start, calls
+
+    before = _count("hedged_requests_total", exchange="hedge-test", winner="hedge")
+    r, took, calls = asyncio.run(main())
+    assert r.json() == {"n": 1} and calls == [0, 1] and took < 0.5
+    assert _count("hedged_requests_total", exchange="hedge-test", winner="hedge") == before + 1
+
+
+def test_latency_window_quantile():
+    window = LatencyWindow(size=100, refresh=10)
+    assert window.quantile(0.95) is None
+    for v in range(100):
+        window.observe(v / 100)
+    assert window.quantile(0.95) == 0.95 and window.quantile(0.5) == 0.5
+
+
+def test_overloaded_cycles_do_not_book_slots_past_the_deadline():
+    # 40 requests per cycle against a limiter that allows ~15 within each deadline
+    async def main():
+        client, _ = _client([0.0])
+        bucket = TokenBucket(rate_per_sec=100, capacity=5)
+        per_cycle, ahead = [], []
+        for _ in range(5):
+            with fetch_deadline(0.1):
+                rs = await asyncio.gather(*(
+                    resilient_get(client, "http://x/ok", "overload-test", limiter=bucket)
+                    for _ in range(40)
+                ))
+            per_cycle.append(sum(r is not None for r in rs))
+            ahead.append(bucket._slots.tat - time.monotonic())
+            await asyncio.sleep(0.05)
+        return per_cycle, ahead
+
+    # a full collection of the suite's garbage can stall one 0.1s cycle on its own
+    gc.collect()
+    gc.disable()
+    try:
+        per_cycle, ahead = asyncio.run(main())
+    finally:
+        gc.enable()
+    assert all(n >= 8 for n in per_cycle), per_cycle
+    assert max(ahead) < 0.2, ahead
+
+
+def test_cancelled_waiter_gives_its_slot_back():
+    async def main():
+        bucket = TokenBucket(rate_per_sec=10, capacity=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return bucket.reserve(max_wait=0.5), bucket.reserve(max_wait=0.05)
+
+    first, second = asyncio.run(main())
+    assert first is not None and first < 0.1 and second is None
@@ -1,6 +1,7 @@
+import numpy as np
 from datetime import datetime, timezone, timedelta
-from src.arb.engine import ArbEngine
-from src.models import PriceSnapshot
+from src.domain.arbitrage_engine import ArbEngine
+from src.domain.models import PriceSnapshot
 
 def ts():
     return datetime.now(timezone.utc)
@@ -44,3 +45,58 @@ def test_hysteresis_allows_resend_if_improved_enough():
     a2 = snap("nobitex", "BTC/USDT", bid=100, ask=100, t=t0 + timedelta(seconds=5))
     b2 = snap("wallex", "BTC/USDT", bid=120, ask=120, t=t0 + timedelta(seconds=5))
     assert engine.evaluate(a2, b2) is not None
+
+
+def batch(engine, a, b):
+    # one symbol, two exchanges: the batch equivalent of evaluate(a, b) + evaluate(b, a)
+    bid = np.array([[a.bid], [b.bid]])
+    ask = np.array([[a.ask], [b.ask]])
+    t = np.array([[a.ts.timestamp()], [b.ts.timestamp()]])
+    return engine.evaluate_batch([a.exchange, b.exchange], [a.symbol], bid, ask, t)
+
+def test_batch_matches_scalar_threshold():
+    engine = ArbEngine(threshold_pct=1.0, cooldown_seconds=10, hysteresis_delta_pct=0.5)
+    nb = snap("nobitex", "BTC/USDT", 100, 100)
+    assert batch(engine, nb, snap("wallex", "BTC/USDT", 100.5, 101)) == []
+    engine = ArbEngine(threshold_pct=0.5, cooldown_seconds=10, hysteresis_delta_pct=0.1)
+    opps = batch(engine, nb, snap("wallex", "BTC/USDT", 101, 101))
+    assert [(o.buy_from, o.sell_to) for o in opps] == [("nobitex", "wallex")]
+    assert opps[0].diff_pct >= 0.5
+
+def test_batch_cooldown_and_hysteresis_match_scalar():
+    t0 = ts()
+    for hyst, b2_price in ((0.2, 102.1), (0.5, 120)):
+        scalar = ArbEngine(threshold_pct=0.1, cooldown_seconds=60, hysteresis_delta_pct=hyst)
+        vector = ArbEngine(threshold_pct=0.1, cooldown_seconds=60, hysteresis_delta_pct=hyst)
+        steps = [
+            (snap("nobitex", "BTC/USDT", 100, 100, t=t0),
+             snap("wallex", "BTC/USDT", 102, 102, t=t0)),
+            (snap("nobitex", "BTC/USDT", 100, 100, t=t0 + timedelta(seconds=10)),
+             snap("wallex", "BTC/USDT", b2_price, b2_price, t=t0 + timedelta(seconds=10))),
+        ]
+        for a, b in steps:
+            expected = [o for o in (scalar.evaluate(a, b), scalar.evaluate(b, a)) if o]
+            assert batch(vector, a, b) == expected
+
+def test_batch_many_exchanges_and_symbols():
+    engine = ArbEngine(threshold_pct=1.0, cooldown_seconds=60, hysteresis_delta_pct=0.1)
+    bid = np.array([[100.0, 10.0], [99.0, np.nan], [103.0, 10.0]])
+    ask = np.array([[101.0, 10.1], [100.0, np.nan], [104.0, 10.1]])
+    exchanges, symbols = ["a", "b", "c"], ["X", "Y"]
+    opps = engine.evaluate_batch(exchanges, symbols, bid, ask, np.full((3, 2), 1000.0))
+    assert {(o.buy_from, o.sell_to, o.symbol) for o in opps} == {("a", "c", "X"), ("b", "c", "X")}
+    assert engine.evaluate_batch(exchanges, symbols, bid, ask, np.full((3, 2), 1010.0)) == []
+
+
+def test_batch_covers_every_directed_pair_of_n_venues():
+    engine = ArbEngine(threshold_pct=0.5, cooldown_seconds=10, hysteresis_delta_pct=0.1,
+                       export_metrics=False)
+    exchanges = ["nobitex", "wallex", "bitpin"]
+    # bitpin bids above both other asks; wallex above nobitex
+    bid = np.array([[99.0], [101.0], [103.0]])
+    ask = np.array([[100.0], [101.5], [103.5]])
+    opps = engine.evaluate_batch(exchanges, ["BTC/USDT"], bid, ask,
+                                 np.full((3, 1), ts().timestamp()))
+    assert {(o.buy_from, o.sell_to) for o in opps} == {
+        ("nobitex", "wallex"), ("nobitex", "bitpin"), ("wallex", "bitpin"),
+    }
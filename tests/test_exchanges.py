@@ -1,7 +1,10 @@
+import asyncio
 import httpx
 import json
-from src.exchanges.nobitex import NobitexClient
-from src.exchanges.wallex import WallexClient
+from src.adapters.nobitex import NobitexClient
+from src.adapters.wallex import WallexClient
+from src.adapters import payloads
+from src.exchanges.common import fetch_batch
 
 class MockTransport(httpx.BaseTransport):
     def __init__(self, handler):
@@ -29,3 +32,186 @@ def test_wallex_fetch_basic():
     client = httpx.AsyncClient(transport=transport)
     wx = WallexClient(client=client)
     data = wx  # silence linter for now
+
+
+def wallex_trades_handler(request: httpx.Request) -> httpx.Response:
+    data = {"success": True, "result": {"latestTrades": [
+        {"price": "100", "isBuyOrder": True}, {"price": "102", "isBuyOrder": False},
+    ]}}
+    return httpx.Response(200, json=data)
+
+
+def test_fetch_batch_fans_out_across_exchanges():
+    symbols = ["BTC/USDT", "ETH/USDT", "USDT/IRT"]
+
+    async def run():
+        nb = NobitexClient(client=httpx.AsyncClient(transport=httpx.MockTransport(nobitex_handler)))
+        wx_transport = httpx.MockTransport(wallex_trades_handler)
+        wx = WallexClient(client=httpx.AsyncClient(transport=wx_transport))
+        try:
+            return await fetch_batch({"nobitex": nb, "wallex": wx}, symbols)
+        finally:
+            await nb.close()
+            await wx.close()
+
+    batch = asyncio.run(run())
+    for sym in symbols:
+        assert batch.get("nobitex", sym).ask == 101
+        assert batch.get("wallex", sym).bid == 100
+    assert batch.skew_seconds >= 0
+
+
+WALLEX_TRADES = json.dumps({"success": True, "result": {"latestTrades": [
+    {"price": "101", "isBuyOrder": True, "quantity": "1"},
+    {"price": "103", "isBuyOrder": False},
+    {"price": "100.5", "isBuyOrder": True},
+    {"price": "102.5", "isBuyOrder": False},
+    {"price": "99"},  # no side: ignored
+]}}).encode()
+
+
+def _both_paths(monkeypatch, fn):
+    out = [fn()]
+    monkeypatch.setattr(payloads, "_decode_trades", None)
+    monkeypatch.setattr(payloads, "_decode_book", None)
+    monkeypatch.setattr(payloads, "_decode_raw_map", None)
+    monkeypatch.setattr(payloads, "_decode_markets", None)
+    out.append(fn())
+    return out
+
+
+def test_wallex_best_prices_one_pass(monkeypatch):
+    for best in _both_paths(monkeypatch, lambda: payloads.decode_wallex_trades(WALLEX_TRADES)):
+        assert best == (101.0, 102.5)
+    trades = [{"price": 5, "isBuyOrder": True}]
+    only_buys = json.dumps({"success": True, "result": {"latestTrades": trades}}).encode()
+    bid, ask = payloads.decode_wallex_trades(only_buys)
+    assert bid == 5.0 and ask != ask
+    assert payloads.decode_wallex_trades(b'{"success": false}') is None
+
+
+def test_nobitex_book_decoding(monkeypatch):
+    body = json.dumps({
+        "status": "ok", "lastUpdate": 1,
+        "bids": [["99", "2"]], "asks": [["101", "3"], ["102", "1"]],
+    }).encode()
+    for bids, asks in _both_paths(monkeypatch, lambda: payloads.decode_nobitex_book(body)):
+        assert payloads.nobitex_top(bids, asks) == (99.0, 101.0, 2.0, 3.0)
+    bid, ask, bid_size, ask_size = payloads.nobitex_top([], [])
+    assert bid != bid and ask != ask and bid_size is None
+
+
+def test_unexpected_shape_falls_back_to_generic_decode():
+    # "success": 1 is not a bool, so the typed schema rejects it; the generic walk still reads it
+    body = json.dumps({"success": 1, "result": {"latestTrades": [
+        {"price": "101", "isBuyOrder": True}, {"price": "102", "isBuyOrder": False},
+    ]}}).encode()
+    assert payloads.decode_wallex_trades(body) == (101.0, 102.0)
+
+
+def test_bulk_fetch_uses_one_request_per_exchange():
+    symbols = ["BTC/USDT", "ETH/USDT", "USDT/IRT", "XRP/USDT"]
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/v3/orderbook/all"):
+            books = {m: {"lastUpdate": 1, "bids": [["99", "1"]], "asks": [["101", "2"]]}
+                     for m in ("BTCUSDT", "ETHUSDT", "USDTIRT", "XRPUSDT", "DOGEUSDT")}
+            return httpx.Response(200, json={"status": "ok", **books})
+        if request.url.path.endswith("/markets"):
+            markets = {m: {"symbol": m, "stats": {"bidPrice": "100", "askPrice": "-"}}
+                       for m in ("BTCUSDT", "ETHUSDT", "USDTIRT", "XRPUSDT")}
+            return httpx.Response(200, json={"success": True, "result": {"symbols": markets}})
+        return httpx.Response(404)
+
+    async def run():
+        nb = NobitexClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        wx = WallexClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            return await fetch_batch({"nobitex": nb, "wallex": wx}, symbols)
+        finally:
+            await nb.close()
+            await wx.close()
+
+    batch = asyncio.run(run())
+    assert sorted(seen) == ["/v1/markets", "/v3/orderbook/all"]
+    for sym in symbols:
+        assert batch.get("nobitex", sym).bid_size == 1.0
+        assert batch.get("wallex", sym).bid == 100.0
+        assert batch.get("wallex", sym).ask != batch.get("wallex", sym).ask  # "-" → NaN
+
+
+def test_bulk_decoding_only_wanted_markets(monkeypatch):
+    body = json.dumps({
+        "status": "ok", "BTCUSDT": {"bids": [["1", "2"]], "asks": []}, "ETHUSDT": {"bids": []},
+    }).encode()
+    wanted = ["BTCUSDT", "LTCUSDT"]
+    for out in _both_paths(monkeypatch, lambda: payloads.decode_nobitex_all(body, wanted)):
+        assert list(out) == ["BTCUSDT"]
+        assert out["BTCUSDT"] == ([["1", "2"]], [])
+
+
+def test_registry_builds_venues_on_shared_host_pools():
+    from src.adapters.bitpin import BitpinClient
+    from src.adapters.registry import build_clients
+    from src.exchanges.connections import ConnectionManager
+
+    async def run():
+        connections = ConnectionManager(http2=False)
+        clients = build_clients(["nobitex", "wallex", "bitpin"], connections)
+        same_host = NobitexClient(connections=connections)
+        assert same_host._client is clients["nobitex"]._client
+        assert len(connections.hosts) == 3
+        for c in [*clients.values(), same_host]:
+            await c.close()
+        assert not clients["nobitex"]._client.is_closed  # the manager owns the pools
+        await connections.close()
+        assert clients["nobitex"]._client.is_closed
+
+    asyncio.run(run())
+    assert BitpinClient.market("BTC/USDT") == "BTC_USDT"
+    assert NobitexClient.market("USDT/IRT") == "USDTIRT"
+    try:
+        build_clients(["nobitex", "nope"])
+    except ValueError as e:
+        assert "nope" in str(e)
+    else:
+        raise AssertionError("unknown venue accepted")
+
+
+def test_declarative_book_venue_fetches_top_of_book():
+    from src.adapters.bitpin import BitpinClient
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"asks": [["101", "2"]], "bids": [["99", "1.5"]]})
+
+    async def run():
+        bp = BitpinClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            return await bp.fetch_ticker(["BTC/USDT"])
+        finally:
+            await bp.close()
+
+    snap = asyncio.run(run())["BTC/USDT"]
+    assert seen == ["/api/v1/mth/orderbook/BTC_USDT/"]
+    assert (snap.exchange, snap.bid, snap.ask, snap.bid_size) == ("bitpin", 99.0, 101.0, 1.5)
+
+
+def test_only_venues_declaring_bulk_use_fetch_all(monkeypatch):
+    from src.adapters.bitpin import BitpinClient
+    from src.config import settings
+    monkeypatch.setattr(settings, "BULK_FETCH_MIN_SYMBOLS", 2)
+    symbols = ["BTC/USDT", "ETH/USDT", "XRP/USDT"]
+
+    async def run():
+        clients = [cls(client=httpx.AsyncClient()) for cls in (BitpinClient, NobitexClient)]
+        try:
+            return [c.bulk(symbols) for c in clients]
+        finally:
+            for c in clients:
+                await c.close()
+
+    assert asyncio.run(run()) == [False, True]
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from src.domain.models import PriceSnapshot
+from src.service import api, fanout
+from src.service.fanout import Broadcaster
+from src.worker.bus import SNAPSHOTS, encode
+
+
+def quote(sym, bid=1.0):
+    now = datetime.now(timezone.utc)
+    return encode(PriceSnapshot(exchange="nobitex", symbol=sym, bid=bid, ask=bid + 1, ts=now))
+
+
+def test_each_event_is_serialized_once_for_every_subscriber(monkeypatch):
+    calls = []
+    real = fanout.dumps
+    monkeypatch.setattr(fanout, "dumps", lambda obj: calls.append(obj) or real(obj))
+    b = Broadcaster()
+    # nobody listening
+    assert b.publish("quote", "BTC/USDT", quote("BTC/USDT")) == 0 and calls == []
+
+    subs = [b.subscribe() for _ in range(500)] + [b.subscribe(["BTC/USDT"]) for _ in range(500)]
+    assert b.publish("quote", "BTC/USDT", quote("BTC/USDT")) == 1000
+    assert len(calls) == 1
+    frames = {id(s.buffer[0]) for s in subs}
+    assert len(frames) == 1
+    frame = subs[0].buffer[0]
+    assert frame.sse is frame.sse
+    assert frame.sse.startswith(b"data: {") and frame.sse.endswith(b"\n\n")
+    assert json.loads(frame.text)["type"] == "quote"
+
+
+def test_symbol_index_and_unsubscribe():
+    b = Broadcaster()
+    eth = b.subscribe(["ETH/USDT"])
+    both = b.subscribe(["ETH/USDT", "BTC/USDT"])
+    b.publish("quote", "BTC/USDT", quote("BTC/USDT"))
+    assert len(eth.buffer) == 0 and len(both.buffer) == 1
+    b.unsubscribe(both)
+    b.unsubscribe(eth)
+    assert b._by_symbol == {}
+
+
+def test_slow_subscriber_drops_oldest():
+    b = Broadcaster(buffer_size=3)
+    slow = b.subscribe()
+
+    async def main():
+        for k in range(5):
+            b.publish("quote", "BTC/USDT", quote("BTC/USDT", bid=float(k)))
+        return await slow.get()
+
+    frames = asyncio.run(main())
+    assert [json.loads(f.data)["bid"] for f in frames] == [2.0, 3.0, 4.0]
+    assert slow.dropped == 2 and not slow.buffer
+
+
+def test_sse_endpoint_streams_bus_entries(monkeypatch):
+    monkeypatch.setitem(api.state, "fanout", Broadcaster())
+
+    async def main():
+        resp = await api.sse_stream("btc-usdt")
+        body = resp.body_iterator
+        api.apply_entry(SNAPSHOTS, quote("ETH/USDT"))
+        api.apply_entry(SNAPSHOTS, quote("BTC/USDT", bid=7.0))
+        chunk = await body.__anext__()
+        await body.aclose()
+        return chunk
+
+    chunk = asyncio.run(main())
+    event = json.loads(chunk[len(b"data: "):])
+    assert event["symbol"] == "BTC/USDT" and event["bid"] == 7.0
+    assert api.state["fanout"]._by_symbol == {}
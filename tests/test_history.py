@@ -0,0 +1,59 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.domain.history import QuoteHistory, QuoteRing, downsample
+from src.domain.models import PriceSnapshot
+from src.service import api
+from src.worker.bus import SNAPSHOTS, encode
+
+
+def test_ring_wraps_in_place_and_reads_oldest_first():
+    ring = QuoteRing(4)
+    columns = ring.ts, ring.bid, ring.ask
+    for t in range(6):
+        ring.append(float(t), 100.0 + t, 101.0 + t)
+    assert (ring.ts, ring.bid, ring.ask) == columns  # no reallocation
+    ts, bid, ask = ring.view()
+    assert ts.tolist() == [2, 3, 4, 5] and bid.tolist() == [102, 103, 104, 105]
+    assert ring.view(since=3.5)[0].tolist() == [4, 5]
+    assert ring.latest() == (5.0, 105.0, 106.0)
+    assert QuoteRing(3).latest() is None
+
+
+def test_downsample_keeps_last_quote_per_bucket():
+    ts = np.arange(100, dtype=float)
+    out_ts, out_bid, _ = downsample(ts, ts * 2, ts * 3, 0.0, 100.0, 10)
+    assert out_ts.tolist() == [10, 20, 30, 40, 50, 60, 70, 80, 90, 99]
+    assert out_bid.tolist() == [2 * t for t in out_ts.tolist()]
+    # gaps leave buckets empty rather than repeating quotes
+    sparse = np.array([1.0, 2.0, 3.0, 95.0])
+    assert downsample(sparse, sparse, sparse, 0.0, 99.0, 3)[0].tolist() == [3.0, 95.0]
+    assert downsample(ts, ts, ts, 0.0, 100.0, 2)[0].tolist() == [50.0, 99.0]
+
+
+def test_history_query_window_and_exchanges():
+    h = QuoteHistory(capacity=100, window_seconds=50)
+    for t in range(100):
+        h.append("nobitex", "BTC/USDT", float(t), 1.0, 2.0)
+        h.append("wallex", "BTC/USDT", float(t), 1.5, 2.5)
+        h.append("wallex", "ETH/USDT", float(t), 3.0, 4.0)
+    got = h.query("BTC/USDT", now=99.0, seconds=10)
+    assert set(got) == {"nobitex", "wallex"} and got["nobitex"][0].tolist() == list(range(89, 100))
+    assert h.query("BTC/USDT", now=99.0, seconds=1000)["wallex"][0][0] == 49  # capped at the window
+    assert len(h.query("BTC/USDT", now=99.0, points=5)["nobitex"][0]) == 5
+
+
+def test_status_and_history_endpoints_read_the_buffers(monkeypatch):
+    monkeypatch.setitem(api.state, "history", QuoteHistory(capacity=10, window_seconds=60))
+    now = time.time()
+    for k in range(3):
+        snap = PriceSnapshot(exchange="nobitex", symbol="BTC/USDT", bid=100.0 + k, ask=float("nan"),
+                             ts=datetime.fromtimestamp(now - 2 + k, timezone.utc))
+        api.apply_entry(SNAPSHOTS, encode(snap))
+    status = asyncio.run(api.status())["symbols"]["BTC/USDT"]["nobitex"]
+    assert status["bid"] == 102.0 and status["ask"] is None and status["points"] == 3
+    series = asyncio.run(api.history("btc-usdt", seconds=30))["exchanges"]["nobitex"]
+    assert series["bid"] == [100.0, 101.0, 102.0] and series["ask"] == [None, None, None]
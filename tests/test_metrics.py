@@ -0,0 +1,57 @@
+from prometheus_client import CollectorRegistry, generate_latest
+
+from src.config import settings
+from src.metrics import ExchangeMetrics, LatestGauge, last_bid, last_diff_pct, sampled, top_symbols
+
+
+def test_latest_gauge_caches_children_and_exports_last_value():
+    registry = CollectorRegistry()
+    gauge = LatestGauge("t_latest", "test", ["exchange", "symbol"], registry=registry)
+    child = gauge.labels(exchange="nobitex", symbol="BTC/USDT")
+    assert gauge.labels(exchange="nobitex", symbol="BTC/USDT") is child
+    child.set(1.0)
+    gauge.labels("nobitex", "BTC/USDT").set(2.0)
+    assert gauge.get("nobitex", "BTC/USDT") == 2.0
+    assert b't_latest{exchange="nobitex",symbol="BTC/USDT"} 2.0' in generate_latest(registry)
+
+
+def test_top_k_limits_per_symbol_series():
+    for i, sym in enumerate(["AAA/USDT", "BBB/USDT", "CCC/USDT"]):
+        # above anything other tests set
+        last_diff_pct.labels(sym, "nobitex_to_wallex").set(1000.0 + i)
+        last_diff_pct.labels(sym, "wallex_to_nobitex").set(float("nan"))
+    ExchangeMetrics("nobitex").quote("AAA/USDT", 1.0, 2.0)
+    ExchangeMetrics("nobitex").quote("CCC/USDT", 1.0, float("nan"))
+    assert top_symbols(2) == {"BBB/USDT", "CCC/USDT"}
+    assert top_symbols(0) is None
+
+    old = settings.METRICS_TOP_K
+    settings.METRICS_TOP_K = 1
+    try:
+        text = generate_latest().decode()
+    finally:
+        settings.METRICS_TOP_K = old
+    assert 'last_diff_pct{direction="nobitex_to_wallex",symbol="CCC/USDT"}' in text
+    assert 'symbol="AAA/USDT"' not in text and 'symbol="BBB/USDT"' not in text
+    assert last_bid.get("nobitex", "CCC/USDT") == 1.0
+    assert 'last_ask{exchange="nobitex",symbol="CCC/USDT"}' not in text
+
+
+class _Counting:
+    def __init__(self):
+        self.seen = []
+
+    def observe(self, v):
+        self.seen.append(v)
+
+
+def test_sampled_histogram_records_one_in_n():
+    child = _Counting()
+    assert sampled(child, 1.0) is child
+    s = sampled(child, 0.25)
+    for v in range(10):
+        s.observe(v)
+    assert child.seen == [3, 7]
+    off = sampled(_Counting(), 0.0)
+    off.observe(1.0)
+    assert off._child.seen == []
@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timezone
+from src.domain.models import ArbOpportunity
+from src.notify.telegram import BotChannel, format_batch, get_http_session, close_http_session
+
+def opp(sym, pct=1.0):
+    return ArbOpportunity(symbol=sym, buy_from="nobitex", buy_price=100, sell_to="wallex",
+                          sell_price=101, diff_abs=1, diff_pct=pct, ts=datetime.now(timezone.utc))
+
+class RecordingChannel(BotChannel):
+    name = "test"
+
+    def __init__(self):
+        super().__init__("token", "1,2")
+        self.sent = []
+
+    async def _send_one(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+def test_burst_is_coalesced_into_one_message_per_chat():
+    async def run():
+        ch = RecordingChannel()
+        for sym in ("BTC/USDT", "ETH/USDT", "USDT/IRT"):
+            await ch.send(opp(sym))
+        await asyncio.sleep(0.6)
+        await ch.close()
+        return ch.sent
+
+    sent = asyncio.run(run())
+    assert [cid for cid, _ in sent] == [1, 2]
+    assert sent[0][1].startswith("Arbitrage Opportunities (3)")
+
+def test_single_alert_keeps_original_format():
+    assert format_batch([opp("BTC/USDT")]).startswith("Arbitrage Opportunity\nPair: BTC/USDT")
+
+def test_http_session_is_shared():
+    async def run():
+        try:
+            return get_http_session() is get_http_session()
+        finally:
+            await close_http_session()
+    assert asyncio.run(run())
+
+def test_alert_queue_serves_best_first_and_drops_weakest_when_full():
+    from src.notify.queue import AlertQueue
+
+    async def run():
+        q = AlertQueue(maxsize=2, channel="test")
+        assert q.put_nowait(opp("A", 0.5)) is None
+        assert q.put_nowait(opp("B", 2.0)) is None
+        assert q.put_nowait(opp("C", 1.0)).symbol == "A"   # evicts the weakest queued alert
+        assert q.put_nowait(opp("D", 0.1)).symbol == "D"   # incoming alert is the weakest
+        return [(await q.get()).symbol for _ in range(2)]
+
+    assert asyncio.run(run()) == ["B", "C"]
+
+def test_submit_does_not_wait_for_delivery():
+    class SlowChannel(RecordingChannel):
+        async def _send_one(self, chat_id, text):
+            await asyncio.sleep(10)
+
+    async def run():
+        ch = SlowChannel()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(50):
+            ch.submit(opp(f"S{i}"))
+        elapsed = loop.time() - start
+        await ch.close()
+        return elapsed
+
+    assert asyncio.run(run()) < 0.1
+
+def test_delivery_latency_is_measured_from_submit_not_quote_time():
+    import dataclasses
+    from datetime import timedelta
+    from src.metrics import alert_delivery_latency_seconds
+
+    def observed():
+        hist = alert_delivery_latency_seconds.labels(channel="test")
+        return hist._sum.get(), sum(b.get() for b in hist._buckets)
+
+    async def run():
+        ch = RecordingChannel()
+        # quote fetched long before the spread was detected
+        quoted_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        stale = dataclasses.replace(opp("BTC/USDT"), ts=quoted_at)
+        ch.submit(stale)
+        await asyncio.sleep(0.6)
+        await ch.close()
+
+    sum_before, count_before = observed()
+    asyncio.run(run())
+    sum_after, count_after = observed()
+    assert count_after == count_before + 1
+    assert sum_after - sum_before < 5
+
+def test_failed_sends_are_not_counted_as_delivered():
+    from src.metrics import alert_delivery_latency_seconds, alerts_sent_total
+
+    class FailingChannel(RecordingChannel):
+        name = "failing"
+
+        async def _send_one(self, chat_id, text):
+            raise RuntimeError("failing API error: 403 - bot was blocked")
+
+    def sent():
+        counter = alerts_sent_total.labels(symbol="FAIL/USDT", direction="nobitex_to_wallex")
+        return counter._value.get()
+
+    def observed():
+        hist = alert_delivery_latency_seconds.labels(channel="failing")
+        return sum(b.get() for b in hist._buckets)
+
+    async def run():
+        ch = FailingChannel()
+        ch.submit(opp("FAIL/USDT"))
+        await asyncio.sleep(0.6)
+        await ch.close()
+
+    before = sent(), observed()
+    asyncio.run(run())
+    assert (sent(), observed()) == before
+
+def test_rate_limited_send_waits_for_retry_after(monkeypatch):
+    from src.notify import telegram
+
+    class Response:
+        def __init__(self, status, body):
+            self.status, self._body, self.headers = status, body, {}
+
+        async def text(self):
+            return self._body
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return None
+
+    class Session:
+        def __init__(self):
+            self.posts = []
+            self.replies = [
+                Response(429, '{"ok": false, "parameters": {"retry_after": 0.2}}'),
+                Response(200, '{"ok": true}'),
+            ]
+
+        def post(self, url, json):
+            self.posts.append(asyncio.get_running_loop().time())
+            return self.replies.pop(0)
+
+    session = Session()
+    monkeypatch.setattr(telegram, "get_http_session", lambda: session)
+
+    async def run():
+        ch = BotChannel("token", "1")
+        return await ch._broadcast("hello")
+
+    assert asyncio.run(run()) == 1
+    assert len(session.posts) == 2 and session.posts[1] - session.posts[0] >= 0.2
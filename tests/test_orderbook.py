@@ -0,0 +1,39 @@
+import numpy as np
+from datetime import datetime, timezone
+from src.domain.orderbook import OrderBook, buy_with_quote, sell_base, max_profitable_qty
+from src.domain.arbitrage_engine import ArbEngine
+
+def book(ex, bids, asks):
+    return OrderBook.from_levels(ex, "BTC/USDT", bids, asks, ts=datetime.now(timezone.utc))
+
+def test_from_levels_parses_strings_and_sorts():
+    b = book("nobitex", [["99", "1"], ["100", "2"]], [["102", "1"], ["101", "3"]])
+    assert b.best_bid == 100 and b.best_ask == 101
+    assert b.bid_qty.tolist() == [2, 1]
+
+def test_buy_with_quote_walks_levels():
+    px, qty_at = np.array([100.0, 110.0]), np.array([1.0, 1.0])
+    qty, vwap = buy_with_quote(px, qty_at, np.array([50, 210, 500]))
+    assert qty[0] == 0.5 and vwap[0] == 100
+    assert abs(qty[1] - 2.0) < 1e-12 and abs(vwap[1] - 105) < 1e-12
+    assert np.isnan(qty[2])  # book too thin
+
+def test_sell_base_walks_levels():
+    proceeds, vwap = sell_base(np.array([100.0, 90.0]), np.array([1.0, 1.0]), np.array([1.5, 3.0]))
+    assert proceeds[0] == 145 and np.isnan(proceeds[1])
+
+def test_max_profitable_qty_stops_where_prices_cross():
+    qty, profit = max_profitable_qty(np.array([100.0, 103.0]), np.array([1.0, 5.0]),
+                                     np.array([102.0, 101.0]), np.array([2.0, 5.0]))
+    assert qty == 1.0 and profit == 2.0
+
+def test_evaluate_depth_picks_largest_profitable_notional():
+    engine = ArbEngine(threshold_pct=0.5, cooldown_seconds=10, hysteresis_delta_pct=0.1,
+                       notionals=[100, 1000, 10000])
+    a = book("nobitex", [["99", "100"]], [["100", "20"], ["105", "100"]])
+    b = book("wallex", [["102", "12"], ["95", "100"]], [["103", "100"]])
+    opp = engine.evaluate_depth(a, b)
+    assert opp is not None
+    assert opp.qty == 10.0 and opp.buy_price == 100 and opp.sell_price == 102
+    assert opp.max_qty == 12.0
+    assert engine.evaluate_depth(b, a) is None
@@ -0,0 +1,95 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+
+from src.exchanges.common import TokenBucket, rate_limit_headers
+
+
+def test_reservations_do_not_serialise_waiters():
+    bucket = TokenBucket(rate_per_sec=100, capacity=2)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert all(abs(w - k * 0.01) < 2e-3 for k, w in zip((1, 2, 3), waits[2:]))
+
+    async def burst():
+        b = TokenBucket(rate_per_sec=50, capacity=1)
+        start = time.monotonic()
+        await asyncio.gather(*(b.acquire() for _ in range(6)))
+        return time.monotonic() - start
+
+    # 5 waits of 20ms each, slept concurrently: the last caller is done after ~100ms
+    assert 0.09 < asyncio.run(burst()) < 0.2
+
+
+def test_weights_take_more_tokens():
+    bucket = TokenBucket(rate_per_sec=10, capacity=10)
+    assert bucket.reserve(4) == 0.0
+    assert abs(bucket.available() - 6) < 0.1
+    assert abs(bucket.reserve(8) - 0.2) < 0.02
+
+
+def test_adapts_to_429_and_rate_limit_headers():
+    bucket = TokenBucket(rate_per_sec=10, capacity=5)
+    bucket.observe(429, {"Retry-After": "1.5"})
+    assert bucket.rate == 5
+    assert bucket.reserve() > 1.4
+    bucket.observe(200, {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "2"})
+    assert bucket.rate == 1.5
+    for _ in range(30):
+        bucket.observe(200, {})
+    assert bucket.rate == 10
+    bucket.observe(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": "3"})
+    assert bucket.rate == bucket.min_rate and bucket.available() == 0
+
+
+def test_rate_limit_header_forms():
+    assert rate_limit_headers({}) == (None, None, None)
+    retry, remaining, reset = rate_limit_headers(
+        {"X-RateLimit-Remaining": "7", "X-RateLimit-Reset": str(time.time() + 30)}
+    )
+    assert remaining == 7 and 29 < reset <= 30
+    _, _, reset_ms = rate_limit_headers({"X-RateLimit-Reset": str((time.time() + 10) * 1000)})
+    assert 9 < reset_ms <= 10
+    assert rate_limit_headers({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})[0] == 0.0
+
+
+def _take(name, n):
+    bucket = TokenBucket(rate_per_sec=1, capacity=10, shared_name=name)
+    for _ in range(n):
+        bucket.reserve()
+    bucket.close()
+
+
+def test_shared_budget_across_processes():
+    name = f"arb-test-{uuid.uuid4().hex[:8]}"
+    bucket = TokenBucket(rate_per_sec=1, capacity=10, shared_name=name)
+    try:
+        p = multiprocessing.get_context("spawn").Process(target=_take, args=(name, 7))
+        p.start()
+        p.join(30)
+        assert p.exitcode == 0
+        assert 2.5 < bucket.available() < 3.5
+        assert bucket.reserve(3) < 0.1
+        assert bucket.reserve() > 0.5
+    finally:
+        bucket.close()
+
+
+def test_shared_block_is_unlinked_by_the_last_close():
+    name = f"arb-test-{uuid.uuid4().hex[:8]}"
+    first = TokenBucket(rate_per_sec=10, capacity=10, shared_name=name)
+    second = TokenBucket(rate_per_sec=10, capacity=10, shared_name=name)
+    second.observe(429, {})
+    first.close()
+    assert second.rate < 10  # still attached: the backoff is shared, not reset
+    second.close()
+    assert not os.path.exists(f"/dev/shm/{name}")
+
+    again = TokenBucket(rate_per_sec=10, capacity=10, shared_name=name)
+    try:
+        assert again.rate == 10 and again.reserve() == 0.0
+    finally:
+        again.close()
+    assert not os.path.exists(f"/dev/shm/{name}")
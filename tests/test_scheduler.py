@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+from src.domain.models import PriceSnapshot
+from src.worker.scheduler import PollScheduler
+
+T = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def quotes(sym, a_bid, a_ask, b_bid, b_ask):
+    return {
+        "nobitex": PriceSnapshot(exchange="nobitex", symbol=sym, bid=a_bid, ask=a_ask, ts=T),
+        "wallex": PriceSnapshot(exchange="wallex", symbol=sym, bid=b_bid, ask=b_ask, ts=T),
+    }
+
+
+def test_everything_due_first_and_limit_respected():
+    sch = PollScheduler(["A", "B", "C"], threshold_pct=0.5, min_interval=1, max_interval=30)
+    assert sch.pop_due(0.0, limit=2) == ["A", "B"]
+    assert sch.pop_due(0.0) == ["C"]
+    assert sch.pop_due(0.0) == []
+    for sym in "ABC":
+        sch.schedule(sym, 0.0)
+    assert sch.next_due() == 1.0
+    assert len(sch) == 3
+
+
+def test_spread_near_threshold_polls_fast_quiet_polls_slow():
+    sch = PollScheduler(["HOT", "QUIET"], threshold_pct=0.5, min_interval=1, max_interval=30)
+    # wallex bids 0.5% over nobitex's ask: at the threshold
+    assert sch.observe("HOT", quotes("HOT", 99, 100, 100.5, 101)) == 1.0
+    assert sch.observe("QUIET", quotes("QUIET", 99.9, 100, 99.9, 100)) == 30.0
+    sch.pop_due(0.0)
+    sch.schedule("HOT", 0.0)
+    sch.schedule("QUIET", 0.0)
+    assert sch.pop_due(5.0) == ["HOT"]
+
+
+def test_volatility_shortens_interval_and_decays():
+    sch = PollScheduler(["X"], threshold_pct=0.5, min_interval=1, max_interval=30)
+    assert sch.observe("X", quotes("X", 99.9, 100, 99.9, 100)) == 30.0
+    # mid jumps 1% between polls while spreads stay flat
+    fast = sch.observe("X", quotes("X", 100.9, 101, 100.9, 101))
+    assert fast < 30.0
+    for _ in range(20):
+        slow = sch.observe("X", quotes("X", 100.9, 101, 100.9, 101))
+    assert slow > fast
+
+
+def test_missing_quotes_fall_back_to_slowest():
+    sch = PollScheduler(["X"], threshold_pct=0.5, min_interval=2, max_interval=20)
+    assert sch.observe("X", {}) == 20.0
+    assert sch.observe("X", quotes("X", float("nan"), float("nan"), 100, 101)) == 20.0
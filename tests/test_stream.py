@@ -0,0 +1,44 @@
+import asyncio
+from src.adapters.stream import BookStream, IncrementalBook
+from src.adapters.replay_server import ReplayServer
+
+RECORDING = [
+    {"t": 0.0, "msg": {"type": "snapshot", "symbol": "BTC/USDT",
+                       "bids": [["99", "1"], ["98", "2"]], "asks": [["101", "1"], ["102", "2"]]}},
+    # deeper level only: top of book unchanged
+    {"t": 0.0, "msg": {"type": "update", "symbol": "BTC/USDT", "bids": [["98", "5"]], "asks": []}},
+    # best ask removed: top moves to 102
+    {"t": 0.0, "msg": {"type": "update", "symbol": "BTC/USDT", "bids": [], "asks": [["101", "0"]]}},
+    {"t": 0.0, "msg": {"type": "update", "symbol": "ETH/USDT", "bids": [["5", "1"]], "asks": []}},
+]
+
+def test_incremental_book_tracks_top():
+    book = IncrementalBook()
+    assert book.apply([["10", "1"]], [["11", "1"]], snapshot=True)
+    assert not book.apply([["9", "1"]], [])
+    assert book.apply([["10", "0"]], [])
+    assert book.best_bid == 9 and book.best_ask == 11
+
+def test_stream_replays_and_fires_only_on_top_changes():
+    async def run():
+        server = await ReplayServer(RECORDING, speed=0).start()
+        tops = []
+        done = asyncio.Event()
+
+        async def on_top(snap):
+            tops.append((snap.symbol, snap.bid, snap.ask))
+            if len(tops) == 2:
+                done.set()
+
+        stream = BookStream("nobitex", server.url, ["BTC/USDT"], on_top)
+        task = asyncio.create_task(stream.run())
+        try:
+            await asyncio.wait_for(done.wait(), timeout=5)
+            await asyncio.sleep(0.05)
+            assert stream.is_live()
+        finally:
+            task.cancel()
+            await server.stop()
+        return tops
+
+    assert asyncio.run(run()) == [("BTC/USDT", 99.0, 101.0), ("BTC/USDT", 99.0, 102.0)]
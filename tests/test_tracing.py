@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+from prometheus_client import REGISTRY
+from src.utils.profiler import collapsed, profile, sample
+from src.utils.tracing import span
+
+
+def _count(stage, exchange):
+    labels = {"stage": stage, "exchange": exchange}
+    return (REGISTRY.get_sample_value("stage_latency_seconds_sum", labels),
+            REGISTRY.get_sample_value("stage_latency_seconds_count", labels))
+
+
+def test_span_observes_stage_histogram():
+    with span("decode", "test-ex"):
+        time.sleep(0.01)
+    with span("decode", "test-ex"):
+        pass
+    total, count = _count("decode", "test-ex")
+    assert count == 2 and total >= 0.01
+
+
+def test_span_records_even_when_the_block_raises():
+    try:
+        with span("evaluate", "test-raise"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert _count("evaluate", "test-raise")[1] == 1
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_samples_another_thread_as_collapsed_stacks():
+    stop = threading.Event()
+    t = threading.Thread(target=_busy_loop, args=(stop,))
+    t.start()
+    try:
+        counts = sample(t.ident, 0.2, 0.002)
+    finally:
+        stop.set()
+        t.join()
+    assert counts and any("_busy_loop (test_tracing.py" in stack for stack in counts)
+    line = collapsed(counts).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_only_one_profile_at_a_time():
+    async def main():
+        tid = threading.get_ident()
+        first = asyncio.create_task(asyncio.to_thread(profile, tid, 0.2))
+        await asyncio.sleep(0.05)
+        try:
+            profile(tid, 0.01)
+        except RuntimeError:
+            busy = True
+        else:
+            busy = False
+        return busy, await first
+
+    busy, text = asyncio.run(main())
+    assert busy and text.strip()
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+from src.domain.models import PriceSnapshot
+from src.domain.triangular import TriangularEngine
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def q(ex, sym, bid, ask, sec=0):
+    return PriceSnapshot(exchange=ex, symbol=sym, bid=bid, ask=ask, ts=T0 + timedelta(seconds=sec))
+
+
+def feed(engine, snaps):
+    out = []
+    for s in snaps:
+        out += engine.on_snapshot(s)
+    return out
+
+
+def test_single_exchange_triangle_found_with_fees_applied():
+    quotes = [
+        q("nobitex", "USDT/IRT", 59_990, 60_000),
+        q("nobitex", "BTC/USDT", 99.9, 100.0),
+        # 100 USDT → 1 BTC → 6.1M IRT → 101.67 USDT
+        q("nobitex", "BTC/IRT", 6_100_000, 6_110_000),
+    ]
+    [opp] = feed(TriangularEngine(0.5, 45, 0.15), quotes)
+    assert opp.symbol.count("→") == 3
+    assert abs(opp.diff_pct - (6_100_000 / 60_000 / 100 - 1) * 100) < 1e-9
+    assert "buy BTC/USDT on nobitex" in opp.route and "sell BTC/IRT on nobitex" in opp.route
+
+    # 0.6% taker fee per leg eats the 1.67% edge
+    assert feed(TriangularEngine(0.5, 45, 0.15, fees_pct={"nobitex": 0.6}), quotes) == []
+
+
+def test_cross_exchange_cycle_uses_transfer_legs():
+    quotes = [
+        q("wallex", "USDT/IRT", 59_990, 60_000),
+        q("wallex", "BTC/USDT", 99.9, 100.0),
+        q("nobitex", "BTC/IRT", 6_100_000, 6_110_000),
+    ]
+    opps = feed(TriangularEngine(0.5, 45, 0.15, max_legs=5), quotes)
+    assert opps and all("move" in o.route for o in opps)
+    assert {o.buy_from for o in opps} | {o.sell_to for o in opps} == {"nobitex", "wallex"}
+    # a 1% fee per transfer hop closes it
+    costly = TriangularEngine(0.5, 45, 0.15, transfer_fee_pct=1.0, max_legs=5)
+    assert feed(costly, quotes) == []
+
+
+def test_same_market_spreads_are_left_to_the_pairwise_engine():
+    quotes = [q("nobitex", "BTC/USDT", 99, 100), q("wallex", "BTC/USDT", 102, 103)]
+    assert feed(TriangularEngine(0.5, 45, 0.15), quotes) == []
+
+
+def test_cooldown_and_incremental_updates():
+    engine = TriangularEngine(0.5, 45, 0.15)
+    feed(engine, [q("nobitex", "USDT/IRT", 59_990, 60_000), q("nobitex", "BTC/USDT", 99.9, 100.0)])
+    assert len(engine.on_snapshot(q("nobitex", "BTC/IRT", 6_100_000, 6_110_000, 1))) == 1
+    edges_before = engine.graph.adj["nobitex:USDT"]
+    # unrelated market: its edges are added, the existing ones are untouched
+    assert engine.on_snapshot(q("nobitex", "ETH/USDT", 2999, 3000, 2)) == []
+    assert engine.graph.adj["nobitex:USDT"] is edges_before
+    # same cycle, barely better, inside the cooldown
+    assert engine.on_snapshot(q("nobitex", "BTC/IRT", 6_101_000, 6_110_000, 3)) == []
+    # a much better price beats the hysteresis
+    assert len(engine.on_snapshot(q("nobitex", "BTC/IRT", 6_200_000, 6_210_000, 4))) == 1
+    # a NaN quote removes its edges
+    assert engine.on_snapshot(q("nobitex", "BTC/IRT", float("nan"), float("nan"), 100)) == []
+    assert "nobitex:IRT" not in engine.graph.adj["nobitex:BTC"]
+
+
+def test_cycles_count_under_one_metric_series():
+    from prometheus_client import REGISTRY
+    labels = {"symbol": "triangular", "direction": "cycle"}
+    before = REGISTRY.get_sample_value("opportunities_found_total", labels) or 0.0
+    feed(TriangularEngine(0.5, 45, 0.15), [
+        q("nobitex", "USDT/IRT", 59_990, 60_000),
+        q("nobitex", "BTC/USDT", 99.9, 100.0),
+        q("nobitex", "BTC/IRT", 6_100_000, 6_110_000),
+    ])
+    assert REGISTRY.get_sample_value("opportunities_found_total", labels) > before
+
+
+def test_sharded_workers_do_not_run_the_cycle_search(monkeypatch):
+    from src.config import settings
+    from src.worker.bus import MemoryBus
+    from src.worker.loop import build_worker
+
+    monkeypatch.setattr(settings, "TRIANGULAR_ENABLED", True)
+    assert build_worker(0, 1, bus=MemoryBus()).triangular is not None
+    assert build_worker(0, 2, bus=MemoryBus()).triangular is None
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+
+from src.adapters.nobitex import NobitexClient
+from src.adapters.wallex import WallexClient
+from src.domain.models import PriceSnapshot
+from src.service import api
+from src.worker.bus import OPPORTUNITIES, SNAPSHOTS, MemoryBus, decode_snapshot, encode
+from src.worker.loop import Worker
+from src.worker.sharding import HashRing, shard_symbols
+
+SYMBOLS = [f"C{i}/USDT" for i in range(200)]
+
+
+class SilentNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, opp):
+        self.sent.append(opp)
+
+    async def close(self):
+        pass
+
+
+def test_shards_partition_symbols():
+    shards = [shard_symbols(SYMBOLS, i, 4) for i in range(4)]
+    assert sorted(sum(shards, [])) == sorted(SYMBOLS)
+    assert all(20 < len(s) < 90 for s in shards)  # roughly balanced
+    assert shard_symbols(SYMBOLS, 0, 1) == SYMBOLS
+
+
+def test_adding_a_shard_only_moves_keys_to_it():
+    four = HashRing(f"shard-{i}" for i in range(4))
+    five = HashRing(f"shard-{i}" for i in range(5))
+    moved = [s for s in SYMBOLS if four.owner(s) != five.owner(s)]
+    assert moved and all(five.owner(s) == "shard-4" for s in moved)
+
+
+def test_memory_bus_reads_in_order_and_resumes():
+    async def run():
+        bus = MemoryBus(maxlen=3)
+        for i in range(5):
+            bus.publish(SNAPSHOTS, {"i": i})
+        first = await bus.read({SNAPSHOTS: "0"}, block_ms=0)
+        assert [p["i"] for _, _, p in first] == [2, 3, 4]  # oldest trimmed
+        last = first[-1][1]
+        assert await bus.read({SNAPSHOTS: last}, block_ms=10) == []
+        bus.publish(SNAPSHOTS, {"i": 5})
+        [(_, _, payload)] = await bus.read({SNAPSHOTS: last, OPPORTUNITIES: "0"}, block_ms=0)
+        assert payload == {"i": 5}
+
+    asyncio.run(run())
+
+
+def test_snapshot_round_trip_keeps_nan():
+    snap = PriceSnapshot(exchange="wallex", symbol="BTC/USDT", bid=float("nan"), ask=101.0,
+                         ts=datetime(2024, 1, 1, tzinfo=timezone.utc), ask_size=2.0)
+    payload = encode(snap)
+    assert payload["bid"] is None
+    back = decode_snapshot(payload)
+    assert back.bid != back.bid and back.ask == 101.0
+    assert back.ts == snap.ts and back.ask_size == 2.0
+
+
+def test_worker_publishes_and_api_aggregates():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "nobitex" in str(request.url):
+            return httpx.Response(200, json={"bids": [["99", "1"]], "asks": [["100", "1"]]})
+        return httpx.Response(200, json={"success": True, "result": {"latestTrades": [
+            {"price": "101", "isBuyOrder": True}, {"price": "102", "isBuyOrder": False},
+        ]}})
+
+    async def run():
+        bus = MemoryBus()
+        transport = httpx.MockTransport(handler)
+        clients = {
+            "nobitex": NobitexClient(client=httpx.AsyncClient(transport=transport)),
+            "wallex": WallexClient(client=httpx.AsyncClient(transport=transport)),
+        }
+        notifier = SilentNotifier()
+        worker = Worker(["BTC/USDT", "ETH/USDT"], bus=bus, clients=clients, notifier=notifier)
+        await worker.run_cycle(worker.symbols)
+        await worker.close()
+
+        api.state["latest"].clear()
+        api.state["opportunities"].clear()
+        task = asyncio.create_task(api.aggregate(bus))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return notifier.sent
+
+    sent = asyncio.run(run())
+    # wallex bids 101 over nobitex's 100 ask: 1% on both symbols
+    assert {o.symbol for o in sent} == {"BTC/USDT", "ETH/USDT"}
+    assert api.state["latest"]["BTC/USDT"]["wallex"].bid == 101.0
+    assert len(api.state["opportunities"]) == 2
+    assert api.opportunities(limit=1)[0]["buy_from"] == "nobitex"
+
+
+def test_persistent_spread_alerts_again_after_cooldown():
+    from datetime import timedelta
+    from src.domain.arbitrage_engine import ArbEngine
+
+    notifier = SilentNotifier()
+    engine = ArbEngine(0.5, cooldown_seconds=45, hysteresis_delta_pct=0.15, export_metrics=False)
+    worker = Worker(["BTC/USDT"], bus=MemoryBus(), clients={"nobitex": None, "wallex": None},
+                    engine=engine, notifier=notifier)
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # ten minutes of an unchanged 1% spread, polled every 10 s
+    for k in range(60):
+        t = t0 + timedelta(seconds=10 * k)
+        worker.record(PriceSnapshot(exchange="nobitex", symbol="BTC/USDT", bid=99.0, ask=100.0,
+                                    ts=t))
+        worker.record(PriceSnapshot(exchange="wallex", symbol="BTC/USDT", bid=101.0, ask=102.0,
+                                    ts=t))
+        worker.evaluate_changed(worker.exchanges, worker.symbols)
+    assert 11 <= len(notifier.sent) <= 14
+    assert notifier.sent[-1].ts > t0 + timedelta(minutes=9)
+
+
+def test_depth_mode_reads_live_stream_books(monkeypatch):
+    from types import SimpleNamespace
+    from src.adapters.stream import IncrementalBook
+    from src.config import settings
+    from src.domain.arbitrage_engine import ArbEngine
+    from src.domain.orderbook import OrderBook
+
+    monkeypatch.setattr(settings, "DEPTH_EVAL_ENABLED", True)
+    notifier = SilentNotifier()
+    engine = ArbEngine(0.5, 45, 0.15, notionals=[100], export_metrics=False)
+    stale = OrderBook.from_levels("nobitex", "BTC/USDT", [["99", "10"]], [["100", "10"]])
+    clients = {
+        "nobitex": SimpleNamespace(books={"BTC/USDT": stale}), "wallex": SimpleNamespace(books={}),
+    }
+    worker = Worker(["BTC/USDT"], bus=MemoryBus(), clients=clients, engine=engine,
+                    notifier=notifier)
+    books = {"nobitex": IncrementalBook(), "wallex": IncrementalBook()}
+    # moved down 5% since the REST book
+    books["nobitex"].apply([["94", "10"]], [["95", "10"]], snapshot=True)
+    books["wallex"].apply([["100", "10"]], [["100.5", "10"]], snapshot=True)
+    for name, book in books.items():
+        worker.streams[name] = SimpleNamespace(is_live=lambda: True, books={"BTC/USDT": book})
+
+    asyncio.run(worker.run_cycle(["BTC/USDT"]))
+    assert [(o.buy_from, o.buy_price) for o in notifier.sent] == [("nobitex", 95.0)]
+
+
+def test_adaptive_cycle_is_bulk_only_when_the_due_symbols_are(monkeypatch):
+    from types import SimpleNamespace
+    from src.config import settings
+    from src.worker.scheduler import PollScheduler
+
+    monkeypatch.setattr(settings, "BULK_FETCH_MIN_SYMBOLS", 4)
+    # two requests left in the limiter right now
+    client = SimpleNamespace(_limiter=SimpleNamespace(available=lambda: 2.0))
+    worker = Worker(SYMBOLS, bus=MemoryBus(), clients={"nobitex": client},
+                    notifier=SilentNotifier())
+    scheduler = PollScheduler(SYMBOLS, 1.0, 1.0, 10.0)
+
+    assert len(worker.pop_cycle(scheduler, 0.0)) == 200   # one bulk request each
+    scheduler.requeue(SYMBOLS[:3], 5.0)
+    # three due symbols go out one request each: only the budget's worth this tick
+    assert worker.pop_cycle(scheduler, 5.0) == SYMBOLS[:2]
+    assert worker.pop_cycle(scheduler, 5.0) == SYMBOLS[2:3]